@@ -0,0 +1,245 @@
+"""Column decoding benchmarks.
+
+Compares psycopg's default loading against the loaders in src/repository/adapters.py:
+enum columns as strings that pydantic parses into CreditScoreRating, SpendingCategory,
+CardType and RewardStructure, against loading the Python enums directly; and DECIMAL
+columns as Decimal that pydantic converts to float, against loading float or scaled
+integers directly. The decode step is always timed in process on generated values, as
+is setting up the adapters of a new connection, registering them on each connection
+against starting from the map shared by every connection to a database. With --database-url, scans over a seeded
+database (see repository_benchmark) are timed too, in text and binary format, and so
+is a whole get_card_by_id-style call on a fresh connection:
+
+    python -m benchmarks.decode_benchmark
+    python -m benchmarks.decode_benchmark --database-url postgresql:///ccr_bench --scan-rows 500000
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+import psycopg
+from psycopg.adapt import AdaptersMap, Transformer
+from psycopg.pq import Format
+from psycopg.types.enum import EnumInfo
+from psycopg.types.numeric import DecimalBinaryDumper
+from pydantic import TypeAdapter
+from src.model.enums import CardType, CreditScoreRating, RewardStructure, SpendingCategory
+from src.repository import adapters
+
+# Reads the recommendation and export paths make, with the model type of each column
+SCANS = {
+    "cards": ("SELECT card_type, reward_structure, foreign_transaction_fee FROM credit_cards LIMIT %s",
+              (CardType, RewardStructure, float)),
+    "card_categories": ("SELECT category, rate FROM card_spending_category LIMIT %s", (SpendingCategory, float)),
+    "user_spend": ("""
+        SELECT u.credit_score, usc.category
+        FROM user_spending_category usc JOIN users u ON u.id = usc.user_id
+        LIMIT %s
+    """, (CreditScoreRating, SpendingCategory)),
+}
+
+
+def best_time(operation: Callable[[], object], repeats: int) -> float:
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        operation()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def enum_cases(values: int) -> Dict[str, Callable[[], object]]:
+    """Decoding of generated enum labels, as strings plus pydantic and through the registered loaders"""
+    infos = made_up_enum_infos()
+    context = SimpleNamespace(adapters=AdaptersMap(psycopg.adapters), connection=None)
+    adapters.register_enums(context, infos)
+    transformer = Transformer(context)
+    text_loader = Transformer().get_loader(psycopg.postgres.types["text"].oid, Format.TEXT)
+
+    columns: List[Tuple[EnumInfo, type, List[bytes]]] = []
+    for name, enum in adapters.ENUM_TYPES.items():
+        labels = [member.value.encode() for member in enum]
+        columns.append((infos[name], enum, [labels[i % len(labels)] for i in range(values)]))
+
+    def as_strings():
+        for _, enum, data in columns:
+            validate = TypeAdapter(enum).validate_python
+            [validate(text_loader.load(value)) for value in data]
+
+    def make_adapter_case(format: Format) -> Callable[[], object]:
+        def with_adapters():
+            for info, enum, data in columns:
+                load = transformer.get_loader(info.oid, format).load
+                # Models still validate the field, which for an enum member is an identity check
+                validate = TypeAdapter(enum).validate_python
+                [validate(load(value)) for value in data]
+        return with_adapters
+
+    return {
+        "enum/strings": as_strings,
+        "enum/adapters_text": make_adapter_case(Format.TEXT),
+        "enum/adapters_binary": make_adapter_case(Format.BINARY),
+    }
+
+
+def made_up_enum_infos() -> Dict[str, EnumInfo]:
+    # Made-up OIDs: only the adapters maps registered here ever see them
+    return {name: EnumInfo(name, 90000 + 2 * index, 90001 + 2 * index, [member.value for member in enum])
+            for index, (name, enum) in enumerate(adapters.ENUM_TYPES.items())}
+
+
+def connection_cases(connections: int) -> Dict[str, Callable[[], object]]:
+    """Setting up the adapters of new connections, registering them on each one or starting from a shared map"""
+    infos = made_up_enum_infos()
+    shared = AdaptersMap(psycopg.adapters)
+    adapters.register_enums(shared, infos)
+    adapters.register_numeric(shared, "float")
+
+    def per_connection():
+        for _ in range(connections):
+            context = SimpleNamespace(adapters=AdaptersMap(psycopg.adapters), connection=None)
+            adapters.register_enums(context, infos)
+            adapters.register_numeric(context, "float")
+
+    def shared_map():
+        for _ in range(connections):
+            # What psycopg.connect(url, context=shared) does with the map
+            AdaptersMap(shared)
+
+    return {"connection/per_connection": per_connection, "connection/shared_map": shared_map}
+
+
+def numeric_cases(values: int) -> Dict[str, Callable[[], object]]:
+    """Decoding of generated DECIMAL(5,3) values as Decimal plus pydantic, float and scaled integers"""
+    numbers = [Decimal(i % 100_000).scaleb(-3) for i in range(values)]
+    data = {Format.TEXT: [str(number).encode() for number in numbers],
+            Format.BINARY: [bytes(DecimalBinaryDumper(Decimal).dump(number)) for number in numbers]}
+    oid = psycopg.postgres.types["numeric"].oid
+    to_float = TypeAdapter(float).validate_python
+
+    def make_case(mode: str, format: Format, validate: bool) -> Callable[[], object]:
+        context = SimpleNamespace(adapters=AdaptersMap(psycopg.adapters), connection=None)
+        load = Transformer(adapters.register_numeric(context, mode, scale=3)).get_loader(oid, format).load
+
+        def case():
+            # Scaled integers are used as they are rather than fed to a float field
+            if validate:
+                return [to_float(load(value)) for value in data[format]]
+            return [load(value) for value in data[format]]
+        return case
+
+    return {
+        "numeric/decimal_text": make_case("decimal", Format.TEXT, True),
+        "numeric/decimal_binary": make_case("decimal", Format.BINARY, True),
+        "numeric/float_text": make_case("float", Format.TEXT, True),
+        "numeric/float_binary": make_case("float", Format.BINARY, True),
+        "numeric/scaled_text": make_case("scaled", Format.TEXT, False),
+        "numeric/scaled_binary": make_case("scaled", Format.BINARY, False),
+    }
+
+
+def scan_cases(database_url: str, rows: int) -> Tuple[Dict[str, Callable[[], object]], List[psycopg.Connection]]:
+    """Scans on a connection with psycopg's default loaders and on one with the enum and float loaders"""
+    plain = psycopg.connect(database_url, autocommit=True)
+    adapted = psycopg.connect(database_url, autocommit=True)
+    adapters.register_enums(adapted)
+    adapters.register_numeric(adapted, "float")
+
+    def make_case(conn: psycopg.Connection, scan: str, binary: bool) -> Callable[[], object]:
+        query, types = SCANS[scan]
+        validators = [TypeAdapter(column_type).validate_python for column_type in types]
+
+        def case():
+            with conn.cursor(binary=binary) as cur:
+                cur.execute(query, (rows,))
+                return [[validate(value) for validate, value in zip(validators, row)] for row in cur]
+        return case
+
+    cases = {}
+    for scan in SCANS:
+        cases[f"scan/{scan}/default"] = make_case(plain, scan, False)
+        cases[f"scan/{scan}/adapters_text"] = make_case(adapted, scan, False)
+        cases[f"scan/{scan}/adapters_binary"] = make_case(adapted, scan, True)
+    return cases, [plain, adapted]
+
+
+def call_cases(database_url: str, calls: int) -> Dict[str, Callable[[], object]]:
+    """One primary key lookup per fresh connection, as a repository call makes, with each way of setting up adapters"""
+    query = "SELECT id, name, card_type, annual_fee, foreign_transaction_fee FROM credit_cards WHERE id = %s"
+
+    def per_connection():
+        for _ in range(calls):
+            with psycopg.connect(database_url) as conn:
+                adapters.register_enums(conn)
+                adapters.register_numeric(conn, "float")
+                conn.execute(query, (1,)).fetchone()
+
+    def shared_map():
+        for _ in range(calls):
+            with adapters.connect(database_url) as conn:
+                conn.execute(query, (1,)).fetchone()
+
+    # Fetch the enum types and build the shared map before timing
+    shared_map()
+    return {"call/get_card_by_id/per_connection": per_connection, "call/get_card_by_id/shared_map": shared_map}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.decode_benchmark",
+                                     description="Time enum and DECIMAL decoding with and without the psycopg adapters")
+    parser.add_argument("--values", type=int, default=100_000, help="Generated values per column for the decode cases")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DB_URL"),
+                        help="Seeded database for the scan cases (defaults to BENCH_DB_URL; skipped if unset)")
+    parser.add_argument("--scan-rows", type=int, default=100_000, help="LIMIT of each scan")
+    parser.add_argument("--connections", type=int, default=1000,
+                        help="New connections set up by the connection cases")
+    parser.add_argument("--calls", type=int, default=200, help="Calls, each on a new connection, of the call cases")
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per case; the best is kept")
+    parser.add_argument("--output", help="JSON file for the results (defaults to stdout)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    results: Dict[str, Dict[str, float]] = {}
+    connections: List[psycopg.Connection] = []
+
+    cases = {name: (case, args.values * len(adapters.ENUM_TYPES)) for name, case in enum_cases(args.values).items()}
+    cases.update({name: (case, args.values) for name, case in numeric_cases(args.values).items()})
+    cases.update({name: (case, args.connections) for name, case in connection_cases(args.connections).items()})
+    try:
+        if args.database_url:
+            scans, connections = scan_cases(args.database_url, args.scan_rows)
+            cases.update({name: (case, None) for name, case in scans.items()})
+            cases.update({name: (case, args.calls) for name, case in call_cases(args.database_url, args.calls).items()})
+
+        for name, (case, count) in cases.items():
+            if count is None:
+                result = case()
+                count = len(result) * len(result[0]) if result else 0
+            seconds = best_time(case, args.repeats)
+            results[name] = {"values": count, "seconds": round(seconds, 6),
+                             "ns_per_value": round(seconds / count * 1e9, 1) if count else 0.0}
+            print(f"{name:<32} {results[name]['ns_per_value']:>10} ns/value", file=sys.stderr)
+    finally:
+        for conn in connections:
+            conn.close()
+
+    encoded = json.dumps({"python": platform.python_version(), "psycopg": psycopg.__version__,
+                          "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(encoded + "\n")
+    else:
+        print(encoded)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Import-time budgets for the backend packages.
+
+Imports every module of each package in a fresh interpreter under `python -X importtime`
+and checks the cost against a per-package budget. Modules that should only load on
+first use (dotenv, email_validator) are also checked to stay out of those imports.
+Interpreter startup is measured separately and left out of each figure. From `backend/`:
+
+    python -m benchmarks.import_benchmark
+    python -m benchmarks.import_benchmark --packages src.model,src.repository --repeats 10
+"""
+import argparse
+import json
+import pkgutil
+import subprocess
+import sys
+from importlib import import_module
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+# Milliseconds allowed for importing every module of the package into a fresh interpreter
+BUDGETS_MS = {
+    "src.model": 150,
+    "src.repository": 275,
+    "src.service": 275,
+    "src.controller": 550,
+    "src.settings": 15,
+    "src.cli": 10,
+}
+
+# Modules a package must not import up front
+DEFERRED = {
+    "src.model": ("email_validator", "dotenv"),
+    "src.repository": ("email_validator", "dotenv"),
+    "src.service": ("email_validator", "dotenv"),
+    # FastAPI imports email_validator itself when it is installed, so only dotenv is checked here
+    "src.controller": ("dotenv",),
+    "src.settings": ("dotenv",),
+    "src.cli": ("psycopg", "pydantic", "dotenv"),
+}
+
+
+def package_modules(package: str) -> List[str]:
+    """The package itself plus every module inside it"""
+    module = import_module(package)
+    if not hasattr(module, "__path__"):
+        return [package]
+    return [package] + [info.name for info in pkgutil.walk_packages(module.__path__, prefix=f"{package}.")]
+
+
+def parse_importtime(output: str) -> Dict[str, Tuple[int, int]]:
+    """Every module in -X importtime output, mapped to (cumulative microseconds, nesting depth)"""
+    modules: Dict[str, Tuple[int, int]] = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules[name.strip()] = (int(cumulative), depth)
+    return modules
+
+
+def run_importtime(modules: List[str]) -> Dict[str, Tuple[int, int]]:
+    statement = "; ".join(f"import {module}" for module in modules) or "pass"
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=BACKEND,
+                               capture_output=True, text=True, check=True)
+    return parse_importtime(completed.stderr)
+
+
+def measure(package: str, startup: Set[str], repeats: int) -> Tuple[float, Set[str]]:
+    """Best-of-repeats milliseconds to import a package, and every module it pulled in"""
+    modules = package_modules(package)
+    best = None
+    imported: Set[str] = set()
+    for _ in range(repeats):
+        timings = run_importtime(modules)
+        imported = set(timings)
+        total = sum(cumulative for name, (cumulative, depth) in timings.items()
+                    if depth == 0 and name not in startup)
+        best = total if best is None else min(best, total)
+    return best / 1000, imported
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.import_benchmark",
+                                     description="Check the import time of each backend package against its budget")
+    parser.add_argument("--packages", default=",".join(BUDGETS_MS), help="Comma separated packages to measure")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per package; the best is kept")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget, e.g. for slow CI machines")
+    parser.add_argument("--output", help="JSON file for the results (defaults to stdout)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    startup = set(run_importtime([]))
+    results: Dict[str, Dict] = {}
+    failures: List[str] = []
+
+    for package in [package for package in args.packages.split(",") if package]:
+        elapsed_ms, imported = measure(package, startup, args.repeats)
+        budget_ms = BUDGETS_MS.get(package)
+        eager = sorted(name for name in DEFERRED.get(package, ()) if name in imported)
+        results[package] = {"ms": round(elapsed_ms, 1), "budget_ms": budget_ms, "eager_imports": eager}
+        if budget_ms is not None and elapsed_ms > budget_ms * args.scale:
+            failures.append(f"{package} took {elapsed_ms:.1f} ms, budget {budget_ms * args.scale:.0f} ms")
+        if eager:
+            failures.append(f"{package} imports {', '.join(eager)} up front")
+        print(f"{package:<16} {elapsed_ms:>8.1f} ms  budget {budget_ms if budget_ms is not None else '-':>5}"
+              f"{'  eager: ' + ', '.join(eager) if eager else ''}", file=sys.stderr)
+
+    for failure in failures:
+        print(f"OVER BUDGET {failure}", file=sys.stderr)
+    encoded = json.dumps({"python": sys.version.split()[0], "results": results, "failures": failures}, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(encoded + "\n")
+    else:
+        print(encoded)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
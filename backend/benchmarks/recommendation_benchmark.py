@@ -0,0 +1,182 @@
+"""Recommendation engine micro-benchmarks.
+
+Times the scoring functions in src/service/scoring.py on synthetic catalogs built in
+memory, with no database involved. Each operation is reported as ns/op together with
+the bytes and blocks it allocates, per catalog size. Results can be saved as a baseline
+and later runs compared against it:
+
+    python -m benchmarks.recommendation_benchmark --sizes 100,1000,10000 --save-baseline baseline.json
+    python -m benchmarks.recommendation_benchmark --sizes 100,1000,10000 --baseline baseline.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+from src.model.enums import CreditScoreRating, SpendingCategory
+from src.service.scoring import (CatalogMatrix, annual_spend_vector, build_catalog_matrix, eligible_rows,
+                                 optimize_wallet, score_all, score_card)
+from src.service.synthetic_data import SyntheticDataGenerator
+
+
+def build_catalog(cards: int, seed: int) -> CatalogMatrix:
+    generator = SyntheticDataGenerator(seed=seed, banks=max(1, min(50, cards // 20)), cards=cards, users=0)
+    return build_catalog_matrix(list(generator.cards()), list(generator.card_categories()),
+                                list(generator.banks()))
+
+
+def build_spend_vectors(users: int, seed: int) -> List:
+    generator = SyntheticDataGenerator(seed=seed, banks=1, cards=0, users=users)
+    monthly: Dict[int, Dict[SpendingCategory, float]] = defaultdict(dict)
+    for spend in generator.user_spending():
+        monthly[spend.user_id][spend.category] = spend.user_spend
+    return [annual_spend_vector(monthly[user_id]) for user_id in sorted(monthly)]
+
+
+def operations(matrix: CatalogMatrix, spend_vectors: List, batch_size: int) -> Dict[str, Callable[[], object]]:
+    """The operations to time, each a no-argument callable over prepared inputs"""
+    spend = spend_vectors[0]
+    batch = spend_vectors[:batch_size]
+    rows = eligible_rows(matrix, CreditScoreRating.GOOD)
+    # Capped evaluation: only the cards whose bonuses hit caps or rotate
+    width = len(spend)
+    capped_rows = [row for row in range(len(matrix))
+                   if any(matrix.caps[row * width + column] or matrix.rotating[row * width + column]
+                          for column in range(width))]
+
+    def single_user():
+        return [score_card(matrix, row, spend) for row in rows]
+
+    def batch_scoring():
+        return [score_all(matrix, vector) for vector in batch]
+
+    def capped_evaluation():
+        return [score_card(matrix, row, spend) for row in capped_rows]
+
+    def wallet_optimization():
+        return optimize_wallet(matrix, spend, rows, max_cards=3)
+
+    return {
+        "single_user_scoring": single_user,
+        "batch_scoring": batch_scoring,
+        "capped_evaluation": capped_evaluation,
+        "wallet_optimization": wallet_optimization,
+    }
+
+
+def time_operation(operation: Callable[[], object], min_seconds: float, repeats: int) -> float:
+    """Best-of-repeats nanoseconds per call, each repeat lasting at least min_seconds"""
+    calls = 1
+    while True:
+        started = time.perf_counter_ns()
+        for _ in range(calls):
+            operation()
+        elapsed = time.perf_counter_ns() - started
+        if elapsed >= min_seconds * 1e9:
+            break
+        calls *= 2
+
+    best = elapsed / calls
+    for _ in range(repeats - 1):
+        started = time.perf_counter_ns()
+        for _ in range(calls):
+            operation()
+        best = min(best, (time.perf_counter_ns() - started) / calls)
+    return best
+
+
+def measure_allocations(operation: Callable[[], object]) -> Dict[str, int]:
+    """Bytes and blocks allocated by one call, including what it returns"""
+    operation()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = operation()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    stats = after.compare_to(before, "filename")
+    return {
+        "alloc_bytes": sum(max(0, stat.size_diff) for stat in stats),
+        "alloc_blocks": sum(max(0, stat.count_diff) for stat in stats),
+        "peak_bytes": peak,
+    }
+
+
+def run(sizes: List[int], users: int, batch_size: int, min_seconds: float, repeats: int,
+        seed: int) -> Dict[str, Dict[str, Dict[str, float]]]:
+    spend_vectors = build_spend_vectors(max(users, batch_size), seed)
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for size in sizes:
+        matrix = build_catalog(size, seed)
+        for name, operation in operations(matrix, spend_vectors, batch_size).items():
+            result = {"ns_per_op": round(time_operation(operation, min_seconds, repeats), 1)}
+            result.update(measure_allocations(operation))
+            results.setdefault(str(size), {})[name] = result
+            print(f"{size:>6} cards  {name:<22} {result['ns_per_op']:>14,.0f} ns/op  "
+                  f"{result['alloc_bytes']:>10,} B  {result['alloc_blocks']:>7,} blocks", file=sys.stderr)
+    return results
+
+
+def find_regressions(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Operations that got slower than threshold times their baseline ns/op"""
+    regressions = []
+    for size, by_operation in results.items():
+        for name, result in by_operation.items():
+            previous = baseline.get(size, {}).get(name)
+            if not previous:
+                continue
+            ratio = result["ns_per_op"] / previous["ns_per_op"]
+            if ratio > threshold:
+                regressions.append(f"{name} at {size} cards: {previous['ns_per_op']:,.0f} -> "
+                                   f"{result['ns_per_op']:,.0f} ns/op ({ratio:.2f}x)")
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.recommendation_benchmark",
+                                     description="Micro-benchmark the recommendation scoring functions")
+    parser.add_argument("--sizes", default="100,1000,10000", help="Comma separated catalog sizes")
+    parser.add_argument("--users", type=int, default=1000, help="Synthetic users to draw spend profiles from")
+    parser.add_argument("--batch-size", type=int, default=100, help="Users scored per batch_scoring call")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="Minimum length of each timing run")
+    parser.add_argument("--repeats", type=int, default=3, help="Timing runs per operation; the best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Flag operations slower than this multiple of the baseline")
+    parser.add_argument("--save-baseline", help="Write this run's results as a new baseline")
+    parser.add_argument("--output", help="JSON file for this run's results (defaults to stdout)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results = run(sizes, args.users, args.batch_size, args.min_seconds, args.repeats, args.seed)
+    report = {"python": platform.python_version(), "seed": args.seed, "results": results, "regressions": []}
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        report["regressions"] = find_regressions(results, baseline["results"], args.threshold)
+        for regression in report["regressions"]:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+
+    encoded = json.dumps(report, indent=2)
+    for path in (args.save_baseline, args.output):
+        if path:
+            with open(path, "w") as handle:
+                handle.write(encoded + "\n")
+    if not args.output:
+        print(encoded)
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
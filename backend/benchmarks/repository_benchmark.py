@@ -0,0 +1,327 @@
+"""Repository benchmark suite.
+
+Seeds a local PostgreSQL database at a chosen scale, then calls each repository method
+repeatedly and records throughput and latency percentiles as JSON. Run from backend/
+against a database that has the migrations applied and holds nothing you want to keep:
+
+    python -m benchmarks.repository_benchmark --database-url postgresql:///ccr_bench \\
+        --cards 10000 --users 1000000 --spend-rows 5000000 --output results.json
+
+With --memory the same rows are generated into the in-memory repositories instead, which
+needs no database and measures the Python side of each method on its own.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+import psycopg
+from src.model.card import Bank, Card, SpendingCategoryInfo
+from src.model.enums import CardType, CreditScoreRating, RewardStructure, SpendingCategory
+from src.model.user import AuthorizedUserInfo, User
+from src.repository.authorized_user_repository import AuthorizedUserRepository
+from src.repository.bank_repository import BankRepository
+from src.repository.card_repository import CardRepository
+from src.repository.memory import (MemoryAuthorizedUserRepository, MemoryBankRepository, MemoryCardRepository,
+                                   MemoryStore, MemoryUserRepository)
+from src.repository.user_repository import UserRepository
+
+SEED_STATEMENTS = (
+    """
+    TRUNCATE users, banks, credit_cards, card_spending_category, authorized_user_info, user_spending_category
+    RESTART IDENTITY CASCADE
+    """,
+    """
+    INSERT INTO banks (name, relationship_bank, transfer_points_value_cents, reports_under_eighteen)
+    SELECT 'Bench Bank ' || i, i %% 4 = 0,
+           CASE WHEN i %% 3 = 0 THEN NULL ELSE 0.8 + (i %% 13) * 0.1 END, i %% 2 = 0
+    FROM generate_series(1, %(banks)s) AS i
+    """,
+    """
+    INSERT INTO credit_cards (name, bank_id, card_type, sub_max_value, sub_description, annual_fee,
+                              foreign_transaction_fee, reward_structure)
+    SELECT 'Bench Card ' || i, 1 + i %% %(banks)s, (enum_range(NULL::card_type))[1 + i %% 4],
+           (i %% 10) * 10000, 'Spend $' || (1 + i %% 5) * 1000 || ' in the first 3 months',
+           (ARRAY[0, 0, 0, 95, 95, 250, 550, 695])[1 + i %% 8], (i %% 2) * 0.03,
+           (enum_range(NULL::reward_structure))[1 + i %% 2]
+    FROM generate_series(1, %(cards)s) AS i
+    """,
+    """
+    INSERT INTO card_spending_category (card_id, category, rate, cap, quarterly_rotating)
+    SELECT card.id, (enum_range(NULL::spending_category))[1 + (card.id * 7 + k * 3) %% 9],
+           1.5 + (card.id + k) %% 4, CASE WHEN k = 0 AND card.id %% 5 = 0 THEN 1500 END,
+           k = 0 AND card.id %% 10 = 0
+    FROM credit_cards AS card CROSS JOIN generate_series(0, 2) AS k
+    """,
+    """
+    INSERT INTO users (name, email, credit_score, annual_income)
+    SELECT 'Bench User ' || i, 'bench' || i || '@example.com',
+           (enum_range(NULL::credit_score))[1 + (i * 7) %% 5], 15000 + (i * 7919) %% 185000
+    FROM generate_series(1, %(users)s) AS i
+    """,
+    """
+    INSERT INTO user_spending_category (user_id, category, user_spend)
+    SELECT u, (enum_range(NULL::spending_category))[1 + (u + k) %% 9], 50 + (u * 31 + k * 17) %% 950
+    FROM generate_series(1, %(users)s) AS u CROSS JOIN generate_series(0, %(spend_per_user)s - 1) AS k
+    WHERE (u - 1) * %(spend_per_user)s + k < %(spend_rows)s
+    """,
+    """
+    INSERT INTO authorized_user_info (user_id, bank_id, add_after_age_eighteen)
+    SELECT u, 1 + u %% %(banks)s, u %% 20 = 0
+    FROM generate_series(10, %(users)s, 10) AS u
+    """,
+    "ANALYZE",
+)
+
+
+def seed(database_url: str, banks: int, cards: int, users: int, spend_rows: int) -> float:
+    """Replace the database contents with generated rows. Returns the seconds taken"""
+    spend_per_user = min(len(SpendingCategory), -(-spend_rows // users)) if users else 0
+    params = {"banks": banks, "cards": cards, "users": users, "spend_rows": spend_rows,
+              "spend_per_user": spend_per_user}
+    started = time.perf_counter()
+    with psycopg.connect(database_url, autocommit=True) as conn:
+        for statement in SEED_STATEMENTS:
+            conn.execute(statement, params)
+    return time.perf_counter() - started
+
+
+Repositories = Tuple[CardRepository, BankRepository, UserRepository, AuthorizedUserRepository]
+
+
+def seed_memory(store: MemoryStore, banks: int, cards: int, users: int, spend_rows: int) -> float:
+    """Generate the rows SEED_STATEMENTS would into an in-memory store. Returns the seconds taken"""
+    started = time.perf_counter()
+    card_repo, bank_repo, user_repo, au_repo = memory_repositories(store)
+    card_types, reward_structures = list(CardType), list(RewardStructure)
+    categories, credit_scores = list(SpendingCategory), list(CreditScoreRating)
+    fees = (0, 0, 0, 95, 95, 250, 550, 695)
+
+    for i in range(1, banks + 1):
+        bank_repo.create_bank(Bank(name=f"Bench Bank {i}", relationship_bank=i % 4 == 0,
+                                   transfer_points_value_cents=None if i % 3 == 0 else 0.8 + (i % 13) * 0.1,
+                                   reports_under_eighteen=i % 2 == 0))
+    for i in range(1, cards + 1):
+        card_repo.create_card(Card(name=f"Bench Card {i}", bank_id=1 + i % banks, card_type=card_types[i % 4],
+                                   sub_max_value=(i % 10) * 10000,
+                                   sub_description=f"Spend ${(1 + i % 5) * 1000} in the first 3 months",
+                                   annual_fee=fees[i % 8], foreign_transaction_fee=(i % 2) * 0.03,
+                                   reward_structure=reward_structures[i % 2]))
+        card_repo.add_spending_categories([
+            SpendingCategoryInfo(card_id=i, category=categories[(i * 7 + k * 3) % 9], rate=1.5 + (i + k) % 4,
+                                 cap=1500 if k == 0 and i % 5 == 0 else None,
+                                 quarterly_rotating=k == 0 and i % 10 == 0)
+            for k in range(3)
+        ])
+    for i in range(1, users + 1):
+        user_repo.create_user(User(name=f"Bench User {i}", email=f"bench{i}@example.com",
+                                   credit_score=credit_scores[(i * 7) % 5], annual_income=15000 + (i * 7919) % 185000))
+
+    spend_per_user = min(len(SpendingCategory), -(-spend_rows // users)) if users else 0
+    user_repo.bulk_upsert_spending([
+        (u, categories[(u + k) % 9], 50 + (u * 31 + k * 17) % 950)
+        for u in range(1, users + 1) for k in range(spend_per_user)
+        if (u - 1) * spend_per_user + k < spend_rows
+    ])
+    au_repo.add_all_info([
+        AuthorizedUserInfo(user_id=u, bank_id=1 + u % banks, add_after_age_eighteen=u % 20 == 0)
+        for u in range(10, users + 1, 10)
+    ])
+    return time.perf_counter() - started
+
+
+def sql_repositories(database_url: str, connection: Optional[psycopg.Connection]) -> Repositories:
+    return (CardRepository(database_url, connection=connection), BankRepository(database_url, connection=connection),
+            UserRepository(database_url, connection=connection),
+            AuthorizedUserRepository(database_url, connection=connection))
+
+
+def memory_repositories(store: MemoryStore) -> Repositories:
+    return (MemoryCardRepository(store), MemoryBankRepository(store), MemoryUserRepository(store),
+            MemoryAuthorizedUserRepository(store))
+
+
+Case = Tuple[str, Callable[[random.Random], Callable[[], object]]]
+
+
+def build_cases(repositories: Repositories, banks: int, cards: int, users: int) -> List[Case]:
+    """(name, factory) pairs. A factory returns the next call to time, with its arguments drawn"""
+    card_repo, bank_repo, user_repo, au_repo = repositories
+    categories = list(SpendingCategory)
+
+    def card_id(rng): return rng.randint(1, cards)
+    def bank_id(rng): return rng.randint(1, banks)
+    def user_id(rng): return rng.randint(1, users)
+
+    return [
+        ("CardRepository.get_card_by_id", lambda rng: (lambda i=card_id(rng): card_repo.get_card_by_id(i))),
+        ("CardRepository.get_cards_by_ids", lambda rng: (
+            lambda ids=[card_id(rng) for _ in range(50)]: card_repo.get_cards_by_ids(ids))),
+        ("CardRepository.get_cards_by_bank", lambda rng: (lambda i=bank_id(rng): card_repo.get_cards_by_bank(i))),
+        ("CardRepository.get_cards_by_type", lambda rng: (
+            lambda t=rng.choice(list(CardType)): card_repo.get_cards_by_type(t))),
+        ("CardRepository.get_cards_with_no_annual_fee", lambda rng: card_repo.get_cards_with_no_annual_fee),
+        ("CardRepository.search_cards", lambda rng: (
+            lambda r=rng.choice(list(RewardStructure)), fee=rng.choice([0, 95, 250]):
+            card_repo.search_cards(reward_structure=r, max_fee=fee, limit=20))),
+        ("CardRepository.get_spending_categories_by_card", lambda rng: (
+            lambda i=card_id(rng): card_repo.get_spending_categories_by_card(i))),
+        ("CardRepository.get_spending_categories_for_cards", lambda rng: (
+            lambda ids=[card_id(rng) for _ in range(50)]: card_repo.get_spending_categories_for_cards(ids))),
+        ("CardRepository.get_catalog_version", lambda rng: card_repo.get_catalog_version),
+        ("BankRepository.get_bank_by_id", lambda rng: (lambda i=bank_id(rng): bank_repo.get_bank_by_id(i))),
+        ("BankRepository.get_bank_by_name", lambda rng: (
+            lambda name=f"Bench Bank {bank_id(rng)}": bank_repo.get_bank_by_name(name))),
+        ("BankRepository.bank_exists", lambda rng: (lambda i=bank_id(rng): bank_repo.bank_exists(i))),
+        ("BankRepository.get_all_banks", lambda rng: bank_repo.get_all_banks),
+        ("BankRepository.get_relationship_banks", lambda rng: bank_repo.get_relationship_banks),
+        ("BankRepository.get_banks_with_transfer_points", lambda rng: bank_repo.get_banks_with_transfer_points),
+        ("UserRepository.get_user_by_id", lambda rng: (lambda i=user_id(rng): user_repo.get_user_by_id(i))),
+        ("UserRepository.get_users_by_ids", lambda rng: (
+            lambda ids=[user_id(rng) for _ in range(100)]: user_repo.get_users_by_ids(ids))),
+        ("UserRepository.get_spending_categories_by_user", lambda rng: (
+            lambda i=user_id(rng): user_repo.get_spending_categories_by_user(i))),
+        ("UserRepository.get_user_profile", lambda rng: (lambda i=user_id(rng): user_repo.get_user_profile(i))),
+        ("UserRepository.get_user_profiles", lambda rng: (
+            lambda ids=[user_id(rng) for _ in range(50)]: user_repo.get_user_profiles(ids))),
+        ("UserRepository.set_spending_profile", lambda rng: (
+            lambda i=user_id(rng), profile={c: rng.randint(0, 1000) for c in rng.sample(categories, 4)}:
+            user_repo.set_spending_profile(i, profile))),
+        ("AuthorizedUserRepository.get_all_info_by_user", lambda rng: (
+            lambda i=user_id(rng): au_repo.get_all_info_by_user(i))),
+        ("AuthorizedUserRepository.get_all_info_by_bank", lambda rng: (
+            lambda i=bank_id(rng): au_repo.get_all_info_by_bank(i))),
+        ("AuthorizedUserRepository.get_info_count", lambda rng: au_repo.get_info_count),
+    ]
+
+
+def summarise(latencies_ns: List[int], elapsed: float) -> Dict[str, float]:
+    """Throughput and latency percentiles, in milliseconds, for one method"""
+    ordered = sorted(latencies_ns)
+    count = len(ordered)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(count - 1, int(fraction * count))] / 1e6
+
+    return {
+        "calls": count,
+        "seconds": round(elapsed, 6),
+        "ops_per_sec": round(count / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / count / 1e6, 4),
+        "p50_ms": round(percentile(0.50), 4),
+        "p99_ms": round(percentile(0.99), 4),
+        "max_ms": round(ordered[-1] / 1e6, 4),
+    }
+
+
+def run_case(factory: Callable[[random.Random], Callable[[], object]], rng: random.Random, duration: float,
+             max_calls: int, warmup: int) -> Dict[str, float]:
+    for _ in range(warmup):
+        factory(rng)()
+
+    latencies: List[int] = []
+    started = time.perf_counter()
+    deadline = started + duration
+    while len(latencies) < max_calls and time.perf_counter() < deadline:
+        call = factory(rng)
+        call_started = time.perf_counter_ns()
+        call()
+        latencies.append(time.perf_counter_ns() - call_started)
+    return summarise(latencies, time.perf_counter() - started)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.repository_benchmark",
+                                     description="Benchmark repository methods against a seeded database")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DB_URL"),
+                        help="Database to seed and benchmark (defaults to BENCH_DB_URL). It is truncated")
+    parser.add_argument("--banks", type=int, default=50)
+    parser.add_argument("--cards", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--spend-rows", type=int, default=500_000)
+    parser.add_argument("--memory", action="store_true",
+                        help="Benchmark the in-memory repositories instead of a database")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the data already in the database")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to spend on each method")
+    parser.add_argument("--max-calls", type=int, default=100_000, help="Stop a method after this many calls")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed calls before each method")
+    parser.add_argument("--reuse-connection", action="store_true",
+                        help="Run every call on one connection instead of connecting per call")
+    parser.add_argument("--filter", help="Only run methods whose name matches this regex")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the argument generator")
+    parser.add_argument("--output", help="JSON file to write (defaults to stdout)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if not args.database_url and not args.memory:
+        print("Set --database-url or BENCH_DB_URL", file=sys.stderr)
+        return 2
+
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "scale": {"banks": args.banks, "cards": args.cards, "users": args.users, "spend_rows": args.spend_rows},
+        "backend": "memory" if args.memory else "postgresql",
+        "settings": {"duration": args.duration, "max_calls": args.max_calls, "warmup": args.warmup,
+                     "reuse_connection": args.reuse_connection, "seed": args.seed},
+        "seed_seconds": None,
+        "results": {},
+    }
+
+    connection = None
+    if args.memory:
+        # An in-memory store starts empty, so it is always seeded
+        store = MemoryStore()
+        print(f"Seeding memory {report['scale']}", file=sys.stderr)
+        report["seed_seconds"] = round(seed_memory(store, args.banks, args.cards, args.users, args.spend_rows), 3)
+        repositories = memory_repositories(store)
+    else:
+        if not args.skip_seed:
+            print(f"Seeding {report['scale']}", file=sys.stderr)
+            report["seed_seconds"] = round(seed(args.database_url, args.banks, args.cards, args.users,
+                                                args.spend_rows), 3)
+        if args.reuse_connection:
+            connection = psycopg.connect(args.database_url, autocommit=True)
+        repositories = sql_repositories(args.database_url, connection)
+
+    try:
+        pattern = re.compile(args.filter) if args.filter else None
+        for name, factory in build_cases(repositories, args.banks, args.cards, args.users):
+            if pattern and not pattern.search(name):
+                continue
+            result = run_case(factory, random.Random(args.seed), args.duration, args.max_calls, args.warmup)
+            report["results"][name] = result
+            print(f"{name}: {result['ops_per_sec']} ops/s, p50 {result['p50_ms']} ms, "
+                  f"p99 {result['p99_ms']} ms", file=sys.stderr)
+    finally:
+        if connection is not None:
+            connection.close()
+
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(encoded + "\n")
+    else:
+        print(encoded)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+CREATE TABLE table_versions (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+INSERT INTO table_versions (table_name) VALUES
+    ('banks'),
+    ('credit_cards'),
+    ('card_spending_category');
+
+CREATE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE table_versions
+    SET version = version + 1, updated_at = NOW()
+    WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER banks_bump_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON banks
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER credit_cards_bump_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON credit_cards
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER card_spending_category_bump_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON card_spending_category
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
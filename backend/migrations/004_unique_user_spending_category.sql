@@ -0,0 +1,21 @@
+-- Fold rows that repeat a user's category into the newest one before adding the constraint.
+-- The recommendation service adds up a user's rows per category, so the merged row keeps
+-- the sum of their spend and every user keeps the same effective profile.
+UPDATE user_spending_category newest
+SET user_spend = duplicates.total_spend
+FROM (
+    SELECT MAX(id) AS id, SUM(user_spend) AS total_spend
+    FROM user_spending_category
+    GROUP BY user_id, category
+    HAVING COUNT(*) > 1
+) duplicates
+WHERE newest.id = duplicates.id;
+
+DELETE FROM user_spending_category older
+USING user_spending_category newer
+WHERE older.user_id = newer.user_id
+  AND older.category = newer.category
+  AND older.id < newer.id;
+
+ALTER TABLE user_spending_category
+    ADD CONSTRAINT user_spending_category_user_category_key UNIQUE (user_id, category);
@@ -0,0 +1,11 @@
+-- Tell listening processes to drop their cached banks (see src/repository/bank_cache.py)
+CREATE FUNCTION notify_bank_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('banks_changed', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER banks_notify_change
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON banks
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_bank_change();
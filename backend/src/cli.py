@@ -0,0 +1,107 @@
+import argparse
+import json
+import sys
+import time
+from typing import List, Optional
+
+def export_command(args: argparse.Namespace) -> int:
+    from src.service.export_service import ExportService
+
+    service = ExportService()
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in service.stream(args.dataset, args.format):
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+def sync_catalog_command(args: argparse.Namespace) -> int:
+    from src.model.card import Card
+    from src.repository.card_repository import CardRepository
+
+    feed = open(args.feed, "rb") if args.feed != "-" else sys.stdin.buffer
+    try:
+        cards = [Card.model_validate_json(line) for line in feed if line.strip()]
+    finally:
+        if args.feed != "-":
+            feed.close()
+
+    result = CardRepository().sync_catalog(cards)
+    print(result.model_dump_json())
+    return 0
+
+def publish_catalog_command(args: argparse.Namespace) -> int:
+    from src.service.catalog_snapshot import publish_catalog
+    from src.service.recommendation_service import RecommendationService
+
+    service = RecommendationService()
+    published = None
+    while True:
+        version = service.card_repo.get_catalog_version()
+        if version != published:
+            matrix, cards = service.load_catalog(version)
+            size = publish_catalog(args.path, matrix, cards)
+            print(f"Published catalog version {version} ({len(cards)} cards, {size} bytes) to {args.path}",
+                  file=sys.stderr)
+            published = version
+        if args.once:
+            return 0
+        time.sleep(args.interval)
+
+def generate_command(args: argparse.Namespace) -> int:
+    from src.service.synthetic_data import SyntheticDataGenerator, load_synthetic_data
+    from src.settings import get_settings
+
+    generator = SyntheticDataGenerator(seed=args.seed, banks=args.banks, cards=args.cards, users=args.users,
+                                       authorized_user_rate=args.authorized_user_rate)
+
+    def progress(table: str, rows: int, seconds: float) -> None:
+        print(f"{table}: {rows} rows in {seconds:.1f}s", file=sys.stderr)
+
+    counts = load_synthetic_data(args.database_url or get_settings().database_url, generator,
+                                 truncate=args.truncate, progress=progress)
+    print(json.dumps(counts))
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="CreditCardRec command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Stream a dataset as NDJSON or CSV")
+    export.add_argument("dataset", choices=["cards", "users", "spend"])
+    export.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    export.add_argument("--output", help="File to write to (defaults to stdout)")
+    export.set_defaults(handler=export_command)
+
+    sync = commands.add_parser("sync-catalog", help="Make the card catalog match an NDJSON feed of cards")
+    sync.add_argument("feed", help="NDJSON file with one card per line, or - for stdin")
+    sync.set_defaults(handler=sync_catalog_command)
+
+    publish = commands.add_parser("publish-catalog",
+                                  help="Publish the scoring catalog to a snapshot file shared by API workers")
+    publish.add_argument("path", help="Snapshot file the workers read (CATALOG_SNAPSHOT_PATH)")
+    publish.add_argument("--interval", type=float, default=5.0, help="Seconds between catalog version checks")
+    publish.add_argument("--once", action="store_true", help="Publish the current catalog and exit")
+    publish.set_defaults(handler=publish_catalog_command)
+
+    generate = commands.add_parser("generate", help="Load seeded synthetic banks, cards and users for scale testing")
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--banks", type=int, default=50)
+    generate.add_argument("--cards", type=int, default=2_000)
+    generate.add_argument("--users", type=int, default=10_000)
+    generate.add_argument("--authorized-user-rate", type=float, default=0.15,
+                          help="Share of users who are authorized users on someone's card")
+    generate.add_argument("--database-url", help="Defaults to DATABASE_URL")
+    generate.add_argument("--truncate", action="store_true", help="Empty the tables before loading")
+    generate.set_defaults(handler=generate_command)
+
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import asyncio
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
+from src.controller.dependencies import get_card_repository, get_loaders, get_serialization_cache
+from src.controller.http_cache import accepts_gzip, catalog_etag, etag_matches, not_modified, payload_response
+from src.model.card import Card, CardDetail
+from src.model.enums import CardType, RewardStructure
+from src.repository.card_repository import CardRepository
+from src.service.dataloader import RepositoryLoaders
+from src.service.serialization_cache import SerializationCache
+
+router = APIRouter(prefix="/cards", tags=["cards"])
+
+_card_list_adapter = TypeAdapter(List[Card])
+
+@router.get("", response_model=List[Card])
+async def search_cards(
+    card_type: Optional[CardType] = None,
+    reward_structure: Optional[RewardStructure] = None,
+    bank_id: Optional[int] = None,
+    min_fee: int = Query(0, ge=0),
+    max_fee: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    card_repo: CardRepository = Depends(get_card_repository),
+    cache: SerializationCache = Depends(get_serialization_cache),
+):
+    """Search the card catalog. Answers 304 when the client already has this catalog version"""
+    # The version is read before the data: if the catalog changes in between, the body is
+    # newer than its tag and the next poll just fetches it again.
+    version = await run_in_threadpool(card_repo.get_catalog_version)
+    use_gzip = accepts_gzip(accept_encoding)
+    etag = catalog_etag(version, "gzip" if use_gzip else None)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    def encode_search() -> bytes:
+        cards = card_repo.search_cards(
+            card_type=card_type,
+            reward_structure=reward_structure,
+            bank_id=bank_id,
+            min_fee=min_fee,
+            max_fee=max_fee,
+            limit=limit,
+            offset=offset
+        )
+        return _card_list_adapter.dump_json(cards)
+
+    view_key = ("search", card_type, reward_structure, bank_id, min_fee, max_fee, limit, offset)
+    payload = await run_in_threadpool(cache.get_or_build, version, view_key, encode_search)
+
+    return payload_response(payload, etag, use_gzip)
+
+@router.get("/{card_id}", response_model=CardDetail)
+async def get_card(
+    card_id: int,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    card_repo: CardRepository = Depends(get_card_repository),
+    loaders: RepositoryLoaders = Depends(get_loaders),
+    cache: SerializationCache = Depends(get_serialization_cache),
+):
+    """Card with its bank and reward categories. Answers 304 when the client already has this catalog version"""
+    version = await run_in_threadpool(card_repo.get_catalog_version)
+    use_gzip = accepts_gzip(accept_encoding)
+    etag = catalog_etag(version, "gzip" if use_gzip else None)
+
+    # The tag covers the whole catalog, so the card has to be found before answering 304:
+    # a missing id is a 404 whatever tag the client sends
+    view_key = ("detail", card_id)
+    payload = cache.get(version, view_key)
+    if payload is None:
+        card, categories = await asyncio.gather(
+            run_in_threadpool(card_repo.get_card_by_id, card_id),
+            run_in_threadpool(card_repo.get_spending_categories_by_card, card_id)
+        )
+        if card is None:
+            raise HTTPException(status_code=404, detail="Card not found")
+
+        bank = await loaders.banks.load(card.bank_id)
+        detail = CardDetail(card=card, bank=bank, spending_categories=categories)
+        payload = await run_in_threadpool(cache.put, version, view_key, detail.model_dump_json().encode())
+
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return payload_response(payload, etag, use_gzip)
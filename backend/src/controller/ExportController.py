@@ -0,0 +1,22 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from src.controller.dependencies import get_export_service
+from src.service.export_service import MEDIA_TYPES, ExportService
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: Literal["cards", "users", "spend"],
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    service: ExportService = Depends(get_export_service),
+):
+    """Stream a whole dataset as NDJSON or CSV"""
+    # StreamingResponse pulls the next chunk only after the previous one was sent,
+    # so the cursor advances at the pace of the client.
+    return StreamingResponse(
+        service.stream(dataset, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{export_format}"'}
+    )
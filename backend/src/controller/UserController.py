@@ -0,0 +1,61 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from psycopg.errors import UniqueViolation
+from src.controller.dependencies import get_loaders, get_recommendation_service, get_user_repository
+from src.model.recommendation import CardRecommendation
+from src.model.user import User, UserPatch, UserProfile
+from src.repository.user_repository import UserRepository
+from src.service.dataloader import RepositoryLoaders
+from src.service.recommendation_service import RecommendationService
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+@router.get("/{user_id}", response_model=UserProfile)
+async def get_user_profile(
+    user_id: int,
+    user_repo: UserRepository = Depends(get_user_repository),
+):
+    """User with their spending categories, authorized user info and those banks"""
+    profile = await run_in_threadpool(user_repo.get_user_profile, user_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return profile
+
+@router.patch("/{user_id}", response_model=User)
+async def patch_user(
+    user_id: int,
+    patch: UserPatch,
+    user_repo: UserRepository = Depends(get_user_repository),
+):
+    """Change only the fields sent in the body"""
+    try:
+        user = await run_in_threadpool(user_repo.patch_user, user_id, patch.model_dump(exclude_unset=True))
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    except UniqueViolation:
+        raise HTTPException(status_code=409, detail="Email already in use")
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return user
+
+@router.get("/{user_id}/recommendations", response_model=List[CardRecommendation])
+async def get_recommendations(
+    user_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    service: RecommendationService = Depends(get_recommendation_service),
+    loaders: RepositoryLoaders = Depends(get_loaders),
+):
+    """Best cards for a user ranked by estimated net yearly value"""
+    recommendations = await run_in_threadpool(service.recommend_for_user, user_id, limit)
+    if recommendations is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Recommended cards often share banks; the loader fetches each distinct bank once
+    banks = await loaders.banks.load_many(rec.card.bank_id for rec in recommendations)
+    for recommendation, bank in zip(recommendations, banks):
+        recommendation.bank = bank
+
+    return recommendations
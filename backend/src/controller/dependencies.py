@@ -0,0 +1,56 @@
+from functools import lru_cache
+from fastapi import Depends
+from src.repository.bank_cache import BankCache
+from src.repository.bank_repository import BankRepository
+from src.repository.card_repository import CardRepository
+from src.repository.query_cache import QueryCache
+from src.repository.user_repository import UserRepository
+from src.service.catalog_snapshot import CatalogSnapshotReader
+from src.service.dataloader import RepositoryLoaders
+from src.service.export_service import ExportService
+from src.service.recommendation_service import RecommendationService
+from src.service.serialization_cache import SerializationCache
+from src.settings import get_settings
+
+@lru_cache(maxsize=None)
+def get_query_cache() -> QueryCache:
+    """Repository read results shared by every request until their tables change"""
+    return QueryCache()
+
+def get_card_repository() -> CardRepository:
+    return CardRepository(query_cache=get_query_cache())
+
+@lru_cache(maxsize=None)
+def get_bank_cache() -> BankCache:
+    """One in-memory copy of the banks table per process, invalidated by NOTIFY"""
+    return BankCache(get_settings().database_url)
+
+def get_bank_repository() -> BankRepository:
+    return BankRepository(cache=get_bank_cache(), query_cache=get_query_cache())
+
+def get_user_repository() -> UserRepository:
+    return UserRepository()
+
+@lru_cache(maxsize=None)
+def get_recommendation_service() -> RecommendationService:
+    """Shared service so the scoring matrix is built once per catalog version.
+
+    When CATALOG_SNAPSHOT_PATH is set the matrix is mapped from the snapshot published
+    by the catalog loader instead, so every worker shares one copy.
+    """
+    snapshot_path = get_settings().catalog_snapshot_path
+    if snapshot_path:
+        return RecommendationService(snapshot=CatalogSnapshotReader(snapshot_path))
+    return RecommendationService()
+
+@lru_cache(maxsize=None)
+def get_serialization_cache() -> SerializationCache:
+    """Encoded catalog views shared by every request for the current catalog version"""
+    return SerializationCache()
+
+def get_export_service() -> ExportService:
+    return ExportService()
+
+def get_loaders(bank_repo: BankRepository = Depends(get_bank_repository)) -> RepositoryLoaders:
+    """Fresh loaders per request so memoized rows never outlive it"""
+    return RepositoryLoaders(bank_repo)
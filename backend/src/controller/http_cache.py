@@ -0,0 +1,45 @@
+from typing import Optional
+from fastapi import Response
+from src.service.serialization_cache import CachedPayload
+
+def catalog_etag(version: int, encoding: Optional[str] = None) -> str:
+    """Strong ETag for catalog responses at a given catalog version and content coding"""
+    if encoding:
+        return f'"catalog-{version}-{encoding}"'
+    return f'"catalog-{version}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag using weak comparison"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """True if the Accept-Encoding header allows a gzip body"""
+    if not accept_encoding:
+        return False
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip().lower().removeprefix("q=")
+        try:
+            return not params or float(quality) > 0
+        except ValueError:
+            return False
+    return False
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response carrying the current ETag"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"})
+
+def payload_response(payload: CachedPayload, etag: str, use_gzip: bool) -> Response:
+    """Write pre-encoded JSON bytes straight to the response"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gzip_body, media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
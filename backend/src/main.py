@@ -0,0 +1,32 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from src.controller import CardController, ExportController, UserController
+from src.repository import instrumentation
+from src.repository.slow_query_log import SlowQueryLog
+from src.settings import get_settings
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    if instrumentation.enabled:
+        instrumentation.export()
+    slow_query_log = getattr(app.state, "slow_query_log", None)
+    if slow_query_log is not None:
+        instrumentation.remove_listener(slow_query_log)
+        slow_query_log.close()
+
+def create_app() -> FastAPI:
+    settings = get_settings()
+    if settings.repository_instrumentation:
+        instrumentation.enable([instrumentation.LoggingExporter()])
+    app = FastAPI(title="CreditCardRec", lifespan=lifespan)
+    if settings.slow_query_log:
+        app.state.slow_query_log = SlowQueryLog(settings.slow_query_log,
+                                                threshold=settings.slow_query_threshold_ms / 1000)
+        instrumentation.add_listener(app.state.slow_query_log)
+    app.include_router(CardController.router)
+    app.include_router(UserController.router)
+    app.include_router(ExportController.router)
+    return app
+
+app = create_app()
@@ -0,0 +1,255 @@
+"""Columnar result sets.
+
+A CardBatch or UserSpendBatch holds the rows of a scan as one typed array (or list)
+per column instead of one pydantic model per row, which saves the per-object dicts
+and repeated strings of large results. Enums are stored as small integer codes and
+repeated text is dictionary-encoded. Indexing a batch gives a lazy view that decodes
+fields on attribute access; a model is only built by view.to_model().
+"""
+import math
+from abc import ABC, abstractmethod
+from array import array
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
+from pydantic import BaseModel
+from .card import Card
+from .enums import CardType, RewardStructure, SpendingCategory
+from .user import SpendingCategoryUser
+
+M = TypeVar("M", bound=BaseModel)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+# Stands for NULL in integer and timestamp columns
+NULL_INT = -2 ** 63
+
+
+class IntColumn:
+    """Optional integers in an array('q'); NULL_INT stands for None"""
+
+    def __init__(self):
+        self.data = array('q')
+
+    def append(self, value: Optional[int]) -> None:
+        self.data.append(NULL_INT if value is None else value)
+
+    def get(self, index: int) -> Optional[int]:
+        value = self.data[index]
+        return None if value == NULL_INT else value
+
+
+class FloatColumn:
+    """Optional floats in an array('d'); NaN stands for None"""
+
+    def __init__(self):
+        self.data = array('d')
+
+    def append(self, value: Optional[float]) -> None:
+        self.data.append(math.nan if value is None else value)
+
+    def get(self, index: int) -> Optional[float]:
+        value = self.data[index]
+        return None if value != value else value
+
+
+class EnumColumn:
+    """Enum members as their position in the enum, in an array('b'); -1 stands for None"""
+
+    def __init__(self, enum: Type[Enum]):
+        self.members = list(enum)
+        self.codes = {member: code for code, member in enumerate(self.members)}
+        self.enum = enum
+        self.data = array('b')
+
+    def append(self, value: Optional[Union[Enum, str]]) -> None:
+        self.data.append(-1 if value is None else self.codes[self.enum(value)])
+
+    def get(self, index: int) -> Optional[Enum]:
+        code = self.data[index]
+        return None if code < 0 else self.members[code]
+
+
+class TextColumn:
+    """Strings kept as they are, for columns whose values rarely repeat"""
+
+    def __init__(self):
+        self.data: List[Optional[str]] = []
+
+    def append(self, value: Optional[str]) -> None:
+        self.data.append(value)
+
+    def get(self, index: int) -> Optional[str]:
+        return self.data[index]
+
+
+class DictionaryColumn:
+    """Repeated strings stored once, with an array('l') of codes into them; -1 stands for None"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self.data = array('l')
+
+    def append(self, value: Optional[str]) -> None:
+        if value is None:
+            self.data.append(-1)
+            return
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        self.data.append(code)
+
+    def get(self, index: int) -> Optional[str]:
+        code = self.data[index]
+        return None if code < 0 else self.values[code]
+
+
+class TimestampColumn:
+    """Naive datetimes as microseconds since 1970 in an array('q'); NULL_INT stands for None"""
+
+    def __init__(self):
+        self.data = array('q')
+
+    def append(self, value: Optional[datetime]) -> None:
+        self.data.append(NULL_INT if value is None else (value - _EPOCH) // _MICROSECOND)
+
+    def get(self, index: int) -> Optional[datetime]:
+        value = self.data[index]
+        return None if value == NULL_INT else _EPOCH + value * _MICROSECOND
+
+
+Column = Union[IntColumn, FloatColumn, EnumColumn, TextColumn, DictionaryColumn, TimestampColumn]
+
+
+class RowView(Generic[M]):
+    """One row of a batch. Fields are decoded when read and nothing is copied"""
+
+    __slots__ = ("batch", "index")
+
+    def __init__(self, batch: "ColumnarBatch[M]", index: int):
+        self.batch = batch
+        self.index = index
+
+    def __getattr__(self, name: str) -> Any:
+        columns = self.batch.columns
+        if name not in columns:
+            raise AttributeError(name)
+        return columns[name].get(self.index)
+
+    def to_model(self) -> M:
+        return self.batch.model(self.index)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={column.get(self.index)!r}" for name, column in self.batch.columns.items())
+        return f"{type(self.batch).__name__}[{self.index}]({fields})"
+
+
+class ColumnarBatch(ABC, Generic[M]):
+    """Rows of one table as a column per field, in the table's SELECT * order"""
+
+    MODEL: Type[BaseModel]
+
+    def __init__(self):
+        self.columns: Dict[str, Column] = self._new_columns()
+        self._appenders = [column.append for column in self.columns.values()]
+
+    @abstractmethod
+    def _new_columns(self) -> Dict[str, Column]:
+        """The empty columns of the batch, in the table's SELECT * order"""
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]):
+        """Build a batch from SELECT * rows"""
+        batch = cls()
+        for row in rows:
+            batch.append_row(row)
+        return batch
+
+    @classmethod
+    def from_models(cls, models: Iterable[M]):
+        batch = cls()
+        for model in models:
+            batch.append_model(model)
+        return batch
+
+    def append_row(self, row: Sequence[Any]) -> None:
+        # zip would silently drop or leave out columns once the query and the batch disagree
+        if len(row) != len(self._appenders):
+            raise ValueError(f"{type(self).__name__} has {len(self._appenders)} columns, got a row of {len(row)}")
+        for append, value in zip(self._appenders, row):
+            append(value)
+
+    def append_model(self, model: M) -> None:
+        for name, column in self.columns.items():
+            column.append(getattr(model, name))
+
+    def column(self, name: str) -> Union[array, List[Optional[str]]]:
+        """The raw storage of a column: values, enum codes or dictionary codes"""
+        return self.columns[name].data
+
+    def model(self, index: int) -> M:
+        return self.MODEL(**{name: column.get(index) for name, column in self.columns.items()})
+
+    def to_models(self) -> List[M]:
+        return [self.model(index) for index in range(len(self))]
+
+    def __len__(self) -> int:
+        return len(self.columns["id"].data)
+
+    def __getitem__(self, index: int) -> RowView[M]:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("batch index out of range")
+        return RowView(self, index)
+
+    def __iter__(self) -> Iterator[RowView[M]]:
+        return (RowView(self, index) for index in range(len(self)))
+
+
+class CardBatch(ColumnarBatch[Card]):
+    """credit_cards rows in columns"""
+
+    MODEL = Card
+
+    def _new_columns(self) -> Dict[str, Column]:
+        return {
+            "id": IntColumn(),
+            "name": TextColumn(),
+            "bank_id": IntColumn(),
+            "card_type": EnumColumn(CardType),
+            "sub_max_value": IntColumn(),
+            "sub_description": DictionaryColumn(),
+            "annual_fee": IntColumn(),
+            "foreign_transaction_fee": FloatColumn(),
+            "reward_structure": EnumColumn(RewardStructure),
+            "fee_credits": DictionaryColumn(),
+            "other_benefits": DictionaryColumn(),
+            "created_at": TimestampColumn(),
+        }
+
+
+class UserSpendBatch(ColumnarBatch[SpendingCategoryUser]):
+    """user_spending_category rows in columns, ordered by user"""
+
+    MODEL = SpendingCategoryUser
+
+    def _new_columns(self) -> Dict[str, Column]:
+        return {
+            "id": IntColumn(),
+            "user_id": IntColumn(),
+            "category": EnumColumn(SpendingCategory),
+            "user_spend": FloatColumn(),
+            "created_at": TimestampColumn(),
+        }
+
+    def user_ranges(self) -> Iterator[Tuple[int, int, int]]:
+        """(user_id, start, stop) for each run of rows belonging to one user"""
+        user_ids = self.columns["user_id"].data
+        start = 0
+        for index in range(1, len(user_ids) + 1):
+            if index == len(user_ids) or user_ids[index] != user_ids[start]:
+                yield user_ids[start], start, index
+                start = index
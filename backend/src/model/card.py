@@ -1,5 +1,5 @@
 from .enums import RewardStructure, SpendingCategory, CardType
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel
 
@@ -37,3 +37,14 @@ class Card(BaseModel):
     fee_credits: Optional[str] = None
     other_benefits: Optional[str] = None
     created_at: Optional[datetime] = None
+
+class CardDetail(BaseModel):
+    card: Card
+    bank: Optional[Bank] = None
+    spending_categories: List[SpendingCategoryInfo] = []
+
+class CatalogSyncResult(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
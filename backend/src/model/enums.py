@@ -1,5 +1,4 @@
 from enum import Enum
-from pydantic import BaseModel, EmailStr, validator
 
 class CreditScoreRating(str, Enum):
     EXCELLENT = "excellent"
@@ -0,0 +1,9 @@
+from typing import Optional
+from pydantic import BaseModel
+from .card import Bank, Card
+
+class CardRecommendation(BaseModel):
+    card: Card
+    bank: Optional[Bank] = None
+    estimated_annual_rewards: float
+    net_annual_value: float
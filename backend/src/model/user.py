@@ -1,7 +1,16 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import AfterValidator, BaseModel, Field, WithJsonSchema
 from .enums import SpendingCategory, CreditScoreRating
-from datetime import datetime
-from typing import List, Optional
+from .card import Bank
+from datetime import date, datetime
+from typing import Annotated, List, Optional
+
+def _validate_email(value: str) -> str:
+    # pydantic only imports email-validator inside validate_email, so the import waits for the first email
+    from pydantic.networks import validate_email
+    return validate_email(value)[1]
+
+# Same checks and normalisation as EmailStr, without importing email-validator with the models
+Email = Annotated[str, AfterValidator(_validate_email), WithJsonSchema({"type": "string", "format": "email"})]
 
 class SpendingCategoryUser(BaseModel):
     id: Optional[int] = None
@@ -26,10 +35,39 @@ class AuthorizedUserInfo(BaseModel):
 class User(BaseModel):
     id: Optional[int] = None
     name: str
-    email: EmailStr
+    email: Email
     credit_score: CreditScoreRating
     annual_income: int
     created_at: Optional[datetime] = None
 
     def __eq__(self, other):
         return self.id == other.id and self.name == other.name
+
+class UserPatch(BaseModel):
+    """Fields of a user that a PATCH may change; anything left out stays as it is"""
+    name: Optional[str] = None
+    email: Optional[Email] = None
+    credit_score: Optional[CreditScoreRating] = None
+    annual_income: Optional[int] = None
+
+class UserProfile(BaseModel):
+    user: User
+    spending_categories: List[SpendingCategoryUser] = []
+    authorized_user_info: List[AuthorizedUserInfo] = []
+    banks: List[Bank] = []
+
+# Width of the annual income bands in the users export
+INCOME_BAND_WIDTH = 25_000
+
+class AnonymisedUser(BaseModel):
+    """User row for partner exports, with no identifiers: income is banded and the sign-up date cut to its month"""
+    credit_score: Optional[CreditScoreRating] = None
+    income_band: Optional[int] = None
+    joined_month: Optional[date] = None
+
+class SpendAggregate(BaseModel):
+    category: SpendingCategory
+    credit_score: Optional[CreditScoreRating] = None
+    user_count: int
+    total_spend: float
+    average_spend: float
@@ -0,0 +1,267 @@
+import struct
+import threading
+import weakref
+import psycopg
+from enum import Enum
+from functools import lru_cache
+from typing import Dict, Optional, Tuple, Type
+from psycopg.abc import AdaptContext, Buffer
+from psycopg.adapt import AdaptersMap, Loader, PyFormat
+from psycopg.pq import Format
+from psycopg.types.enum import EnumInfo, register_enum
+from psycopg.types.numeric import FloatLoader, NumericBinaryLoader, NumericLoader
+from src.model.enums import CardType, CreditScoreRating, RewardStructure, SpendingCategory
+from src.settings import get_settings
+
+# PostgreSQL enum types from 001_create_enums.sql and the Python enums their values load into
+ENUM_TYPES: Dict[str, Type[Enum]] = {
+    "credit_score": CreditScoreRating,
+    "spending_category": SpendingCategory,
+    "card_type": CardType,
+    "reward_structure": RewardStructure,
+}
+
+# How NUMERIC/DECIMAL columns load: "float", "decimal" (psycopg's default) or "scaled" integers
+NUMERIC_LOADERS = ("float", "decimal", "scaled")
+
+NUMERIC_OID = psycopg.postgres.types["numeric"].oid
+
+_lock = threading.Lock()
+_enum_infos: Dict[str, Dict[str, EnumInfo]] = {}
+# (database, numeric loader) -> the adapters every connection to that database starts from
+_adapter_maps: Dict[Tuple[str, str], AdaptersMap] = {}
+_configured: "weakref.WeakSet[psycopg.Connection]" = weakref.WeakSet()
+
+_numeric_head = struct.Struct(">hhHH")
+NUMERIC_NEG = 0x4000
+NUMERIC_NAN = 0xC000
+NUMERIC_PINF = 0xD000
+NUMERIC_NINF = 0xF000
+_NUMERIC_SPECIAL = {NUMERIC_NAN: float("nan"), NUMERIC_PINF: float("inf"), NUMERIC_NINF: float("-inf")}
+_NUMERIC_TEXT_SPECIAL = {b"NaN": NUMERIC_NAN, b"Infinity": NUMERIC_PINF, b"-Infinity": NUMERIC_NINF}
+
+
+def fetch_enum_infos(conn: psycopg.Connection) -> Dict[str, EnumInfo]:
+    """The OIDs and labels of every type in ENUM_TYPES, in one round trip"""
+    # A plain cursor, so the lookup is not reported to the query listeners
+    with psycopg.Cursor(conn) as cur:
+        cur.execute("""
+            SELECT t.typname, t.oid, t.typarray, array_agg(e.enumlabel ORDER BY e.enumsortorder)
+            FROM pg_type t
+            JOIN pg_enum e ON e.enumtypid = t.oid
+            WHERE t.typname = ANY(%s) AND pg_type_is_visible(t.oid)
+            GROUP BY t.typname, t.oid, t.typarray
+        """, (list(ENUM_TYPES),))
+        return {name: EnumInfo(name, oid, array_oid, labels) for name, oid, array_oid, labels in cur.fetchall()}
+
+
+def enum_infos(conn: psycopg.Connection) -> Dict[str, EnumInfo]:
+    """fetch_enum_infos, cached per database so only the first connection pays for it"""
+    key = conn.info.dsn
+    infos = _enum_infos.get(key)
+    if infos is None:
+        infos = fetch_enum_infos(conn)
+        with _lock:
+            infos = _enum_infos.setdefault(key, infos)
+    return infos
+
+
+def clear_enum_cache() -> None:
+    """Forget the cached enum types and the adapters built from them, e.g. after a migration recreated them"""
+    with _lock:
+        _enum_infos.clear()
+        _adapter_maps.clear()
+
+
+def enums_registered(conn: psycopg.Connection) -> bool:
+    return conn.adapters.types.get(next(iter(ENUM_TYPES))) is not None
+
+
+def register_enums(conn: psycopg.Connection, infos: Optional[Dict[str, EnumInfo]] = None) -> psycopg.Connection:
+    """Load the PostgreSQL enums straight into their Python enums on this connection, and dump them back.
+
+    Text and binary loaders and dumpers are both registered, so binary cursors decode
+    enum columns without a string step too. Python enums are dumped with their type's
+    OID. Registering an already registered connection does nothing.
+    """
+    if enums_registered(conn):
+        return conn
+    if infos is None:
+        infos = enum_infos(conn)
+    for name, enum in ENUM_TYPES.items():
+        info = infos.get(name)
+        # Databases without the migrations applied keep loading these columns as strings
+        if info is None:
+            continue
+        register_enum(info, conn, enum, mapping={member: member.value for member in enum})
+    return conn
+
+
+@lru_cache(maxsize=None)
+def _numeric_digits(ndigits: int) -> struct.Struct:
+    return struct.Struct(f">{ndigits}H")
+
+
+def _unpack_numeric(data: Buffer) -> Tuple[int, int, int]:
+    """(sign, digits as one integer, base 10000 exponent) of a binary NUMERIC"""
+    ndigits, weight, sign, _ = _numeric_head.unpack_from(data)
+    value = 0
+    for digit in _numeric_digits(ndigits).unpack_from(data, 8):
+        value = value * 10_000 + digit
+    return sign, value, weight - ndigits + 1
+
+
+class NumericFloatBinaryLoader(Loader):
+    """Binary NUMERIC to float, without building a Decimal"""
+
+    format = Format.BINARY
+
+    def load(self, data: Buffer) -> float:
+        sign, value, exponent = _unpack_numeric(data)
+        if sign in _NUMERIC_SPECIAL:
+            return _NUMERIC_SPECIAL[sign]
+        # int / int rounds correctly, so the result matches float(Decimal(...))
+        result = float(value * 10_000 ** exponent) if exponent >= 0 else value / 10_000 ** -exponent
+        return -result if sign == NUMERIC_NEG else result
+
+
+def _round_half_away(value: int, divisor: int) -> int:
+    quotient, remainder = divmod(value, divisor)
+    return quotient + (2 * remainder >= divisor)
+
+
+class _ScaledIntLoader(Loader):
+    scale = 2
+
+    def _special(self, sign: int) -> None:
+        raise psycopg.DataError(f"NUMERIC {_NUMERIC_SPECIAL.get(sign)} can't be loaded as a scaled integer")
+
+
+class ScaledIntLoader(_ScaledIntLoader):
+    """Text NUMERIC to an integer count of 10 ** -scale units, e.g. cents for scale 2"""
+
+    def load(self, data: Buffer) -> int:
+        text = bytes(data)
+        whole, _, fraction = text.partition(b".")
+        # A column declared with this scale always sends exactly this many decimals
+        if fraction and len(fraction) == self.scale:
+            return int(whole + fraction)
+        if text in _NUMERIC_TEXT_SPECIAL:
+            self._special(_NUMERIC_TEXT_SPECIAL[text])
+        negative = whole[:1] == b"-"
+        value = int(whole.lstrip(b"-") + fraction[:self.scale].ljust(self.scale, b"0"))
+        # PostgreSQL rounds NUMERIC half away from zero, so do the same with the dropped digits
+        if fraction[self.scale:self.scale + 1] >= b"5":
+            value += 1
+        return -value if negative else value
+
+
+class ScaledIntBinaryLoader(_ScaledIntLoader):
+    """Binary NUMERIC to an integer count of 10 ** -scale units"""
+
+    format = Format.BINARY
+
+    def load(self, data: Buffer) -> int:
+        sign, value, exponent = _unpack_numeric(data)
+        if sign in _NUMERIC_SPECIAL:
+            self._special(sign)
+        shift = 4 * exponent + self.scale
+        value = value * 10 ** shift if shift >= 0 else _round_half_away(value, 10 ** -shift)
+        return -value if sign == NUMERIC_NEG else value
+
+
+@lru_cache(maxsize=None)
+def scaled_int_loaders(scale: int) -> Tuple[Type[Loader], Type[Loader]]:
+    """Text and binary loaders for NUMERIC as integers scaled by 10 ** scale"""
+    return (type(f"ScaledIntLoader{scale}", (ScaledIntLoader,), {"scale": scale}),
+            type(f"ScaledIntBinaryLoader{scale}", (ScaledIntBinaryLoader,), {"scale": scale}))
+
+
+def register_numeric(context: AdaptContext, mode: str = "float", scale: int = 2) -> AdaptContext:
+    """Choose how NUMERIC columns load on a connection or cursor.
+
+    "float" skips the Decimal that psycopg builds by default and that the float model
+    fields then convert again. "scaled" loads integers in units of 10 ** -scale, for
+    money kept as whole cents; register it on the cursor of a scan that wants them.
+    "decimal" restores psycopg's default.
+    """
+    if mode == "float":
+        loaders = (FloatLoader, NumericFloatBinaryLoader)
+    elif mode == "decimal":
+        loaders = (NumericLoader, NumericBinaryLoader)
+    elif mode == "scaled":
+        loaders = scaled_int_loaders(scale)
+    else:
+        raise ValueError(f"Unknown numeric loader {mode!r}, expected one of {', '.join(NUMERIC_LOADERS)}")
+    for loader in loaders:
+        context.adapters.register_loader("numeric", loader)
+    return context
+
+
+def shared_adapters(key: str, conn: psycopg.Connection) -> AdaptersMap:
+    """The enum adapters and configured numeric loader for one database, built the first time it is seen.
+
+    register_enum makes new loader and dumper classes on every call, so building them
+    per connection costs more than many of the queries run on it.
+    """
+    mode = get_settings().numeric_loader
+    adapters_map = _adapter_maps.get((key, mode))
+    if adapters_map is None:
+        adapters_map = AdaptersMap(psycopg.adapters)
+        register_enums(adapters_map, enum_infos(conn))
+        register_numeric(adapters_map, mode)
+        with _lock:
+            adapters_map = _adapter_maps.setdefault((key, mode), adapters_map)
+    return adapters_map
+
+
+def copy_adapters(adapters_map: AdaptersMap, conn: psycopg.Connection) -> psycopg.Connection:
+    """Register the classes of a shared map on a connection that was opened without it"""
+    for name, enum in ENUM_TYPES.items():
+        info = adapters_map.types.get(name)
+        if info is None:
+            continue
+        conn.adapters.types.add(info)
+        for format in (Format.TEXT, Format.BINARY):
+            conn.adapters.register_loader(info.oid, adapters_map.get_loader(info.oid, format))
+            conn.adapters.register_loader(info.array_oid, adapters_map.get_loader(info.array_oid, format))
+            conn.adapters.register_dumper(None, adapters_map.get_dumper_by_oid(info.array_oid, format))
+        for format in (PyFormat.TEXT, PyFormat.BINARY):
+            conn.adapters.register_dumper(enum, adapters_map.get_dumper(enum, format))
+    for format in (Format.TEXT, Format.BINARY):
+        conn.adapters.register_loader("numeric", adapters_map.get_loader(NUMERIC_OID, format))
+    return conn
+
+
+def configure_connection(conn: psycopg.Connection) -> psycopg.Connection:
+    """Give a connection opened elsewhere the shared adapters of its database, once"""
+    if conn in _configured:
+        return conn
+    if enums_registered(conn):
+        # Set up by register_enums already; only the numeric loader is missing
+        register_numeric(conn, get_settings().numeric_loader)
+    else:
+        copy_adapters(shared_adapters(conn.info.dsn, conn), conn)
+    _configured.add(conn)
+    return conn
+
+
+def connect(database_url: str, **kwargs) -> psycopg.Connection:
+    """psycopg.connect, starting from the shared adapters of the database.
+
+    Only the first connection to a database pays for looking up its enums and building
+    the adapters; later ones are created from the map, which copies nothing until a
+    connection registers adapters of its own.
+    """
+    adapters_map = _adapter_maps.get((database_url, get_settings().numeric_loader))
+    if adapters_map is not None:
+        conn = psycopg.connect(database_url, context=adapters_map, **kwargs)
+    else:
+        conn = psycopg.connect(database_url, **kwargs)
+        try:
+            copy_adapters(shared_adapters(database_url, conn), conn)
+        except BaseException:
+            conn.close()
+            raise
+    _configured.add(conn)
+    return conn
@@ -1,19 +1,13 @@
-import psycopg, os
-from datetime import datetime
 from typing import Optional, List
-from dotenv import load_dotenv
 from src.model.user import AuthorizedUserInfo
+from src.repository.base import BaseRepository
 
-load_dotenv()
 
-class AuthorizedUserRepository():
-
-    def __init__(self, database_url=None):
-        self.database_url = database_url or os.getenv("DATABASE_URL")
+class AuthorizedUserRepository(BaseRepository):
 
     def add_info(self, au_info: AuthorizedUserInfo) -> AuthorizedUserInfo:
         """Create new info and return with ID"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     INSERT INTO authorized_user_info (user_id, bank_id, add_after_age_eighteen)
@@ -22,12 +16,33 @@ class AuthorizedUserRepository():
                 result = cur.fetchone()
                 au_info.id = result[0]
                 au_info.created_at = result[1]
-                conn.commit()
+                self._commit(conn)
                 return au_info
 
+    def add_all_info(self, au_infos: List[AuthorizedUserInfo]) -> List[AuthorizedUserInfo]:
+        """Create several info rows in one batch and return them with IDs"""
+        if not au_infos:
+            return []
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.executemany("""
+                    INSERT INTO authorized_user_info (user_id, bank_id, add_after_age_eighteen)
+                    VALUES (%s, %s, %s) RETURNING id, created_at
+                    """, [(au_info.user_id, au_info.bank_id, au_info.add_after_age_eighteen)
+                          for au_info in au_infos], returning=True)
+
+                for au_info in au_infos:
+                    result = cur.fetchone()
+                    au_info.id = result[0]
+                    au_info.created_at = result[1]
+                    cur.nextset()
+
+                self._commit(conn)
+                return au_infos
+
     def get_info_by_id(self, info_id: int) -> Optional[AuthorizedUserInfo]:
         """Get authorized user info by ID"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     SELECT * FROM authorized_user_info WHERE id = %s
@@ -48,23 +63,23 @@ class AuthorizedUserRepository():
 
     def remove_info(self, info_id: int) -> bool:
         """Remove authorized user info by ID. Returns True if removed, False if not found"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     DELETE FROM authorized_user_info WHERE id = %s
                 """, (info_id,))
                 
                 rows_affected = cur.rowcount
-                conn.commit()
+                self._commit(conn)
                 
                 return rows_affected > 0
 
     def get_all_info_by_user(self, user_id: int) -> List[AuthorizedUserInfo]:
         """Get all authorized user info for a specific user"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
-                    SELECT * FROM authorized_user_info WHERE user_id = %s ORDER BY created_at DESC
+                    SELECT * FROM authorized_user_info WHERE user_id = %s ORDER BY created_at DESC, id DESC
                 """, (user_id,))
                 
                 info_rows = cur.fetchall()
@@ -81,10 +96,10 @@ class AuthorizedUserRepository():
 
     def get_all_info_by_bank(self, bank_id: int) -> List[AuthorizedUserInfo]:
         """Get all authorized user info for a specific bank"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
-                    SELECT * FROM authorized_user_info WHERE bank_id = %s ORDER BY created_at DESC
+                    SELECT * FROM authorized_user_info WHERE bank_id = %s ORDER BY created_at DESC, id DESC
                 """, (bank_id,))
                 
                 info_rows = cur.fetchall()
@@ -101,7 +116,7 @@ class AuthorizedUserRepository():
 
     def get_info_by_user_and_bank(self, user_id: int, bank_id: int) -> Optional[AuthorizedUserInfo]:
         """Get authorized user info for specific user and bank combination"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     SELECT * FROM authorized_user_info WHERE user_id = %s AND bank_id = %s
@@ -122,7 +137,7 @@ class AuthorizedUserRepository():
 
     def update_info(self, au_info: AuthorizedUserInfo) -> Optional[AuthorizedUserInfo]:
         """Update authorized user info"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     UPDATE authorized_user_info 
@@ -141,7 +156,7 @@ class AuthorizedUserRepository():
                 if not updated_row:
                     return None
                 
-                conn.commit()
+                self._commit(conn)
                 
                 # Update the passed object with any DB changes
                 au_info.created_at = updated_row[4]
@@ -151,9 +166,9 @@ class AuthorizedUserRepository():
    
     def get_all_info(self, limit: Optional[int] = None, offset: int = 0) -> List[AuthorizedUserInfo]:
         """Get all authorized user info with optional pagination"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
-                query = "SELECT * FROM authorized_user_info ORDER BY created_at DESC"
+                query = "SELECT * FROM authorized_user_info ORDER BY created_at DESC, id DESC"
                 params = []
                 
                 if limit:
@@ -178,28 +193,28 @@ class AuthorizedUserRepository():
 
     def info_exists(self, info_id: int) -> bool:
         """Check if authorized user info exists by ID"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("SELECT 1 FROM authorized_user_info WHERE id = %s", (info_id,))
                 return cur.fetchone() is not None
 
     def get_info_count(self) -> int:
         """Get total number of authorized user info records"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("SELECT COUNT(*) FROM authorized_user_info")
                 return cur.fetchone()[0]
 
     def remove_all_info_by_user(self, user_id: int) -> int:
         """Remove all authorized user info for a specific user. Returns number of records removed"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     DELETE FROM authorized_user_info WHERE user_id = %s
                 """, (user_id,))
                 
                 rows_affected = cur.rowcount
-                conn.commit()
+                self._commit(conn)
                 
                 return rows_affected
 
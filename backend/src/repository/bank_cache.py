@@ -0,0 +1,111 @@
+import logging
+import threading
+import psycopg
+from psycopg import sql
+from typing import Callable, Dict, List, Optional
+from src.model.card import Bank
+
+logger = logging.getLogger(__name__)
+
+# Channel the banks trigger notifies on (see migrations/005_notify_bank_changes.sql)
+BANKS_CHANNEL = "banks_changed"
+
+
+class BankSnapshot:
+    """Every bank, indexed the ways BankRepository looks them up"""
+
+    __slots__ = ("by_id", "by_name", "relationship")
+
+    def __init__(self, banks: List[Bank]):
+        self.by_id: Dict[int, Bank] = {bank.id: bank for bank in banks}
+        self.by_name: Dict[str, Bank] = {bank.name: bank for bank in banks}
+        self.relationship: List[Bank] = [bank for bank in banks if bank.relationship_bank]
+
+
+class BankCache:
+    """Process-wide copy of the banks table, kept coherent with LISTEN/NOTIFY.
+
+    A daemon thread holds its own connection listening on the banks channel and drops
+    the snapshot whenever a notification arrives. The snapshot is only served while that
+    listener is connected; before it has started, or after it lost its connection,
+    snapshot() returns None and callers read from the database as usual. A generation
+    counter stops a load that raced with a notification from being kept.
+    """
+
+    def __init__(self, database_url: str, channel: str = BANKS_CHANNEL, reconnect_delay: float = 5.0,
+                 poll_timeout: float = 1.0):
+        self.database_url = database_url
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.poll_timeout = poll_timeout
+        self._lock = threading.Lock()
+        self._snapshot: Optional[BankSnapshot] = None
+        self._generation = 0
+        self._listening = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "BankCache":
+        """Start the listener thread if it is not already running"""
+        with self._lock:
+            if self._thread is None:
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._listen, name="bank-cache-listener", daemon=True)
+                self._thread.start()
+        return self
+
+    def snapshot(self, load: Callable[[], List[Bank]]) -> Optional[BankSnapshot]:
+        """Current snapshot, calling load() to fill it on a miss. None while not listening"""
+        self.start()
+        if not self._listening.is_set():
+            return None
+
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        generation = self._generation
+        snapshot = BankSnapshot(load())
+        with self._lock:
+            if generation == self._generation and self._listening.is_set():
+                self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        """Drop the snapshot so the next read reloads it"""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def close(self) -> None:
+        """Stop the listener and stop serving from memory"""
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            self._thread = None
+        self._listening.clear()
+        self.invalidate()
+
+    @property
+    def listening(self) -> bool:
+        return self._listening.is_set()
+
+    def _listen(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                with psycopg.connect(self.database_url, autocommit=True) as conn:
+                    conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+                    # Anything cached before LISTEN took effect may already be stale
+                    self.invalidate()
+                    self._listening.set()
+                    while not self._stopped.is_set():
+                        for _ in conn.notifies(timeout=self.poll_timeout):
+                            self.invalidate()
+            except psycopg.Error:
+                logger.exception("Bank cache listener lost its connection; serving from the database")
+            finally:
+                self._listening.clear()
+                self.invalidate()
+            self._stopped.wait(self.reconnect_delay)
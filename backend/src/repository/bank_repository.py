@@ -1,20 +1,36 @@
 import psycopg
 import psycopg
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from src.model.card import Bank
-import os
-from dotenv import load_dotenv
+from src.repository.bank_cache import BankCache, BankSnapshot
+from src.repository.base import BaseRepository
+from src.repository.query_cache import QueryCache
 
-load_dotenv()
 
-class BankRepository():
+class BankRepository(BaseRepository):
+    """Banks table access. Given a BankCache, lookups by ID and name, existence checks and
+    the relationship bank list are served from memory instead of querying every time.
+    Repositories bound to a connection always read the database so they see their own
+    uncommitted writes.
+    """
 
-    def __init__(self, database_url=None):
-        self.database_url = database_url or os.getenv("DATABASE_URL")
+    def __init__(self, database_url=None, connection: Optional[psycopg.Connection] = None,
+                 cache: Optional[BankCache] = None, query_cache: Optional[QueryCache] = None):
+        super().__init__(database_url, connection, query_cache)
+        self.cache = cache
+
+    def _cached(self) -> Optional[BankSnapshot]:
+        if self.cache is None or self.connection is not None:
+            return None
+        return self.cache.snapshot(self.get_all_banks)
+
+    def _invalidate_cache(self) -> None:
+        if self.cache is not None:
+            self.cache.invalidate()
 
     def create_bank(self, bank: Bank) -> Bank:
             """Create new bank and return it back"""
-            with psycopg.connect(self.database_url) as conn:
+            with self._connect() as conn:
                     with conn.cursor() as cur:
                         cur.execute(
                             """
@@ -27,11 +43,17 @@ class BankRepository():
                         bank.id = result[0]
                         bank.created_at = result[1]
                         
-                        conn.commit()
+                        self._commit(conn)
+                        self._invalidate_cache()
                         return bank
     def get_bank_by_id(self, bank_id: int) -> Optional[Bank]:
         """Retrieve a bank by its ID"""
-        with psycopg.connect(self.database_url) as conn:
+        cached = self._cached()
+        if cached is not None:
+            bank = cached.by_id.get(bank_id)
+            return bank.model_copy() if bank else None
+
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     SELECT * FROM banks WHERE id = %s
@@ -53,7 +75,7 @@ class BankRepository():
 
     def update_bank(self, bank: Bank) -> Optional[Bank]:
         """Update a bank with all fields"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     UPDATE banks 
@@ -74,29 +96,50 @@ class BankRepository():
                 if not updated_row:
                     return None
                 
-                conn.commit()
+                self._commit(conn)
+                self._invalidate_cache()
                 
                 # Update the passed bank object with any DB changes
                 bank.created_at = updated_row[5]
                 
                 return bank
 
+    def patch_bank(self, bank_id: int, changes: Dict[str, Any]) -> Optional[Bank]:
+        """Update only the given fields and return the fresh bank in one round trip"""
+        bank_row = self._patch_row("banks", bank_id, changes, Bank, (
+            "name", "relationship_bank", "transfer_points_value_cents", "reports_under_eighteen"
+        ))
+
+        self._invalidate_cache()
+        if not bank_row:
+            return None
+
+        return Bank(
+            id=bank_row[0],
+            name=bank_row[1],
+            relationship_bank=bank_row[2],
+            transfer_points_value_cents=bank_row[3],
+            reports_under_eighteen=bank_row[4],
+            created_at=bank_row[5]
+        )
+
     def delete_bank(self, bank_id: int) -> bool:
         """Delete a bank by ID. Returns True if deleted, False if not found"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     DELETE FROM banks WHERE id = %s
                 """, (bank_id,))
                 
                 rows_affected = cur.rowcount
-                conn.commit()
+                self._commit(conn)
+                self._invalidate_cache()
                 
                 return rows_affected > 0
 
     def get_all_banks(self, limit: Optional[int] = None, offset: int = 0) -> List[Bank]:
         """Get all banks with optional pagination"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 query = "SELECT * FROM banks ORDER BY name"
                 params = []
@@ -124,7 +167,11 @@ class BankRepository():
 
     def get_relationship_banks(self) -> List[Bank]:
         """Get all banks that are relationship banks"""
-        with psycopg.connect(self.database_url) as conn:
+        cached = self._cached()
+        if cached is not None:
+            return [bank.model_copy() for bank in cached.relationship]
+
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     SELECT * FROM banks WHERE relationship_bank = true ORDER BY name
@@ -145,7 +192,7 @@ class BankRepository():
 
     def get_banks_that_report_under_eighteen(self) -> List[Bank]:
         """Get all banks that report accounts for users under 18"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     SELECT * FROM banks WHERE reports_under_eighteen = true ORDER BY name
@@ -166,36 +213,48 @@ class BankRepository():
 
     def get_banks_with_transfer_points(self) -> List[Bank]:
         """Get all banks that have transfer points value set"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT * FROM banks 
-                    WHERE transfer_points_value_cents IS NOT NULL 
-                    ORDER BY transfer_points_value_cents DESC
-                """)
-                
-                bank_rows = cur.fetchall()
-                
-                return [
-                    Bank(
-                        id=row[0],
-                        name=row[1],
-                        relationship_bank=row[2],
-                        transfer_points_value_cents=row[3],
-                        reports_under_eighteen=row[4],
-                        created_at=row[5]
-                    ) for row in bank_rows
-                ]
+                def load() -> List[Bank]:
+                    cur.execute("""
+                        SELECT * FROM banks
+                        WHERE transfer_points_value_cents IS NOT NULL
+                        ORDER BY transfer_points_value_cents DESC
+                    """)
+
+                    bank_rows = cur.fetchall()
+
+                    return [
+                        Bank(
+                            id=row[0],
+                            name=row[1],
+                            relationship_bank=row[2],
+                            transfer_points_value_cents=row[3],
+                            reports_under_eighteen=row[4],
+                            created_at=row[5]
+                        ) for row in bank_rows
+                    ]
+
+                return self._read_through(conn, "get_banks_with_transfer_points", (), ("banks",), load)
     def bank_exists(self, bank_id: int) -> bool:
         """Check if a bank exists by ID"""
-        with psycopg.connect(self.database_url) as conn:
+        cached = self._cached()
+        if cached is not None:
+            return bank_id in cached.by_id
+
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("SELECT 1 FROM banks WHERE id = %s", (bank_id,))
                 return cur.fetchone() is not None
 
     def get_bank_by_name(self, name: str) -> Optional[Bank]:
         """Get a bank by exact name match"""
-        with psycopg.connect(self.database_url) as conn:
+        cached = self._cached()
+        if cached is not None:
+            bank = cached.by_name.get(name)
+            return bank.model_copy() if bank else None
+
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     SELECT * FROM banks WHERE name = %s
@@ -213,4 +272,29 @@ class BankRepository():
                     transfer_points_value_cents=bank_row[3],
                     reports_under_eighteen=bank_row[4],
                     created_at=bank_row[5]
-                )
\ No newline at end of file
+                )
+
+    def get_banks_by_ids(self, bank_ids: List[int]) -> List[Bank]:
+        """Get many banks by ID in one query, ordered by ID. Unknown IDs are skipped"""
+        cached = self._cached()
+        if cached is not None:
+            return [cached.by_id[bank_id].model_copy() for bank_id in sorted(set(bank_ids)) if bank_id in cached.by_id]
+
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT * FROM banks WHERE id = ANY(%s) ORDER BY id
+                """, (list(bank_ids),))
+
+                bank_rows = cur.fetchall()
+
+                return [
+                    Bank(
+                        id=row[0],
+                        name=row[1],
+                        relationship_bank=row[2],
+                        transfer_points_value_cents=row[3],
+                        reports_under_eighteen=row[4],
+                        created_at=row[5]
+                    ) for row in bank_rows
+                ]
@@ -0,0 +1,113 @@
+import psycopg
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Annotated, Any, Callable, Dict, Hashable, Iterator, Optional, Tuple, Type, TypeVar
+from psycopg import sql
+from pydantic import BaseModel, TypeAdapter
+from src.repository import adapters, instrumentation
+from src.repository.query_cache import QueryCache
+from src.settings import get_settings
+
+T = TypeVar("T")
+
+@lru_cache(maxsize=None)
+def _field_adapter(model: Type[BaseModel], field: str) -> TypeAdapter:
+    info = model.model_fields[field]
+    # Validators attached with Annotated live in the metadata, not the annotation
+    if info.metadata:
+        return TypeAdapter(Annotated[(info.annotation, *info.metadata)])
+    return TypeAdapter(info.annotation)
+
+class BaseRepository:
+    """Connection handling shared by the repositories.
+
+    On its own a repository opens a connection per call and commits it. When given a
+    connection (see UnitOfWork) every call runs on that connection and the owner of the
+    connection decides when to commit.
+
+    Connections start from adapters.shared_adapters, built once per database: enum
+    columns load as CreditScoreRating, SpendingCategory, CardType and RewardStructure,
+    and DECIMAL columns as float unless the numeric_loader setting says otherwise.
+
+    Reads wrapped in _read_through are served from query_cache, when one is given, until
+    a table they read changes.
+    """
+
+    def __init__(self, database_url=None, connection: Optional[psycopg.Connection] = None,
+                 query_cache: Optional[QueryCache] = None):
+        self.database_url = database_url or get_settings().database_url
+        self.connection = connection
+        self.query_cache = query_cache
+
+    @contextmanager
+    def _connect(self) -> Iterator[psycopg.Connection]:
+        if self.connection is not None:
+            if instrumentation.active:
+                instrumentation.instrument_connection(self.connection)
+            adapters.configure_connection(self.connection)
+            yield self.connection
+            return
+        if instrumentation.active:
+            with instrumentation.timed_connect(self.database_url) as conn:
+                yield conn
+            return
+        with adapters.connect(self.database_url) as conn:
+            yield conn
+
+    def _commit(self, conn: psycopg.Connection) -> None:
+        if self.connection is None:
+            conn.commit()
+
+    def _read_through(self, conn: psycopg.Connection, method: str, params: Hashable, tables: Tuple[str, ...],
+                      load: Callable[[], T]) -> T:
+        """Run load(), or reuse its cached result while the given tables are unchanged.
+
+        Bound repositories skip the cache: their transaction may have bumped a version
+        that is later rolled back and handed out again for different data.
+        """
+        if self.query_cache is None or self.connection is not None:
+            return load()
+        return self.query_cache.get_or_load(conn, (type(self).__name__, method, params), tables, load)
+
+    def _patch_row(self, table: str, row_id: int, changes: Dict[str, Any], model: Type[BaseModel],
+                   columns: Tuple[str, ...]) -> Optional[tuple]:
+        """Set only the given columns of one row and return the row, in one statement.
+
+        Values are validated against the model's field types. Columns whose value is
+        already the same are left alone, and if nothing differs no new row version is
+        written at all; the current row is returned either way. None means no such row.
+        """
+        unknown = set(changes) - set(columns)
+        if unknown:
+            raise ValueError(f"Cannot patch {table} columns: {', '.join(sorted(unknown))}")
+        values = {column: _field_adapter(model, column).validate_python(value) for column, value in changes.items()}
+
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                if not values:
+                    cur.execute(sql.SQL("SELECT * FROM {} WHERE id = %s").format(sql.Identifier(table)), (row_id,))
+                    return cur.fetchone()
+
+                query = sql.SQL("""
+                    WITH updated AS (
+                        UPDATE {table} SET {assignments}
+                        WHERE id = %s AND ({changed})
+                        RETURNING *
+                    )
+                    SELECT * FROM updated
+                    UNION ALL
+                    SELECT * FROM {table} WHERE id = %s AND NOT EXISTS (SELECT 1 FROM updated)
+                """).format(
+                    table=sql.Identifier(table),
+                    assignments=sql.SQL(", ").join(
+                        sql.SQL("{} = %s").format(sql.Identifier(column)) for column in values
+                    ),
+                    changed=sql.SQL(" OR ").join(
+                        sql.SQL("{} IS DISTINCT FROM %s").format(sql.Identifier(column)) for column in values
+                    )
+                )
+                params = [*values.values(), row_id, *values.values(), row_id]
+                cur.execute(query, params)
+                row = cur.fetchone()
+                self._commit(conn)
+                return row
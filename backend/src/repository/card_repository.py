@@ -1,18 +1,14 @@
 import psycopg
-from typing import Optional, List
-from src.model.card import Card, SpendingCategory, CardType, RewardStructure
-import os
-from dotenv import load_dotenv
+from typing import Any, Dict, Iterator, Optional, List
+from src.model.batch import CardBatch
+from src.model.card import Card, CatalogSyncResult, SpendingCategory, SpendingCategoryInfo, CardType, RewardStructure
+from src.repository.base import BaseRepository
 
-load_dotenv()
 
-class CardRepository:
-
-    def __init__(self, database_url=None):
-        self.database_url = database_url or os.getenv("DATABASE_URL")
+class CardRepository(BaseRepository):
 
     def create_card(self, card: Card) -> Card:
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                 INSERT INTO credit_cards (name, bank_id, card_type, sub_max_value, sub_description, foreign_transaction_fee, annual_fee, reward_structure,
@@ -26,12 +22,12 @@ class CardRepository:
                 card.id = row_add[0]
                 card.created_at = row_add[1]
 
-                conn.commit()
+                self._commit(conn)
 
                 return card
             
     def get_card_by_id(self, card_id: int) -> Card:
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     SELECT * FROM credit_cards WHERE id=%s
@@ -60,7 +56,7 @@ class CardRepository:
                 return card
     def update_card(self, card: Card) -> Optional[Card]:
         """Update a card with all fields"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     UPDATE credit_cards
@@ -88,7 +84,7 @@ class CardRepository:
                 if not updated_row:
                     return None
                 
-                conn.commit()
+                self._commit(conn)
                 
                 # Update the passed card object with any DB changes
                 card.created_at = updated_row[11]
@@ -96,22 +92,47 @@ class CardRepository:
                 return card
             
 
+    def patch_card(self, card_id: int, changes: Dict[str, Any]) -> Optional[Card]:
+        """Update only the given fields and return the fresh card in one round trip"""
+        card_row = self._patch_row("credit_cards", card_id, changes, Card, (
+            "name", "bank_id", "card_type", "sub_max_value", "sub_description", "annual_fee",
+            "foreign_transaction_fee", "reward_structure", "fee_credits", "other_benefits"
+        ))
+
+        if not card_row:
+            return None
+
+        return Card(
+            id=card_row[0],
+            name=card_row[1],
+            bank_id=card_row[2],
+            card_type=card_row[3],
+            sub_max_value=card_row[4],
+            sub_description=card_row[5],
+            annual_fee=card_row[6],
+            foreign_transaction_fee=card_row[7],
+            reward_structure=card_row[8],
+            fee_credits=card_row[9],
+            other_benefits=card_row[10],
+            created_at=card_row[11]
+        )
+
     def delete_card(self, card_id: int) -> bool:
         """Delete a card by ID. Returns True if deleted, False if not found"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     DELETE FROM credit_cards WHERE id = %s
                 """, (card_id,))
                 
                 rows_affected = cur.rowcount
-                conn.commit()
+                self._commit(conn)
                 
                 return rows_affected > 0
             
     def get_cards_by_bank(self, bank_id: int) -> List[Card]:
         """Get allcredit_cardsfor a specific bank"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     SELECT * FROM credit_cards WHERE bank_id = %s ORDER BY name
@@ -137,34 +158,37 @@ class CardRepository:
                 ]
     def get_cards_by_type(self, card_type: CardType) -> List[Card]:
         """Get all credit cards of a specific type"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT * FROM credit_cards WHERE card_type = %s ORDER BY name
-                """, (card_type,))
-                
-                card_rows = cur.fetchall()
-                
-                return [
-                    Card(
-                        id=row[0],
-                        name=row[1],
-                        bank_id=row[2],
-                        card_type=row[3],
-                        sub_max_value=row[4],
-                        sub_description=row[5],
-                        annual_fee=row[6],
-                        foreign_transaction_fee=row[7],
-                        reward_structure=row[8],
-                        fee_credits=row[9],
-                        other_benefits=row[10],
-                        created_at=row[11]
-                    ) for row in card_rows
-                ]
+                def load() -> List[Card]:
+                    cur.execute("""
+                        SELECT * FROM credit_cards WHERE card_type = %s ORDER BY name
+                    """, (card_type,))
+
+                    card_rows = cur.fetchall()
+
+                    return [
+                        Card(
+                            id=row[0],
+                            name=row[1],
+                            bank_id=row[2],
+                            card_type=row[3],
+                            sub_max_value=row[4],
+                            sub_description=row[5],
+                            annual_fee=row[6],
+                            foreign_transaction_fee=row[7],
+                            reward_structure=row[8],
+                            fee_credits=row[9],
+                            other_benefits=row[10],
+                            created_at=row[11]
+                        ) for row in card_rows
+                    ]
+
+                return self._read_through(conn, "get_cards_by_type", (card_type,), ("credit_cards",), load)
             
     def get_cards_by_reward_structure(self, reward_structure: RewardStructure) -> List[Card]:
         """Get all credit cards with a specific reward structure"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     SELECT * FROM credit_cards WHERE reward_structure = %s ORDER BY name
@@ -190,33 +214,36 @@ class CardRepository:
                 ]
     def get_cards_with_no_annual_fee(self) -> List[Card]:
         """Get all credit cards with no annual fee"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT * FROM credit_cards WHERE annual_fee = 0 ORDER BY name
-                """)
-                
-                card_rows = cur.fetchall()
-                
-                return [
-                    Card(
-                        id=row[0],
-                        name=row[1],
-                        bank_id=row[2],
-                        card_type=row[3],
-                        sub_max_value=row[4],
-                        sub_description=row[5],
-                        annual_fee=row[6],
-                        foreign_transaction_fee=row[7],
-                        reward_structure=row[8],
-                        fee_credits=row[9],
-                        other_benefits=row[10],
-                        created_at=row[11]
-                    ) for row in card_rows
-                ]
+                def load() -> List[Card]:
+                    cur.execute("""
+                        SELECT * FROM credit_cards WHERE annual_fee = 0 ORDER BY name
+                    """)
+
+                    card_rows = cur.fetchall()
+
+                    return [
+                        Card(
+                            id=row[0],
+                            name=row[1],
+                            bank_id=row[2],
+                            card_type=row[3],
+                            sub_max_value=row[4],
+                            sub_description=row[5],
+                            annual_fee=row[6],
+                            foreign_transaction_fee=row[7],
+                            reward_structure=row[8],
+                            fee_credits=row[9],
+                            other_benefits=row[10],
+                            created_at=row[11]
+                        ) for row in card_rows
+                    ]
+
+                return self._read_through(conn, "get_cards_with_no_annual_fee", (), ("credit_cards",), load)
     def get_cards_with_signup_bonus(self) -> List[Card]:
         """Get all credit cards that have a signup bonus (sub_max_value > 0)"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                     SELECT * FROM credit_cards
@@ -245,9 +272,9 @@ class CardRepository:
             
     def get_all_cards(self, limit: Optional[int] = None, offset: int = 0) -> List[Card]:
         """Get all credit cards with optional pagination"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
-                query = "SELECT * FROM credit_cards ORDER BY created_at DESC"
+                query = "SELECT * FROM credit_cards ORDER BY created_at DESC, id DESC"
                 params = []
 
                 if limit:
@@ -277,9 +304,26 @@ class CardRepository:
                     ) for row in card_rows
                 ]
             
+    def get_all_cards_batch(self, limit: Optional[int] = None, offset: int = 0) -> CardBatch:
+        """get_all_cards as a columnar CardBatch, without building a Card per row"""
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                query = "SELECT * FROM credit_cards ORDER BY created_at DESC, id DESC"
+                params = []
+
+                if limit:
+                    query += " LIMIT %s OFFSET %s"
+                    params.extend([limit, offset])
+                elif offset > 0:
+                    query += " OFFSET %s"
+                    params.append(offset)
+
+                cur.execute(query, params)
+                return CardBatch.from_rows(cur)
+
     def get_cards_by_fee_range(self, min_fee: int = 0, max_fee: Optional[int] = None) -> List[Card]:
         """Get credit cards within a specific annual fee range"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 if max_fee is not None:
                     cur.execute("""
@@ -311,4 +355,273 @@ class CardRepository:
                         other_benefits=row[10],
                         created_at=row[11]
                     ) for row in card_rows
-                ]
\ No newline at end of file
+                ]
+
+    def get_cards_by_ids(self, card_ids: List[int]) -> List[Card]:
+        """Get many cards by ID in one query, ordered by ID. Unknown IDs are skipped"""
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT * FROM credit_cards WHERE id = ANY(%s) ORDER BY id
+                """, (list(card_ids),))
+
+                card_rows = cur.fetchall()
+
+                return [
+                    Card(
+                        id=row[0],
+                        name=row[1],
+                        bank_id=row[2],
+                        card_type=row[3],
+                        sub_max_value=row[4],
+                        sub_description=row[5],
+                        annual_fee=row[6],
+                        foreign_transaction_fee=row[7],
+                        reward_structure=row[8],
+                        fee_credits=row[9],
+                        other_benefits=row[10],
+                        created_at=row[11]
+                    ) for row in card_rows
+                ]
+
+    def search_cards(self, card_type: Optional[CardType] = None, reward_structure: Optional[RewardStructure] = None,
+                     bank_id: Optional[int] = None, min_fee: int = 0, max_fee: Optional[int] = None,
+                     limit: Optional[int] = None, offset: int = 0) -> List[Card]:
+        """Search credit cards by any combination of filters, ordered by name"""
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                query = "SELECT * FROM credit_cards WHERE annual_fee >= %s"
+                params = [min_fee]
+
+                if max_fee is not None:
+                    query += " AND annual_fee <= %s"
+                    params.append(max_fee)
+                if card_type is not None:
+                    query += " AND card_type = %s"
+                    params.append(card_type)
+                if reward_structure is not None:
+                    query += " AND reward_structure = %s"
+                    params.append(reward_structure)
+                if bank_id is not None:
+                    query += " AND bank_id = %s"
+                    params.append(bank_id)
+
+                query += " ORDER BY name"
+
+                if limit:
+                    query += " LIMIT %s OFFSET %s"
+                    params.extend([limit, offset])
+                elif offset > 0:
+                    query += " OFFSET %s"
+                    params.append(offset)
+
+                cur.execute(query, params)
+                card_rows = cur.fetchall()
+
+                return [
+                    Card(
+                        id=row[0],
+                        name=row[1],
+                        bank_id=row[2],
+                        card_type=row[3],
+                        sub_max_value=row[4],
+                        sub_description=row[5],
+                        annual_fee=row[6],
+                        foreign_transaction_fee=row[7],
+                        reward_structure=row[8],
+                        fee_credits=row[9],
+                        other_benefits=row[10],
+                        created_at=row[11]
+                    ) for row in card_rows
+                ]
+
+    def add_spending_category(self, spending: SpendingCategoryInfo) -> SpendingCategoryInfo:
+        """Add a reward category to a card and return it with its ID"""
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO card_spending_category (card_id, category, rate, cap, quarterly_rotating)
+                    VALUES (%s, %s, %s, %s, %s) RETURNING id
+                """, (spending.card_id, spending.category, spending.rate, spending.cap, spending.quarterly_rotating))
+
+                spending.id = cur.fetchone()[0]
+                self._commit(conn)
+
+                return spending
+
+    def add_spending_categories(self, spendings: List[SpendingCategoryInfo]) -> List[SpendingCategoryInfo]:
+        """Add several reward categories in one batch and return them with their IDs"""
+        if not spendings:
+            return []
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.executemany("""
+                    INSERT INTO card_spending_category (card_id, category, rate, cap, quarterly_rotating)
+                    VALUES (%s, %s, %s, %s, %s) RETURNING id
+                """, [(spending.card_id, spending.category, spending.rate, spending.cap, spending.quarterly_rotating)
+                      for spending in spendings], returning=True)
+
+                for spending in spendings:
+                    spending.id = cur.fetchone()[0]
+                    cur.nextset()
+
+                self._commit(conn)
+
+                return spendings
+
+    def get_spending_categories_by_card(self, card_id: int) -> List[SpendingCategoryInfo]:
+        """Get all reward categories for a specific card"""
+        return self.get_spending_categories_for_cards([card_id])
+
+    def get_spending_categories_for_cards(self, card_ids: List[int]) -> List[SpendingCategoryInfo]:
+        """Get reward categories for many cards in one query, ordered by card"""
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT id, card_id, category, rate, cap, quarterly_rotating
+                    FROM card_spending_category
+                    WHERE card_id = ANY(%s)
+                    ORDER BY card_id, id
+                """, (list(card_ids),))
+
+                category_rows = cur.fetchall()
+
+                return [
+                    SpendingCategoryInfo(
+                        id=row[0],
+                        card_id=row[1],
+                        category=row[2],
+                        rate=row[3],
+                        cap=row[4],
+                        quarterly_rotating=row[5]
+                    ) for row in category_rows
+                ]
+
+    def get_catalog_version(self) -> int:
+        """Get a counter that changes whenever banks, cards or card categories change"""
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT COALESCE(SUM(version), 0) FROM table_versions
+                    WHERE table_name IN ('banks', 'credit_cards', 'card_spending_category')
+                """)
+                return int(cur.fetchone()[0])
+
+    def iter_all_cards(self, batch_size: int = 1000) -> Iterator[Card]:
+        """Stream every card ordered by ID through a server-side cursor, batch_size rows at a time"""
+        with self._connect() as conn:
+            with conn.cursor(name="card_export") as cur:
+                cur.itersize = batch_size
+                cur.execute("SELECT * FROM credit_cards ORDER BY id")
+
+                for row in cur:
+                    yield Card(
+                        id=row[0],
+                        name=row[1],
+                        bank_id=row[2],
+                        card_type=row[3],
+                        sub_max_value=row[4],
+                        sub_description=row[5],
+                        annual_fee=row[6],
+                        foreign_transaction_fee=row[7],
+                        reward_structure=row[8],
+                        fee_credits=row[9],
+                        other_benefits=row[10],
+                        created_at=row[11]
+                    )
+
+    def sync_catalog(self, cards: List[Card]) -> CatalogSyncResult:
+        """Make credit_cards match a full catalog feed, matching cards by name.
+
+        The feed is COPYed into a temp table, cards whose columns actually differ are
+        upserted, and cards missing from the feed are deleted, all in one transaction.
+        Running the same feed twice changes nothing.
+        """
+        if not cards:
+            raise ValueError("Refusing to sync an empty catalog feed")
+
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                # Inside a UnitOfWork an earlier sync's table lives until the outer commit
+                cur.execute("DROP TABLE IF EXISTS pg_temp.catalog_feed")
+                cur.execute("""
+                    CREATE TEMP TABLE catalog_feed (
+                        name VARCHAR(100) PRIMARY KEY,
+                        bank_id INTEGER,
+                        card_type card_type NOT NULL,
+                        sub_max_value INTEGER,
+                        sub_description TEXT,
+                        annual_fee INTEGER NOT NULL,
+                        foreign_transaction_fee DECIMAL(5,3) NOT NULL,
+                        reward_structure reward_structure NOT NULL,
+                        fee_credits TEXT,
+                        other_benefits TEXT
+                    ) ON COMMIT DROP
+                """)
+
+                with cur.copy("""
+                    COPY catalog_feed (name, bank_id, card_type, sub_max_value, sub_description, annual_fee,
+                                       foreign_transaction_fee, reward_structure, fee_credits, other_benefits)
+                    FROM STDIN
+                """) as copy:
+                    for card in cards:
+                        copy.write_row((
+                            card.name,
+                            card.bank_id,
+                            card.card_type.value,
+                            card.sub_max_value,
+                            card.sub_description,
+                            card.annual_fee,
+                            card.foreign_transaction_fee or 0,
+                            card.reward_structure.value,
+                            card.fee_credits,
+                            card.other_benefits
+                        ))
+
+                cur.execute("""
+                    WITH upserted AS (
+                        INSERT INTO credit_cards (name, bank_id, card_type, sub_max_value, sub_description, annual_fee,
+                                                  foreign_transaction_fee, reward_structure, fee_credits, other_benefits)
+                        SELECT name, bank_id, card_type, sub_max_value, sub_description, annual_fee,
+                               foreign_transaction_fee, reward_structure, fee_credits, other_benefits
+                        FROM catalog_feed
+                        ON CONFLICT (name) DO UPDATE
+                        SET bank_id = EXCLUDED.bank_id,
+                            card_type = EXCLUDED.card_type,
+                            sub_max_value = EXCLUDED.sub_max_value,
+                            sub_description = EXCLUDED.sub_description,
+                            annual_fee = EXCLUDED.annual_fee,
+                            foreign_transaction_fee = EXCLUDED.foreign_transaction_fee,
+                            reward_structure = EXCLUDED.reward_structure,
+                            fee_credits = EXCLUDED.fee_credits,
+                            other_benefits = EXCLUDED.other_benefits
+                        WHERE (credit_cards.bank_id, credit_cards.card_type, credit_cards.sub_max_value,
+                               credit_cards.sub_description, credit_cards.annual_fee,
+                               credit_cards.foreign_transaction_fee, credit_cards.reward_structure,
+                               credit_cards.fee_credits, credit_cards.other_benefits)
+                        IS DISTINCT FROM
+                              (EXCLUDED.bank_id, EXCLUDED.card_type, EXCLUDED.sub_max_value,
+                               EXCLUDED.sub_description, EXCLUDED.annual_fee,
+                               EXCLUDED.foreign_transaction_fee, EXCLUDED.reward_structure,
+                               EXCLUDED.fee_credits, EXCLUDED.other_benefits)
+                        RETURNING (xmax = 0) AS inserted
+                    )
+                    SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+                    FROM upserted
+                """)
+                inserted, updated = cur.fetchone()
+
+                cur.execute("""
+                    DELETE FROM credit_cards c
+                    WHERE NOT EXISTS (SELECT 1 FROM catalog_feed f WHERE f.name = c.name)
+                """)
+                deleted = cur.rowcount
+
+                self._commit(conn)
+
+                return CatalogSyncResult(
+                    inserted=inserted,
+                    updated=updated,
+                    unchanged=len(cards) - inserted - updated,
+                    deleted=deleted
+                )
@@ -0,0 +1,395 @@
+import functools
+import inspect
+import logging
+import threading
+import psycopg
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Protocol, Sequence, Tuple
+from src.repository import adapters
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the timing buckets: 10 microseconds doubling up to ~5 seconds
+TIME_BUCKETS = tuple(0.00001 * 2 ** power for power in range(20))
+# Upper bounds of the row count buckets
+ROW_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 50000, 100000)
+
+
+class Histogram:
+    """Fixed-bucket histogram. Values above the last bound land in an overflow bucket"""
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of observations"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target and bucket_count:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class MethodStats:
+    """Everything recorded for one repository method"""
+
+    __slots__ = ("calls", "errors", "acquire", "execute", "fetch", "total", "rows")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.acquire = Histogram(TIME_BUCKETS)
+        self.execute = Histogram(TIME_BUCKETS)
+        self.fetch = Histogram(TIME_BUCKETS)
+        self.total = Histogram(TIME_BUCKETS)
+        self.rows = Histogram(ROW_BUCKETS)
+
+    def summary(self) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {"calls": self.calls, "errors": self.errors}
+        for name in ("acquire", "execute", "fetch", "total"):
+            histogram: Histogram = getattr(self, name)
+            summary[name] = {
+                "mean": histogram.mean,
+                "p50": histogram.percentile(0.5),
+                "p99": histogram.percentile(0.99),
+                "max": histogram.max,
+            }
+        summary["rows"] = {"total": int(self.rows.total), "mean": self.rows.mean, "max": int(self.rows.max)}
+        return summary
+
+
+class CallRecord:
+    """Timings gathered while one repository method runs"""
+
+    __slots__ = ("acquire", "execute", "fetch", "rows")
+
+    def __init__(self):
+        self.acquire = 0.0
+        self.execute = 0.0
+        self.fetch = 0.0
+        self.rows = 0
+
+
+class Exporter(Protocol):
+    def export(self, stats: Dict[str, MethodStats]) -> None:
+        ...
+
+
+class QueryListener(Protocol):
+    """Told about every connection opened and statement run through BaseRepository"""
+
+    def on_connect(self, elapsed: float) -> None:
+        ...
+
+    def on_query(self, cursor: psycopg.Cursor, query: Any, params: Any, elapsed: float, statements: int,
+                 error: Optional[BaseException]) -> None:
+        ...
+
+
+class LoggingExporter:
+    """Logs one summary line per repository method"""
+
+    def __init__(self, log: logging.Logger = logger, level: int = logging.INFO):
+        self.log = log
+        self.level = level
+
+    def export(self, stats: Dict[str, MethodStats]) -> None:
+        for method, method_stats in sorted(stats.items()):
+            self.log.log(self.level, "%s %s", method, method_stats.summary())
+
+
+_current: ContextVar[Optional[CallRecord]] = ContextVar("repository_call", default=None)
+_lock = threading.Lock()
+_stats: Dict[str, MethodStats] = {}
+_exporters: List[Exporter] = []
+_originals: List[Tuple[type, str, Callable]] = []
+_listeners: List[QueryListener] = []
+enabled = False
+# True while methods are instrumented or any listener is registered; checked per connection
+active = False
+
+
+def _update_active() -> None:
+    global active
+    active = enabled or bool(_listeners)
+
+
+def add_listener(listener: QueryListener) -> None:
+    """Start telling listener about connections and statements"""
+    with _lock:
+        _listeners.append(listener)
+        _update_active()
+
+
+def remove_listener(listener: QueryListener) -> None:
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+        _update_active()
+
+
+def current_call() -> Optional[CallRecord]:
+    """The record of the repository method running in this context, if instrumented"""
+    return _current.get()
+
+
+def _finish(method: str, record: CallRecord, elapsed: float, failed: bool) -> None:
+    with _lock:
+        method_stats = _stats.get(method)
+        if method_stats is None:
+            method_stats = _stats[method] = MethodStats()
+        method_stats.calls += 1
+        if failed:
+            method_stats.errors += 1
+        method_stats.acquire.observe(record.acquire)
+        method_stats.execute.observe(record.execute)
+        method_stats.fetch.observe(record.fetch)
+        method_stats.total.observe(elapsed)
+        method_stats.rows.observe(record.rows)
+
+
+def _instrument(method: str, function: Callable) -> Callable:
+    if inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def generator_wrapper(*args, **kwargs):
+            if _current.get() is not None:
+                yield from function(*args, **kwargs)
+                return
+            record = CallRecord()
+            started = perf_counter()
+            generator = function(*args, **kwargs)
+            failed = False
+            try:
+                while True:
+                    # Only attribute work done inside the generator, not by whoever consumes it
+                    token = _current.set(record)
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        break
+                    finally:
+                        _current.reset(token)
+                    yield item
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                token = _current.set(record)
+                try:
+                    generator.close()
+                finally:
+                    _current.reset(token)
+                _finish(method, record, perf_counter() - started, failed)
+        return generator_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # Calls made from inside another repository method count towards the outer one
+        if _current.get() is not None:
+            return function(*args, **kwargs)
+        record = CallRecord()
+        token = _current.set(record)
+        started = perf_counter()
+        failed = False
+        try:
+            return function(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            _current.reset(token)
+            _finish(method, record, perf_counter() - started, failed)
+    return wrapper
+
+
+def _repository_classes() -> List[type]:
+    from src.repository.base import BaseRepository
+    # Make sure every repository is imported, so every one gets wrapped
+    import src.repository.authorized_user_repository  # noqa: F401
+    import src.repository.bank_repository  # noqa: F401
+    import src.repository.card_repository  # noqa: F401
+    import src.repository.user_repository  # noqa: F401
+
+    classes, pending = [], [BaseRepository]
+    while pending:
+        cls = pending.pop()
+        classes.append(cls)
+        pending.extend(cls.__subclasses__())
+    return classes
+
+
+def enable(exporters: Sequence[Exporter] = ()) -> None:
+    """Wrap every public repository method so its calls are recorded.
+
+    Nothing is wrapped until this is called, so a disabled process pays nothing beyond
+    one boolean check per connection.
+    """
+    global enabled
+    with _lock:
+        _exporters[:] = exporters
+        if enabled:
+            return
+        for cls in _repository_classes():
+            for name, attribute in list(vars(cls).items()):
+                if name.startswith("_") or not inspect.isfunction(attribute):
+                    continue
+                _originals.append((cls, name, attribute))
+                setattr(cls, name, _instrument(f"{cls.__name__}.{name}", attribute))
+        enabled = True
+        _update_active()
+
+
+def disable() -> None:
+    """Put the original repository methods back. Recorded stats are kept"""
+    global enabled
+    with _lock:
+        for cls, name, attribute in reversed(_originals):
+            setattr(cls, name, attribute)
+        _originals.clear()
+        enabled = False
+        _update_active()
+
+
+def stats() -> Dict[str, MethodStats]:
+    with _lock:
+        return dict(_stats)
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+
+
+def export() -> None:
+    """Hand the current stats to every registered exporter"""
+    current = stats()
+    for exporter in list(_exporters):
+        try:
+            exporter.export(current)
+        except Exception:
+            logger.exception("Repository stats exporter %r failed", exporter)
+
+
+class _TimedCursorMixin:
+    def _timed(self, run: Callable[[], Any], query: Any, params: Any, statements: int) -> Any:
+        record = _current.get()
+        if record is None and not _listeners:
+            return run()
+        error: Optional[BaseException] = None
+        started = perf_counter()
+        try:
+            return run()
+        except BaseException as raised:
+            error = raised
+            raise
+        finally:
+            elapsed = perf_counter() - started
+            if record is not None:
+                record.execute += elapsed
+            for listener in list(_listeners):
+                listener.on_query(self, query, params, elapsed, statements, error)
+
+    def execute(self, query, params=None, **kwargs):
+        return self._timed(lambda: super(_TimedCursorMixin, self).execute(query, params, **kwargs),
+                           query, params, 1)
+
+    def executemany(self, query, params_seq, **kwargs):
+        params_seq = list(params_seq)
+        return self._timed(lambda: super(_TimedCursorMixin, self).executemany(query, params_seq, **kwargs),
+                           query, params_seq, len(params_seq))
+
+    def fetchone(self):
+        record = _current.get()
+        if record is None:
+            return super().fetchone()
+        started = perf_counter()
+        row = super().fetchone()
+        record.fetch += perf_counter() - started
+        if row is not None:
+            record.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        record = _current.get()
+        if record is None:
+            return super().fetchmany(*args, **kwargs)
+        started = perf_counter()
+        rows = super().fetchmany(*args, **kwargs)
+        record.fetch += perf_counter() - started
+        record.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        record = _current.get()
+        if record is None:
+            return super().fetchall()
+        started = perf_counter()
+        rows = super().fetchall()
+        record.fetch += perf_counter() - started
+        record.rows += len(rows)
+        return rows
+
+    def __iter__(self) -> Iterator:
+        iterator = super().__iter__()
+        while True:
+            record = _current.get()
+            started = perf_counter()
+            try:
+                row = next(iterator)
+            except StopIteration:
+                return
+            if record is not None:
+                record.fetch += perf_counter() - started
+                record.rows += 1
+            yield row
+
+
+class TimedCursor(_TimedCursorMixin, psycopg.Cursor):
+    pass
+
+
+class TimedServerCursor(_TimedCursorMixin, psycopg.ServerCursor):
+    pass
+
+
+def instrument_connection(conn: psycopg.Connection) -> psycopg.Connection:
+    """Make conn create cursors that time execute and fetch calls"""
+    conn.cursor_factory = TimedCursor
+    conn.server_cursor_factory = TimedServerCursor
+    return conn
+
+
+def timed_connect(database_url: str) -> psycopg.Connection:
+    """adapters.connect, counting the time taken towards the running method's acquire time"""
+    record = _current.get()
+    started = perf_counter()
+    conn = adapters.connect(database_url)
+    elapsed = perf_counter() - started
+    if record is not None:
+        record.acquire += elapsed
+    for listener in list(_listeners):
+        listener.on_connect(elapsed)
+    return instrument_connection(conn)
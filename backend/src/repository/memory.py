@@ -0,0 +1,1072 @@
+"""In-memory storage backend for the repositories.
+
+MemoryStore holds every table in process memory, and the Memory*Repository classes
+answer the same methods as their PostgreSQL counterparts from it. They do not inherit
+from those classes, so a repository method without a memory version raises
+AttributeError rather than quietly opening a database connection. Tests and offline
+scoring experiments can use them without a database:
+
+    store = MemoryStore()
+    service = RecommendationService(MemoryCardRepository(store), MemoryBankRepository(store),
+                                    MemoryUserRepository(store))
+
+Each table keeps hash indexes for its equality lookups and unique constraints, and
+sorted indexes for the orderings its queries use, so results come back in the same
+order as the SQL. Foreign keys, ON DELETE CASCADE, NOT NULL columns and unique names
+and emails are enforced, raising the psycopg errors PostgreSQL would. Text is compared
+by code point, like the "C" collation. Batch writes run inside MemoryStore.atomic(), so
+a row that fails leaves every table as it was, as the rolled back transaction would.
+"""
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple, Type, TypeVar
+import psycopg
+from pydantic import BaseModel
+from src.model.batch import CardBatch, UserSpendBatch
+from src.model.card import Bank, Card, CatalogSyncResult, SpendingCategoryInfo
+from src.model.enums import CardType, CreditScoreRating, RewardStructure, SpendingCategory
+from src.model.user import (INCOME_BAND_WIDTH, AnonymisedUser, AuthorizedUserInfo, SpendAggregate,
+                            SpendingCategoryUser, User, UserProfile)
+from src.repository.base import _field_adapter
+
+M = TypeVar("M", bound=BaseModel)
+
+KeyFunction = Callable[[Any], Hashable]
+
+# PostgreSQL sorts enum values in declaration order, not alphabetically
+_SPENDING_CATEGORY_ORDER = {category: index for index, category in enumerate(SpendingCategory)}
+_CREDIT_SCORE_ORDER = {rating: index for index, rating in enumerate(CreditScoreRating)}
+# Tables with a table_versions row and bump trigger (migration 003)
+VERSIONED_TABLES = {"banks", "credit_cards", "card_spending_category"}
+
+
+class Table:
+    """Rows of one table keyed by ID, with its unique, hash and sorted indexes"""
+
+    def __init__(self, name: str, unique: Optional[Dict[str, KeyFunction]] = None,
+                 hashed: Optional[Dict[str, KeyFunction]] = None, ordered: Optional[Dict[str, KeyFunction]] = None):
+        self.name = name
+        self.rows: Dict[int, Any] = {}
+        self.last_id = 0
+        self.version = 0
+        self._unique_keys = unique or {}
+        self._hash_keys = hashed or {}
+        self._order_keys = ordered or {}
+        self._unique: Dict[str, Dict[Hashable, int]] = {index: {} for index in self._unique_keys}
+        self._hashed: Dict[str, Dict[Hashable, set]] = {index: defaultdict(set) for index in self._hash_keys}
+        self._ordered: Dict[str, List[Tuple[Any, int]]] = {index: [] for index in self._order_keys}
+        # (row ID, row before the change) for every change since begin(), None when not in a transaction
+        self._journal: Optional[List[Tuple[int, Optional[Any]]]] = None
+        self._begin_version = 0
+
+    def next_id(self) -> int:
+        """Take the next serial ID. Like a sequence, it is used up even if the insert then fails"""
+        self.last_id += 1
+        return self.last_id
+
+    def check_unique(self, row: Any, row_id: Optional[int] = None) -> None:
+        for index, key in self._unique_keys.items():
+            value = key(row)
+            # NULLs never conflict with each other
+            if value is None:
+                continue
+            existing = self._unique[index].get(value)
+            if existing is not None and existing != row_id:
+                raise psycopg.errors.UniqueViolation(
+                    f'duplicate key value violates unique constraint "{self.name}_{index}_key"'
+                )
+
+    def _add_to_indexes(self, row_id: int, row: Any) -> None:
+        for index, key in self._unique_keys.items():
+            value = key(row)
+            if value is not None:
+                self._unique[index][value] = row_id
+        for index, key in self._hash_keys.items():
+            self._hashed[index][key(row)].add(row_id)
+        for index, key in self._order_keys.items():
+            insort(self._ordered[index], (key(row), row_id))
+
+    def _remove_from_indexes(self, row_id: int, row: Any) -> None:
+        for index, key in self._unique_keys.items():
+            value = key(row)
+            if value is not None:
+                del self._unique[index][value]
+        for index, key in self._hash_keys.items():
+            value = key(row)
+            ids = self._hashed[index][value]
+            ids.discard(row_id)
+            if not ids:
+                del self._hashed[index][value]
+        for index, key in self._order_keys.items():
+            entries = self._ordered[index]
+            del entries[bisect_left(entries, (key(row), row_id))]
+
+    def _record(self, row_id: int) -> None:
+        if self._journal is not None:
+            self._journal.append((row_id, self.rows.get(row_id)))
+
+    def insert(self, row_id: int, row: Any) -> None:
+        self.check_unique(row)
+        self._record(row_id)
+        self.rows[row_id] = row
+        self._add_to_indexes(row_id, row)
+
+    def replace(self, row_id: int, row: Any) -> None:
+        self.check_unique(row, row_id)
+        self._record(row_id)
+        self._remove_from_indexes(row_id, self.rows[row_id])
+        self.rows[row_id] = row
+        self._add_to_indexes(row_id, row)
+
+    def delete(self, row_id: int) -> Any:
+        self._record(row_id)
+        row = self.rows.pop(row_id)
+        self._remove_from_indexes(row_id, row)
+        return row
+
+    def begin(self) -> None:
+        self._journal = []
+        self._begin_version = self.version
+
+    def commit(self) -> None:
+        self._journal = None
+
+    def rollback(self) -> None:
+        """Undo every change since begin(). Taken IDs stay used, as sequence values do"""
+        journal, self._journal = self._journal or [], None
+        for row_id, previous in reversed(journal):
+            current = self.rows.pop(row_id, None)
+            if current is not None:
+                self._remove_from_indexes(row_id, current)
+            if previous is not None:
+                self.rows[row_id] = previous
+                self._add_to_indexes(row_id, previous)
+        self.version = self._begin_version
+
+    def get(self, row_id: Optional[int]) -> Optional[Any]:
+        return self.rows.get(row_id)
+
+    def find_unique(self, index: str, value: Hashable) -> Optional[Any]:
+        row_id = self._unique[index].get(value)
+        return None if row_id is None else self.rows[row_id]
+
+    def find(self, index: str, value: Hashable) -> List[Any]:
+        """Rows whose index key equals value, ordered by ID"""
+        return [self.rows[row_id] for row_id in sorted(self._hashed[index].get(value, ()))]
+
+    def ids(self, index: str, value: Hashable) -> List[int]:
+        return sorted(self._hashed[index].get(value, ()))
+
+    def scan(self, index: str, reverse: bool = False) -> Iterator[Any]:
+        """Every row in the order of a sorted index"""
+        entries = reversed(self._ordered[index]) if reverse else iter(self._ordered[index])
+        for _, row_id in entries:
+            yield self.rows[row_id]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def _page(rows: List[M], limit: Optional[int], offset: int) -> List[M]:
+    # Mirrors the SQL builders: a falsy limit means no LIMIT, and OFFSET only applies when positive
+    if limit:
+        return rows[offset:offset + limit]
+    if offset > 0:
+        return rows[offset:]
+    return rows
+
+
+def _not_null(table: str, column: str, value: Any) -> None:
+    if value is None:
+        raise psycopg.errors.NotNullViolation(
+            f'null value in column "{column}" of relation "{table}" violates not-null constraint'
+        )
+
+
+def _references(table: Table, row_id: Optional[int], constraint: str) -> None:
+    if row_id is not None and row_id not in table.rows:
+        raise psycopg.errors.ForeignKeyViolation(
+            f'insert or update violates foreign key constraint "{constraint}"'
+        )
+
+
+def _numeric(value: Optional[float], scale: int) -> Optional[float]:
+    """Round like a DECIMAL(p, scale) column does on the way in"""
+    return None if value is None else round(float(value), scale)
+
+
+class MemoryStore:
+    """Every table the repositories use, held in memory and guarded by one lock.
+
+    Repositories sharing a store see each other's writes, like repositories sharing a
+    database. Writes to the tables in VERSIONED_TABLES bump their version the way the
+    table_versions triggers do.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.banks = Table("banks", unique={"name": lambda bank: bank.name},
+                           ordered={"name": lambda bank: (bank.name,)})
+        self.cards = Table(
+            "credit_cards",
+            unique={"name": lambda card: card.name},
+            hashed={
+                "bank_id": lambda card: card.bank_id,
+                "card_type": lambda card: card.card_type,
+                "reward_structure": lambda card: card.reward_structure,
+            },
+            ordered={
+                "name": lambda card: (card.name,),
+                "annual_fee": lambda card: (card.annual_fee, card.name),
+                "created_at": lambda card: (card.created_at,),
+            }
+        )
+        self.card_categories = Table("card_spending_category",
+                                     hashed={"card_id": lambda spending: spending.card_id})
+        self.users = Table("users", unique={"email": lambda user: user.email})
+        self.user_spending = Table(
+            "user_spending_category",
+            unique={"user_category": lambda spending: (spending.user_id, spending.category)},
+            hashed={"user_id": lambda spending: spending.user_id}
+        )
+        self.authorized_users = Table(
+            "authorized_user_info",
+            hashed={"user_id": lambda info: info.user_id, "bank_id": lambda info: info.bank_id},
+            ordered={"created_at": lambda info: (info.created_at,)}
+        )
+        self._tables = (self.banks, self.cards, self.card_categories, self.users, self.user_spending,
+                        self.authorized_users)
+        self._atomic_depth = 0
+
+    @contextmanager
+    def atomic(self) -> Iterator[None]:
+        """Hold the lock and undo every write made inside if an error escapes, like a transaction"""
+        with self.lock:
+            if self._atomic_depth:
+                # Nested blocks join the outer one, which decides whether to roll back
+                self._atomic_depth += 1
+                try:
+                    yield
+                finally:
+                    self._atomic_depth -= 1
+                return
+
+            for table in self._tables:
+                table.begin()
+            self._atomic_depth = 1
+            try:
+                yield
+            except BaseException:
+                for table in self._tables:
+                    table.rollback()
+                raise
+            else:
+                for table in self._tables:
+                    table.commit()
+            finally:
+                self._atomic_depth = 0
+
+    def bump(self, *tables: Table) -> None:
+        for table in tables:
+            if table.name in VERSIONED_TABLES:
+                table.version += 1
+
+    @staticmethod
+    def now() -> datetime:
+        return datetime.now()
+
+
+class _MemoryRepository:
+    """Store handling shared by the in-memory repositories"""
+
+    def _init_store(self, store: Optional[MemoryStore]) -> None:
+        self.store = store or MemoryStore()
+
+    @staticmethod
+    def _validated_changes(changes: Dict[str, Any], model: Type[BaseModel], table: str,
+                           columns: Tuple[str, ...]) -> Dict[str, Any]:
+        unknown = set(changes) - set(columns)
+        if unknown:
+            raise ValueError(f"Cannot patch {table} columns: {', '.join(sorted(unknown))}")
+        return {column: _field_adapter(model, column).validate_python(value) for column, value in changes.items()}
+
+
+class MemoryBankRepository(_MemoryRepository):
+    """The methods of BankRepository, backed by a MemoryStore"""
+
+    def __init__(self, store: Optional[MemoryStore] = None):
+        self._init_store(store)
+
+    def _stored(self, bank: Bank) -> Bank:
+        return bank.model_copy(update={
+            "transfer_points_value_cents": _numeric(bank.transfer_points_value_cents, 2)
+        })
+
+    def create_bank(self, bank: Bank) -> Bank:
+        """Create new bank and return it back"""
+        with self.store.lock:
+            banks = self.store.banks
+            _not_null("banks", "name", bank.name)
+            row = self._stored(bank)
+            row.id = banks.next_id()
+            row.created_at = self.store.now()
+            banks.insert(row.id, row)
+            self.store.bump(banks)
+            bank.id = row.id
+            bank.created_at = row.created_at
+            return bank
+
+    def get_bank_by_id(self, bank_id: int) -> Optional[Bank]:
+        """Retrieve a bank by its ID"""
+        with self.store.lock:
+            bank = self.store.banks.get(bank_id)
+            return bank.model_copy() if bank else None
+
+    def update_bank(self, bank: Bank) -> Optional[Bank]:
+        """Update a bank with all fields"""
+        with self.store.lock:
+            banks = self.store.banks
+            self.store.bump(banks)
+            current = banks.get(bank.id)
+            if current is None:
+                return None
+            row = self._stored(bank)
+            row.created_at = current.created_at
+            banks.replace(bank.id, row)
+            bank.created_at = current.created_at
+            return bank
+
+    def patch_bank(self, bank_id: int, changes: Dict[str, Any]) -> Optional[Bank]:
+        """Update only the given fields and return the fresh bank"""
+        values = self._validated_changes(changes, Bank, "banks", (
+            "name", "relationship_bank", "transfer_points_value_cents", "reports_under_eighteen"
+        ))
+        with self.store.lock:
+            banks = self.store.banks
+            current = banks.get(bank_id)
+            if values:
+                self.store.bump(banks)
+            if current is None:
+                return None
+            if values:
+                row = self._stored(current.model_copy(update=values))
+                banks.replace(bank_id, row)
+                current = row
+            return current.model_copy()
+
+    def delete_bank(self, bank_id: int) -> bool:
+        """Delete a bank by ID. Returns True if deleted, False if not found"""
+        with self.store.lock:
+            banks = self.store.banks
+            self.store.bump(banks)
+            if bank_id not in banks.rows:
+                return False
+            # Neither cards nor authorized user rows cascade, so the delete is refused
+            if self.store.cards.ids("bank_id", bank_id) or self.store.authorized_users.ids("bank_id", bank_id):
+                raise psycopg.errors.ForeignKeyViolation(
+                    'update or delete on table "banks" violates a foreign key constraint'
+                )
+            banks.delete(bank_id)
+            return True
+
+    def get_all_banks(self, limit: Optional[int] = None, offset: int = 0) -> List[Bank]:
+        """Get all banks with optional pagination"""
+        with self.store.lock:
+            return _page([bank.model_copy() for bank in self.store.banks.scan("name")], limit, offset)
+
+    def get_relationship_banks(self) -> List[Bank]:
+        """Get all banks that are relationship banks"""
+        with self.store.lock:
+            return [bank.model_copy() for bank in self.store.banks.scan("name") if bank.relationship_bank]
+
+    def get_banks_that_report_under_eighteen(self) -> List[Bank]:
+        """Get all banks that report accounts for users under 18"""
+        with self.store.lock:
+            return [bank.model_copy() for bank in self.store.banks.scan("name") if bank.reports_under_eighteen]
+
+    def get_banks_with_transfer_points(self) -> List[Bank]:
+        """Get all banks that have transfer points value set"""
+        with self.store.lock:
+            banks = [bank for bank in self.store.banks.rows.values() if bank.transfer_points_value_cents is not None]
+            banks.sort(key=lambda bank: -bank.transfer_points_value_cents)
+            return [bank.model_copy() for bank in banks]
+
+    def bank_exists(self, bank_id: int) -> bool:
+        """Check if a bank exists by ID"""
+        with self.store.lock:
+            return bank_id in self.store.banks.rows
+
+    def get_bank_by_name(self, name: str) -> Optional[Bank]:
+        """Get a bank by exact name match"""
+        with self.store.lock:
+            bank = self.store.banks.find_unique("name", name)
+            return bank.model_copy() if bank else None
+
+    def get_banks_by_ids(self, bank_ids: List[int]) -> List[Bank]:
+        """Get many banks by ID, ordered by ID. Unknown IDs are skipped"""
+        with self.store.lock:
+            banks = self.store.banks.rows
+            return [banks[bank_id].model_copy() for bank_id in sorted(set(bank_ids)) if bank_id in banks]
+
+
+class MemoryCardRepository(_MemoryRepository):
+    """The methods of CardRepository, backed by a MemoryStore"""
+
+    def __init__(self, store: Optional[MemoryStore] = None):
+        self._init_store(store)
+
+    def _check_card(self, card: Card) -> Card:
+        _not_null("credit_cards", "name", card.name)
+        _not_null("credit_cards", "card_type", card.card_type)
+        _not_null("credit_cards", "annual_fee", card.annual_fee)
+        _not_null("credit_cards", "foreign_transaction_fee", card.foreign_transaction_fee)
+        _not_null("credit_cards", "reward_structure", card.reward_structure)
+        _references(self.store.banks, card.bank_id, "credit_cards_bank_id_fkey")
+        return card.model_copy(update={
+            "foreign_transaction_fee": _numeric(card.foreign_transaction_fee, 3)
+        })
+
+    def _cards(self, cards) -> List[Card]:
+        return [card.model_copy() for card in cards]
+
+    def create_card(self, card: Card) -> Card:
+        with self.store.lock:
+            cards = self.store.cards
+            row_id = cards.next_id()
+            row = self._check_card(card)
+            row.id = row_id
+            row.created_at = self.store.now()
+            cards.insert(row_id, row)
+            self.store.bump(cards)
+            card.id = row_id
+            card.created_at = row.created_at
+            return card
+
+    def get_card_by_id(self, card_id: int) -> Card:
+        with self.store.lock:
+            card = self.store.cards.get(card_id)
+            return card.model_copy() if card else None
+
+    def update_card(self, card: Card) -> Optional[Card]:
+        """Update a card with all fields"""
+        with self.store.lock:
+            cards = self.store.cards
+            self.store.bump(cards)
+            current = cards.get(card.id)
+            if current is None:
+                return None
+            row = self._check_card(card)
+            row.created_at = current.created_at
+            cards.replace(card.id, row)
+            card.created_at = current.created_at
+            return card
+
+    def patch_card(self, card_id: int, changes: Dict[str, Any]) -> Optional[Card]:
+        """Update only the given fields and return the fresh card"""
+        values = self._validated_changes(changes, Card, "credit_cards", (
+            "name", "bank_id", "card_type", "sub_max_value", "sub_description", "annual_fee",
+            "foreign_transaction_fee", "reward_structure", "fee_credits", "other_benefits"
+        ))
+        with self.store.lock:
+            cards = self.store.cards
+            current = cards.get(card_id)
+            if values:
+                self.store.bump(cards)
+            if current is None:
+                return None
+            if values:
+                row = self._check_card(current.model_copy(update=values))
+                cards.replace(card_id, row)
+                current = row
+            return current.model_copy()
+
+    def delete_card(self, card_id: int) -> bool:
+        """Delete a card by ID and, by cascade, its reward categories"""
+        with self.store.lock:
+            cards = self.store.cards
+            self.store.bump(cards)
+            if card_id not in cards.rows:
+                return False
+            self._delete_cards([card_id])
+            return True
+
+    def _delete_cards(self, card_ids: List[int]) -> None:
+        categories = self.store.card_categories
+        cascaded = False
+        for card_id in card_ids:
+            self.store.cards.delete(card_id)
+            for category_id in categories.ids("card_id", card_id):
+                categories.delete(category_id)
+                cascaded = True
+        if cascaded:
+            self.store.bump(categories)
+
+    def get_cards_by_bank(self, bank_id: int) -> List[Card]:
+        """Get all credit cards for a specific bank"""
+        with self.store.lock:
+            return self._cards(sorted(self.store.cards.find("bank_id", bank_id), key=lambda card: card.name))
+
+    def get_cards_by_type(self, card_type: CardType) -> List[Card]:
+        """Get all credit cards of a specific type"""
+        with self.store.lock:
+            return self._cards(sorted(self.store.cards.find("card_type", card_type), key=lambda card: card.name))
+
+    def get_cards_by_reward_structure(self, reward_structure: RewardStructure) -> List[Card]:
+        """Get all credit cards with a specific reward structure"""
+        with self.store.lock:
+            return self._cards(sorted(self.store.cards.find("reward_structure", reward_structure),
+                                      key=lambda card: card.name))
+
+    def get_cards_with_no_annual_fee(self) -> List[Card]:
+        """Get all credit cards with no annual fee"""
+        with self.store.lock:
+            return self._cards(card for card in self.store.cards.scan("name") if card.annual_fee == 0)
+
+    def get_cards_with_signup_bonus(self) -> List[Card]:
+        """Get all credit cards that have a signup bonus (sub_max_value > 0)"""
+        with self.store.lock:
+            cards = [card for card in self.store.cards.rows.values()
+                     if card.sub_max_value is not None and card.sub_max_value > 0]
+            cards.sort(key=lambda card: -card.sub_max_value)
+            return self._cards(cards)
+
+    def get_all_cards(self, limit: Optional[int] = None, offset: int = 0) -> List[Card]:
+        """Get all credit cards with optional pagination"""
+        with self.store.lock:
+            return _page(self._cards(self.store.cards.scan("created_at", reverse=True)), limit, offset)
+
+    def get_all_cards_batch(self, limit: Optional[int] = None, offset: int = 0) -> CardBatch:
+        """get_all_cards as a columnar CardBatch"""
+        with self.store.lock:
+            return CardBatch.from_models(_page(list(self.store.cards.scan("created_at", reverse=True)), limit, offset))
+
+    def get_cards_by_fee_range(self, min_fee: int = 0, max_fee: Optional[int] = None) -> List[Card]:
+        """Get credit cards within a specific annual fee range"""
+        with self.store.lock:
+            return self._cards(card for card in self.store.cards.scan("annual_fee")
+                               if card.annual_fee >= min_fee and (max_fee is None or card.annual_fee <= max_fee))
+
+    def get_cards_by_ids(self, card_ids: List[int]) -> List[Card]:
+        """Get many cards by ID, ordered by ID. Unknown IDs are skipped"""
+        with self.store.lock:
+            cards = self.store.cards.rows
+            return [cards[card_id].model_copy() for card_id in sorted(set(card_ids)) if card_id in cards]
+
+    def search_cards(self, card_type: Optional[CardType] = None, reward_structure: Optional[RewardStructure] = None,
+                     bank_id: Optional[int] = None, min_fee: int = 0, max_fee: Optional[int] = None,
+                     limit: Optional[int] = None, offset: int = 0) -> List[Card]:
+        """Search credit cards by any combination of filters, ordered by name"""
+        with self.store.lock:
+            cards = self.store.cards
+            # Start from the narrowest hash index available, then filter the rest
+            if bank_id is not None:
+                candidates = sorted(cards.find("bank_id", bank_id), key=lambda card: card.name)
+            elif card_type is not None:
+                candidates = sorted(cards.find("card_type", card_type), key=lambda card: card.name)
+            else:
+                candidates = cards.scan("name")
+            matches = [
+                card for card in candidates
+                if card.annual_fee >= min_fee
+                and (max_fee is None or card.annual_fee <= max_fee)
+                and (card_type is None or card.card_type == card_type)
+                and (reward_structure is None or card.reward_structure == reward_structure)
+                and (bank_id is None or card.bank_id == bank_id)
+            ]
+            return _page(self._cards(matches), limit, offset)
+
+    def _insert_category(self, spending: SpendingCategoryInfo) -> SpendingCategoryInfo:
+        categories = self.store.card_categories
+        row_id = categories.next_id()
+        _not_null("card_spending_category", "category", spending.category)
+        _references(self.store.cards, spending.card_id, "card_spending_category_card_id_fkey")
+        row = spending.model_copy(update={"id": row_id, "rate": _numeric(spending.rate, 2)})
+        categories.insert(row_id, row)
+        return row
+
+    def add_spending_category(self, spending: SpendingCategoryInfo) -> SpendingCategoryInfo:
+        """Add a reward category to a card and return it with its ID"""
+        with self.store.lock:
+            spending.id = self._insert_category(spending).id
+            self.store.bump(self.store.card_categories)
+            return spending
+
+    def add_spending_categories(self, spendings: List[SpendingCategoryInfo]) -> List[SpendingCategoryInfo]:
+        """Add several reward categories and return them with their IDs"""
+        if not spendings:
+            return []
+        with self.store.atomic():
+            rows = [self._insert_category(spending) for spending in spendings]
+            self.store.bump(self.store.card_categories)
+            # IDs are handed back only once the whole batch is in
+            for spending, row in zip(spendings, rows):
+                spending.id = row.id
+            return spendings
+
+    def get_spending_categories_by_card(self, card_id: int) -> List[SpendingCategoryInfo]:
+        """Get all reward categories for a specific card"""
+        return self.get_spending_categories_for_cards([card_id])
+
+    def get_spending_categories_for_cards(self, card_ids: List[int]) -> List[SpendingCategoryInfo]:
+        """Get reward categories for many cards, ordered by card"""
+        with self.store.lock:
+            categories = self.store.card_categories
+            return [category.model_copy() for card_id in sorted(set(card_ids))
+                    for category in categories.find("card_id", card_id)]
+
+    def get_catalog_version(self) -> int:
+        """Get a counter that changes whenever banks, cards or card categories change"""
+        with self.store.lock:
+            return self.store.banks.version + self.store.cards.version + self.store.card_categories.version
+
+    def iter_all_cards(self, batch_size: int = 1000) -> Iterator[Card]:
+        """Stream every card ordered by ID"""
+        with self.store.lock:
+            cards = [self.store.cards.rows[card_id].model_copy() for card_id in sorted(self.store.cards.rows)]
+        yield from cards
+
+    def sync_catalog(self, cards: List[Card]) -> CatalogSyncResult:
+        """Make the stored cards match a full catalog feed, matching cards by name"""
+        if not cards:
+            raise ValueError("Refusing to sync an empty catalog feed")
+
+        with self.store.atomic():
+            table = self.store.cards
+            names = set()
+            for card in cards:
+                if card.name in names:
+                    raise psycopg.errors.UniqueViolation(
+                        'duplicate key value violates unique constraint "catalog_feed_pkey"'
+                    )
+                names.add(card.name)
+
+            columns = ("bank_id", "card_type", "sub_max_value", "sub_description", "annual_fee",
+                       "foreign_transaction_fee", "reward_structure", "fee_credits", "other_benefits")
+            inserted = updated = 0
+            for card in cards:
+                feed_row = self._check_card(card.model_copy(update={
+                    "foreign_transaction_fee": card.foreign_transaction_fee or 0
+                }))
+                current = table.find_unique("name", card.name)
+                if current is None:
+                    feed_row.id = table.next_id()
+                    feed_row.created_at = self.store.now()
+                    table.insert(feed_row.id, feed_row)
+                    inserted += 1
+                elif any(getattr(current, column) != getattr(feed_row, column) for column in columns):
+                    feed_row.id = current.id
+                    feed_row.created_at = current.created_at
+                    table.replace(current.id, feed_row)
+                    updated += 1
+            self.store.bump(table)
+
+            missing = [card_id for card_id, card in table.rows.items() if card.name not in names]
+            self._delete_cards(missing)
+            self.store.bump(table)
+
+            return CatalogSyncResult(
+                inserted=inserted,
+                updated=updated,
+                unchanged=len(cards) - inserted - updated,
+                deleted=len(missing)
+            )
+
+
+class MemoryUserRepository(_MemoryRepository):
+    """The methods of UserRepository, backed by a MemoryStore"""
+
+    def __init__(self, store: Optional[MemoryStore] = None):
+        self._init_store(store)
+
+    def _check_user(self, user: User) -> User:
+        _not_null("users", "name", user.name)
+        _not_null("users", "email", user.email)
+        return user.model_copy()
+
+    def create_user(self, user: User) -> User:
+        """Create new user and return with ID"""
+        with self.store.lock:
+            users = self.store.users
+            row_id = users.next_id()
+            row = self._check_user(user)
+            row.id = row_id
+            row.created_at = self.store.now()
+            users.insert(row_id, row)
+            self.store.bump(users)
+            user.id = row_id
+            user.created_at = row.created_at
+            return user
+
+    def get_user_by_id(self, user_id: int) -> Optional[User]:
+        """Get the users row only. Use get_user_profile for spending, AU info and banks"""
+        with self.store.lock:
+            user = self.store.users.get(user_id)
+            return user.model_copy() if user else None
+
+    def update_user(self, user_data: User) -> User:
+        """Update user info (income, credit score, etc.)"""
+        with self.store.lock:
+            users = self.store.users
+            self.store.bump(users)
+            current = users.get(user_data.id)
+            if current is None:
+                return None
+            row = self._check_user(user_data)
+            row.created_at = current.created_at
+            users.replace(row.id, row)
+            return row.model_copy()
+
+    def patch_user(self, user_id: int, changes: Dict[str, Any]) -> Optional[User]:
+        """Update only the given fields and return the fresh user"""
+        values = self._validated_changes(changes, User, "users", ("name", "email", "credit_score", "annual_income"))
+        with self.store.lock:
+            users = self.store.users
+            current = users.get(user_id)
+            if values:
+                self.store.bump(users)
+            if current is None:
+                return None
+            if values:
+                row = self._check_user(current.model_copy(update=values))
+                users.replace(user_id, row)
+                current = row
+            return current.model_copy()
+
+    def delete_user(self, user_id: int) -> bool:
+        """Delete a user and, by cascade, their spending and authorized user rows"""
+        with self.store.lock:
+            store = self.store
+            store.bump(store.users)
+            if user_id not in store.users.rows:
+                return False
+            store.users.delete(user_id)
+            for table in (store.user_spending, store.authorized_users):
+                row_ids = table.ids("user_id", user_id)
+                for row_id in row_ids:
+                    table.delete(row_id)
+                if row_ids:
+                    store.bump(table)
+            return True
+
+    def _upsert_spending(self, user_id: int, category: SpendingCategory, user_spend: float,
+                         combine: Optional[Callable[[int, int], int]] = None) -> SpendingCategoryUser:
+        """INSERT ... ON CONFLICT (user_id, category) DO UPDATE for one row"""
+        spending = self.store.user_spending
+        _not_null("user_spending_category", "category", category)
+        # user_spend is an INTEGER column
+        user_spend = round(user_spend)
+        current = spending.find_unique("user_category", (user_id, SpendingCategory(category)))
+        if current is not None:
+            new_spend = combine(current.user_spend, user_spend) if combine else user_spend
+            row = current.model_copy(update={"user_spend": new_spend})
+            spending.replace(current.id, row)
+            return row
+        row_id = spending.next_id()
+        _references(self.store.users, user_id, "user_spending_category_user_id_fkey")
+        row = SpendingCategoryUser(id=row_id, user_id=user_id, category=category, user_spend=user_spend,
+                                   created_at=self.store.now())
+        spending.insert(row_id, row)
+        return row
+
+    def add_spending_category(self, spending: SpendingCategoryUser) -> SpendingCategoryUser:
+        """Add or update a spending category"""
+        with self.store.lock:
+            row = self._upsert_spending(spending.user_id, spending.category, spending.user_spend)
+            self.store.bump(self.store.user_spending)
+            spending.id = row.id
+            spending.created_at = row.created_at
+            return spending
+
+    def add_spending_categories(self, spendings: List[SpendingCategoryUser]) -> List[SpendingCategoryUser]:
+        """Add or update several spending categories and return them with IDs"""
+        if not spendings:
+            return []
+        with self.store.atomic():
+            rows = [self._upsert_spending(spending.user_id, spending.category, spending.user_spend)
+                    for spending in spendings]
+            self.store.bump(self.store.user_spending)
+            for spending, row in zip(spendings, rows):
+                spending.id = row.id
+                spending.created_at = row.created_at
+            return spendings
+
+    def set_spending_profile(self, user_id: int, profile: Dict[SpendingCategory, float]) -> List[SpendingCategoryUser]:
+        """Replace a user's spend per category and return the new rows"""
+        return self.set_spending_profiles({user_id: profile}).get(user_id, [])
+
+    def set_spending_profiles(self, profiles: Dict[int, Dict[SpendingCategory, float]]) -> Dict[int, List[SpendingCategoryUser]]:
+        """Replace the spend profiles of many users, keyed by user ID"""
+        if not profiles:
+            return {}
+
+        with self.store.atomic():
+            spending = self.store.user_spending
+            for user_id, profile in profiles.items():
+                wanted = {SpendingCategory(category) for category in profile}
+                for row in spending.find("user_id", user_id):
+                    if row.category not in wanted:
+                        spending.delete(row.id)
+
+            result: Dict[int, List[SpendingCategoryUser]] = {user_id: [] for user_id in profiles}
+            for user_id, profile in profiles.items():
+                for category, spend in profile.items():
+                    result[user_id].append(self._upsert_spending(user_id, SpendingCategory(category), spend).model_copy())
+            self.store.bump(spending)
+
+            for rows in result.values():
+                rows.sort(key=lambda row: row.id)
+            return result
+
+    def bulk_upsert_spending(self, rows: List[Tuple[int, SpendingCategory, float]], increment: bool = False) -> int:
+        """Write many (user_id, category, spend) rows. Returns rows written"""
+        if not rows:
+            return 0
+
+        keys = [(row[0], SpendingCategory(row[1])) for row in rows]
+        if len(set(keys)) != len(keys):
+            raise psycopg.errors.CardinalityViolation(
+                "ON CONFLICT DO UPDATE command cannot affect row a second time"
+            )
+        combine = (lambda stored, added: stored + added) if increment else None
+        with self.store.atomic():
+            for (user_id, category), row in zip(keys, rows):
+                self._upsert_spending(user_id, category, row[2], combine)
+            self.store.bump(self.store.user_spending)
+            return len(rows)
+
+    def remove_spending_category_by_id(self, user_category_id: int) -> bool:
+        """Remove a spending category"""
+        with self.store.lock:
+            spending = self.store.user_spending
+            self.store.bump(spending)
+            if user_category_id not in spending.rows:
+                return False
+            spending.delete(user_category_id)
+            return True
+
+    def add_authorized_user_info(self, au_info: AuthorizedUserInfo) -> AuthorizedUserInfo:
+        """add authorized user info"""
+        with self.store.lock:
+            # Like the SQL version, only the ID is handed back
+            au_info.id = _insert_authorized_user(self.store, au_info).id
+            self.store.bump(self.store.authorized_users)
+            return au_info
+
+    def delete_authorized_user_info(self, au_id: int) -> bool:
+        """delete authorized user info"""
+        with self.store.lock:
+            authorized_users = self.store.authorized_users
+            self.store.bump(authorized_users)
+            if au_id not in authorized_users.rows:
+                return False
+            authorized_users.delete(au_id)
+            return True
+
+    def get_spending_categories_by_user(self, user_id) -> List[SpendingCategoryUser]:
+        """Get spending category by a given user id"""
+        with self.store.lock:
+            return [row.model_copy() for row in self.store.user_spending.find("user_id", user_id)]
+
+    def get_spending_batch(self, user_ids: Optional[List[int]] = None) -> UserSpendBatch:
+        """Spending categories of the given users, or of everyone, as a UserSpendBatch ordered by user"""
+        with self.store.lock:
+            spending = self.store.user_spending
+            if user_ids is None:
+                rows = sorted(spending.rows.values(), key=lambda row: (row.user_id, row.id))
+            else:
+                rows = [row for user_id in sorted(set(user_ids)) for row in spending.find("user_id", user_id)]
+            return UserSpendBatch.from_models(rows)
+
+    def get_users_by_ids(self, user_ids: List[int]) -> List[User]:
+        """Get many users by ID, ordered by ID. Unknown IDs are skipped"""
+        with self.store.lock:
+            users = self.store.users.rows
+            return [users[user_id].model_copy() for user_id in sorted(set(user_ids)) if user_id in users]
+
+    def get_user_profile(self, user_id: int) -> Optional[UserProfile]:
+        """Get a user with spending categories, AU info and referenced banks"""
+        return self.get_user_profiles([user_id]).get(user_id)
+
+    def get_user_profiles(self, user_ids: List[int]) -> Dict[int, UserProfile]:
+        """Get profiles for many users, keyed by user ID. Missing users are left out"""
+        with self.store.lock:
+            store = self.store
+            profiles = {}
+            for user_id in user_ids:
+                user = store.users.get(user_id)
+                if user is None:
+                    continue
+                authorized = sorted(store.authorized_users.find("user_id", user_id),
+                                    key=lambda info: (info.created_at, info.id), reverse=True)
+                bank_ids = {info.bank_id for info in authorized}
+                banks = sorted((store.banks.rows[bank_id] for bank_id in bank_ids if bank_id in store.banks.rows),
+                               key=lambda bank: bank.name)
+                profiles[user_id] = UserProfile(
+                    user=user.model_copy(),
+                    spending_categories=[row.model_copy() for row in store.user_spending.find("user_id", user_id)],
+                    authorized_user_info=[info.model_copy() for info in authorized],
+                    banks=[bank.model_copy() for bank in banks]
+                )
+            return profiles
+
+    def iter_anonymised_users(self, batch_size: int = 1000) -> Iterator[AnonymisedUser]:
+        """Stream every user without identifiers, ordered by the exported columns"""
+        with self.store.lock:
+            anonymised = [AnonymisedUser(
+                credit_score=user.credit_score,
+                income_band=None if user.annual_income is None
+                else user.annual_income // INCOME_BAND_WIDTH * INCOME_BAND_WIDTH,
+                joined_month=None if user.created_at is None else user.created_at.date().replace(day=1)
+            ) for user in self.store.users.rows.values()]
+
+        def order(user: AnonymisedUser):
+            # NULLs sort last, as in an ascending ORDER BY
+            return (user.joined_month is None, user.joined_month or date.min,
+                    user.credit_score is None, _CREDIT_SCORE_ORDER.get(user.credit_score, 0),
+                    user.income_band is None, user.income_band or 0)
+
+        yield from sorted(anonymised, key=order)
+
+    def iter_spend_aggregates(self, min_group_size: int = 5, batch_size: int = 1000) -> Iterator[SpendAggregate]:
+        """Stream spend totals per category and credit score. Groups smaller than min_group_size are left out"""
+        with self.store.lock:
+            groups: Dict[Tuple[SpendingCategory, Optional[CreditScoreRating]], List[SpendingCategoryUser]] = \
+                defaultdict(list)
+            for row in self.store.user_spending.rows.values():
+                user = self.store.users.rows[row.user_id]
+                groups[(row.category, user.credit_score)].append(row)
+
+        def order(key):
+            category, credit_score = key
+            # NULL credit scores sort last, as in an ascending ORDER BY
+            return (_SPENDING_CATEGORY_ORDER[category], credit_score is None,
+                    _CREDIT_SCORE_ORDER.get(credit_score, 0))
+
+        for key in sorted(groups, key=order):
+            rows = groups[key]
+            user_count = len({row.user_id for row in rows})
+            if user_count < min_group_size:
+                continue
+            total = sum(row.user_spend for row in rows)
+            yield SpendAggregate(category=key[0], credit_score=key[1], user_count=user_count,
+                                 total_spend=total, average_spend=total / len(rows))
+
+
+def _insert_authorized_user(store: MemoryStore, au_info: AuthorizedUserInfo) -> AuthorizedUserInfo:
+    authorized_users = store.authorized_users
+    row_id = authorized_users.next_id()
+    _not_null("authorized_user_info", "add_after_age_eighteen", au_info.add_after_age_eighteen)
+    _references(store.users, au_info.user_id, "authorized_user_info_user_id_fkey")
+    _references(store.banks, au_info.bank_id, "authorized_user_info_bank_id_fkey")
+    row = au_info.model_copy(update={"id": row_id, "created_at": store.now()})
+    authorized_users.insert(row_id, row)
+    return row
+
+
+class MemoryAuthorizedUserRepository(_MemoryRepository):
+    """The methods of AuthorizedUserRepository, backed by a MemoryStore"""
+
+    def __init__(self, store: Optional[MemoryStore] = None):
+        self._init_store(store)
+
+    def _newest_first(self, infos) -> List[AuthorizedUserInfo]:
+        return [info.model_copy() for info in sorted(infos, key=lambda info: (info.created_at, info.id), reverse=True)]
+
+    def add_info(self, au_info: AuthorizedUserInfo) -> AuthorizedUserInfo:
+        """Create new info and return with ID"""
+        with self.store.lock:
+            row = _insert_authorized_user(self.store, au_info)
+            self.store.bump(self.store.authorized_users)
+            au_info.id = row.id
+            au_info.created_at = row.created_at
+            return au_info
+
+    def add_all_info(self, au_infos: List[AuthorizedUserInfo]) -> List[AuthorizedUserInfo]:
+        """Create several info rows and return them with IDs"""
+        if not au_infos:
+            return []
+        with self.store.atomic():
+            rows = [_insert_authorized_user(self.store, au_info) for au_info in au_infos]
+            self.store.bump(self.store.authorized_users)
+            for au_info, row in zip(au_infos, rows):
+                au_info.id = row.id
+                au_info.created_at = row.created_at
+            return au_infos
+
+    def get_info_by_id(self, info_id: int) -> Optional[AuthorizedUserInfo]:
+        """Get authorized user info by ID"""
+        with self.store.lock:
+            info = self.store.authorized_users.get(info_id)
+            return info.model_copy() if info else None
+
+    def remove_info(self, info_id: int) -> bool:
+        """Remove authorized user info by ID. Returns True if removed, False if not found"""
+        with self.store.lock:
+            authorized_users = self.store.authorized_users
+            self.store.bump(authorized_users)
+            if info_id not in authorized_users.rows:
+                return False
+            authorized_users.delete(info_id)
+            return True
+
+    def get_all_info_by_user(self, user_id: int) -> List[AuthorizedUserInfo]:
+        """Get all authorized user info for a specific user"""
+        with self.store.lock:
+            return self._newest_first(self.store.authorized_users.find("user_id", user_id))
+
+    def get_all_info_by_bank(self, bank_id: int) -> List[AuthorizedUserInfo]:
+        """Get all authorized user info for a specific bank"""
+        with self.store.lock:
+            return self._newest_first(self.store.authorized_users.find("bank_id", bank_id))
+
+    def get_info_by_user_and_bank(self, user_id: int, bank_id: int) -> Optional[AuthorizedUserInfo]:
+        """Get authorized user info for specific user and bank combination"""
+        with self.store.lock:
+            for info in self.store.authorized_users.find("user_id", user_id):
+                if info.bank_id == bank_id:
+                    return info.model_copy()
+            return None
+
+    def update_info(self, au_info: AuthorizedUserInfo) -> Optional[AuthorizedUserInfo]:
+        """Update authorized user info"""
+        with self.store.lock:
+            authorized_users = self.store.authorized_users
+            self.store.bump(authorized_users)
+            current = authorized_users.get(au_info.id)
+            if current is None:
+                return None
+            _not_null("authorized_user_info", "add_after_age_eighteen", au_info.add_after_age_eighteen)
+            _references(self.store.users, au_info.user_id, "authorized_user_info_user_id_fkey")
+            _references(self.store.banks, au_info.bank_id, "authorized_user_info_bank_id_fkey")
+            authorized_users.replace(au_info.id, au_info.model_copy(update={"created_at": current.created_at}))
+            au_info.created_at = current.created_at
+            return au_info
+
+    def get_all_info(self, limit: Optional[int] = None, offset: int = 0) -> List[AuthorizedUserInfo]:
+        """Get all authorized user info with optional pagination"""
+        with self.store.lock:
+            infos = [info.model_copy() for info in self.store.authorized_users.scan("created_at", reverse=True)]
+            return _page(infos, limit, offset)
+
+    def info_exists(self, info_id: int) -> bool:
+        """Check if authorized user info exists by ID"""
+        with self.store.lock:
+            return info_id in self.store.authorized_users.rows
+
+    def get_info_count(self) -> int:
+        """Get total number of authorized user info records"""
+        with self.store.lock:
+            return len(self.store.authorized_users)
+
+    def remove_all_info_by_user(self, user_id: int) -> int:
+        """Remove all authorized user info for a specific user. Returns number of records removed"""
+        with self.store.lock:
+            authorized_users = self.store.authorized_users
+            self.store.bump(authorized_users)
+            row_ids = authorized_users.ids("user_id", user_id)
+            for row_id in row_ids:
+                authorized_users.delete(row_id)
+            return len(row_ids)
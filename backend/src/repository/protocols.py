@@ -0,0 +1,228 @@
+"""The storage interface the services depend on.
+
+BankRepository, CardRepository, UserRepository and AuthorizedUserRepository implement
+these against PostgreSQL, and the Memory*Repository classes against a MemoryStore.
+Services are annotated with the protocols so either backend can be handed to them.
+"""
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Tuple
+from src.model.batch import CardBatch, UserSpendBatch
+from src.model.card import Bank, Card, CatalogSyncResult, SpendingCategoryInfo
+from src.model.enums import CardType, RewardStructure, SpendingCategory
+from src.model.user import (AnonymisedUser, AuthorizedUserInfo, SpendAggregate, SpendingCategoryUser, User,
+                            UserProfile)
+
+
+class BankStore(Protocol):
+    """Reads and writes banks"""
+
+    def create_bank(self, bank: Bank) -> Bank:
+        ...
+
+    def get_bank_by_id(self, bank_id: int) -> Optional[Bank]:
+        ...
+
+    def get_banks_by_ids(self, bank_ids: List[int]) -> List[Bank]:
+        ...
+
+    def get_bank_by_name(self, name: str) -> Optional[Bank]:
+        ...
+
+    def get_all_banks(self, limit: Optional[int] = None, offset: int = 0) -> List[Bank]:
+        ...
+
+    def get_relationship_banks(self) -> List[Bank]:
+        ...
+
+    def get_banks_that_report_under_eighteen(self) -> List[Bank]:
+        ...
+
+    def get_banks_with_transfer_points(self) -> List[Bank]:
+        ...
+
+    def update_bank(self, bank: Bank) -> Optional[Bank]:
+        ...
+
+    def patch_bank(self, bank_id: int, changes: Dict[str, Any]) -> Optional[Bank]:
+        ...
+
+    def delete_bank(self, bank_id: int) -> bool:
+        ...
+
+    def bank_exists(self, bank_id: int) -> bool:
+        ...
+
+
+class CardStore(Protocol):
+    """Reads and writes cards and their reward categories"""
+
+    def create_card(self, card: Card) -> Card:
+        ...
+
+    def get_card_by_id(self, card_id: int) -> Card:
+        ...
+
+    def get_cards_by_ids(self, card_ids: List[int]) -> List[Card]:
+        ...
+
+    def get_all_cards(self, limit: Optional[int] = None, offset: int = 0) -> List[Card]:
+        ...
+
+    def get_all_cards_batch(self, limit: Optional[int] = None, offset: int = 0) -> CardBatch:
+        ...
+
+    def iter_all_cards(self, batch_size: int = 1000) -> Iterator[Card]:
+        ...
+
+    def get_cards_by_bank(self, bank_id: int) -> List[Card]:
+        ...
+
+    def get_cards_by_type(self, card_type: CardType) -> List[Card]:
+        ...
+
+    def get_cards_by_reward_structure(self, reward_structure: RewardStructure) -> List[Card]:
+        ...
+
+    def get_cards_with_no_annual_fee(self) -> List[Card]:
+        ...
+
+    def get_cards_with_signup_bonus(self) -> List[Card]:
+        ...
+
+    def get_cards_by_fee_range(self, min_fee: int = 0, max_fee: Optional[int] = None) -> List[Card]:
+        ...
+
+    def search_cards(self, card_type: Optional[CardType] = None, reward_structure: Optional[RewardStructure] = None,
+                     bank_id: Optional[int] = None, min_fee: int = 0, max_fee: Optional[int] = None,
+                     limit: Optional[int] = None, offset: int = 0) -> List[Card]:
+        ...
+
+    def update_card(self, card: Card) -> Optional[Card]:
+        ...
+
+    def patch_card(self, card_id: int, changes: Dict[str, Any]) -> Optional[Card]:
+        ...
+
+    def delete_card(self, card_id: int) -> bool:
+        ...
+
+    def add_spending_category(self, spending: SpendingCategoryInfo) -> SpendingCategoryInfo:
+        ...
+
+    def add_spending_categories(self, spendings: List[SpendingCategoryInfo]) -> List[SpendingCategoryInfo]:
+        ...
+
+    def get_spending_categories_by_card(self, card_id: int) -> List[SpendingCategoryInfo]:
+        ...
+
+    def get_spending_categories_for_cards(self, card_ids: List[int]) -> List[SpendingCategoryInfo]:
+        ...
+
+    def get_catalog_version(self) -> int:
+        ...
+
+    def sync_catalog(self, cards: List[Card]) -> CatalogSyncResult:
+        ...
+
+
+class UserStore(Protocol):
+    """Reads and writes users, their spending and their authorized user info"""
+
+    def create_user(self, user: User) -> User:
+        ...
+
+    def get_user_by_id(self, user_id: int) -> Optional[User]:
+        ...
+
+    def get_users_by_ids(self, user_ids: List[int]) -> List[User]:
+        ...
+
+    def get_user_profile(self, user_id: int) -> Optional[UserProfile]:
+        ...
+
+    def get_user_profiles(self, user_ids: List[int]) -> Dict[int, UserProfile]:
+        ...
+
+    def update_user(self, user_data: User) -> User:
+        ...
+
+    def patch_user(self, user_id: int, changes: Dict[str, Any]) -> Optional[User]:
+        ...
+
+    def delete_user(self, user_id: int) -> bool:
+        ...
+
+    def get_spending_categories_by_user(self, user_id) -> List[SpendingCategoryUser]:
+        ...
+
+    def get_spending_batch(self, user_ids: Optional[List[int]] = None) -> UserSpendBatch:
+        ...
+
+    def add_spending_category(self, spending: SpendingCategoryUser) -> SpendingCategoryUser:
+        ...
+
+    def add_spending_categories(self, spendings: List[SpendingCategoryUser]) -> List[SpendingCategoryUser]:
+        ...
+
+    def set_spending_profile(self, user_id: int, profile: Dict[SpendingCategory, float]) -> List[SpendingCategoryUser]:
+        ...
+
+    def set_spending_profiles(self, profiles: Dict[int, Dict[SpendingCategory, float]]) -> Dict[int, List[SpendingCategoryUser]]:
+        ...
+
+    def bulk_upsert_spending(self, rows: List[Tuple[int, SpendingCategory, float]], increment: bool = False) -> int:
+        ...
+
+    def remove_spending_category_by_id(self, user_category_id: int) -> bool:
+        ...
+
+    def add_authorized_user_info(self, au_info: AuthorizedUserInfo) -> AuthorizedUserInfo:
+        ...
+
+    def delete_authorized_user_info(self, au_id: int) -> bool:
+        ...
+
+    def iter_anonymised_users(self, batch_size: int = 1000) -> Iterator[AnonymisedUser]:
+        ...
+
+    def iter_spend_aggregates(self, min_group_size: int = 5, batch_size: int = 1000) -> Iterator[SpendAggregate]:
+        ...
+
+
+class AuthorizedUserStore(Protocol):
+    """Reads and writes authorized user info"""
+
+    def add_info(self, au_info: AuthorizedUserInfo) -> AuthorizedUserInfo:
+        ...
+
+    def add_all_info(self, au_infos: List[AuthorizedUserInfo]) -> List[AuthorizedUserInfo]:
+        ...
+
+    def get_info_by_id(self, info_id: int) -> Optional[AuthorizedUserInfo]:
+        ...
+
+    def get_all_info(self, limit: Optional[int] = None, offset: int = 0) -> List[AuthorizedUserInfo]:
+        ...
+
+    def get_all_info_by_user(self, user_id: int) -> List[AuthorizedUserInfo]:
+        ...
+
+    def get_all_info_by_bank(self, bank_id: int) -> List[AuthorizedUserInfo]:
+        ...
+
+    def get_info_by_user_and_bank(self, user_id: int, bank_id: int) -> Optional[AuthorizedUserInfo]:
+        ...
+
+    def update_info(self, au_info: AuthorizedUserInfo) -> Optional[AuthorizedUserInfo]:
+        ...
+
+    def remove_info(self, info_id: int) -> bool:
+        ...
+
+    def remove_all_info_by_user(self, user_id: int) -> int:
+        ...
+
+    def info_exists(self, info_id: int) -> bool:
+        ...
+
+    def get_info_count(self) -> int:
+        ...
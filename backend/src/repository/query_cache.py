@@ -0,0 +1,76 @@
+import threading
+import psycopg
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+def _copy(value: Any) -> Any:
+    """Copy cached models on the way out so callers can't change the cached result"""
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    if isinstance(value, BaseModel):
+        return value.model_copy()
+    return value
+
+
+class QueryCache:
+    """Repository results keyed by (method, params) and tagged with table versions.
+
+    table_versions is bumped by a statement trigger on every write to a tracked table
+    (migration 003: banks, credit_cards and card_spending_category). A lookup reads the current versions of the tables the
+    method depends on, a single primary key query, and only runs the real query when
+    those versions differ from the ones the entry was stored with. Versions are read
+    before the query, so a write that lands in between leaves the entry already stale
+    rather than wrongly fresh.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[int, ...], Any]]" = OrderedDict()
+
+    def get_or_load(self, conn: psycopg.Connection, key: Hashable, tables: Tuple[str, ...],
+                    load: Callable[[], T]) -> T:
+        """Cached result for key if none of its tables changed, otherwise load() and store it"""
+        versions = self.table_versions(conn, tables)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy(entry[1])
+            self.misses += 1
+
+        result = load()
+        with self._lock:
+            self._entries[key] = (versions, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return _copy(result)
+
+    @staticmethod
+    def table_versions(conn: psycopg.Connection, tables: Tuple[str, ...]) -> Tuple[int, ...]:
+        """Current version of each table, in the order given. Untracked tables read as -1"""
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT table_name, version FROM table_versions WHERE table_name = ANY(%s)
+            """, (list(tables),))
+            found = dict(cur.fetchall())
+        return tuple(found.get(table, -1) for table in tables)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or every entry when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
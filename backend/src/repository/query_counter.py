@@ -0,0 +1,68 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional
+import psycopg
+from src.repository import instrumentation
+
+
+def _statement_text(query: Any) -> str:
+    if isinstance(query, bytes):
+        return query.decode(errors="replace")
+    if isinstance(query, str):
+        return query
+    try:
+        return query.as_string(None)
+    except Exception:
+        return repr(query)
+
+
+class QueryCounter:
+    """Counts what repositories send to the database while it is active.
+
+    queries counts statements (an executemany of ten rows is ten). round_trips counts
+    calls that wait on the server: each execute or executemany, plus each connection
+    opened. Every statement's SQL is kept so a failed budget can show what ran.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.round_trips = 0
+        self.connections = 0
+        self.statements: List[str] = []
+
+    def on_connect(self, elapsed: float) -> None:
+        with self._lock:
+            self.connections += 1
+            self.round_trips += 1
+
+    def on_query(self, cursor: psycopg.Cursor, query: Any, params: Any, elapsed: float, statements: int,
+                 error: Optional[BaseException]) -> None:
+        text = " ".join(_statement_text(query).split())
+        with self._lock:
+            self.queries += statements
+            self.round_trips += 1
+            self.statements.append(text)
+
+    def __enter__(self) -> "QueryCounter":
+        instrumentation.add_listener(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        instrumentation.remove_listener(self)
+
+    def report(self) -> str:
+        lines = [f"{self.queries} queries, {self.round_trips} round trips, {self.connections} connections:"]
+        lines.extend(f"  {index + 1}. {statement}" for index, statement in enumerate(self.statements))
+        return "\n".join(lines)
+
+
+@contextmanager
+def query_budget(max_queries: Optional[int] = None, max_round_trips: Optional[int] = None) -> Iterator[QueryCounter]:
+    """Fail with an AssertionError if the block issues more queries or round trips than allowed"""
+    with QueryCounter() as counter:
+        yield counter
+    if max_queries is not None and counter.queries > max_queries:
+        raise AssertionError(f"Query budget of {max_queries} exceeded. {counter.report()}")
+    if max_round_trips is not None and counter.round_trips > max_round_trips:
+        raise AssertionError(f"Round trip budget of {max_round_trips} exceeded. {counter.report()}")
@@ -0,0 +1,127 @@
+import json
+import logging
+import re
+import threading
+import psycopg
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from time import monotonic
+from typing import Any, Dict, Optional
+from psycopg import sql
+
+# Statements that get a plan, and those of them that may be run again under EXPLAIN ANALYZE
+EXPLAINABLE = ("select", "with", "values", "table", "insert", "update", "delete", "merge")
+ANALYZABLE = ("select", "with", "values", "table")
+# A data-modifying CTE, a locking read (FOR UPDATE) or a sequence call would repeat its
+# writes, row locks or nextval under ANALYZE, so statements mentioning these are only planned
+_WRITES = re.compile(r"\b(insert|update|delete|merge|nextval|setval)\b")
+
+
+def explain_mode(text: str) -> Optional[str]:
+    """"analyze" for statements that only read, "plan" for other explainable ones, else None"""
+    lowered = text.lstrip().lower()
+    if not lowered.startswith(EXPLAINABLE):
+        return None
+    if lowered.startswith(ANALYZABLE) and not _WRITES.search(lowered):
+        return "analyze"
+    return "plan"
+
+
+def _query_text(query: Any) -> str:
+    if isinstance(query, bytes):
+        return query.decode(errors="replace")
+    if isinstance(query, str):
+        return query
+    try:
+        return query.as_string(None)
+    except Exception:
+        return repr(query)
+
+
+def redact(params: Any) -> Any:
+    """Parameters with every value replaced by its type name, so no user data reaches the log"""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {name: type(value).__name__ for name, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+class SlowQueryLog:
+    """Writes repository statements slower than threshold seconds to a rotating log file.
+
+    Each entry is one JSON line with the SQL, redacted parameters, timing and a plan.
+    Read-only statements get EXPLAIN (ANALYZE, BUFFERS), which re-runs them inside a
+    transaction that is always rolled back. Writes, including SELECTs with a
+    data-modifying CTE or FOR UPDATE, only get a plain EXPLAIN, since a rollback does not
+    undo sequence calls and the re-run would take the row locks again. The same
+    statement is explained at most once per explain_interval seconds so a slow query
+    does not double its own cost.
+    Register it with instrumentation.add_listener.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.2, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 explain: bool = True, explain_interval: float = 60.0):
+        self.threshold = threshold
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self._lock = threading.Lock()
+        self._explained: Dict[str, float] = {}
+        self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._log = logging.Logger(f"{__name__}.{path}")
+        self._log.addHandler(self._handler)
+
+    def on_connect(self, elapsed: float) -> None:
+        pass
+
+    def on_query(self, cursor: psycopg.Cursor, query: Any, params: Any, elapsed: float, statements: int,
+                 error: Optional[BaseException]) -> None:
+        if elapsed < self.threshold:
+            return
+        text = " ".join(_query_text(query).split())
+        entry: Dict[str, Any] = {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "sql": text,
+        }
+        if statements == 1:
+            entry["params"] = redact(params)
+        else:
+            entry["rows"] = statements
+        if error is not None:
+            entry["error"] = type(error).__name__
+        elif statements == 1 and self._should_explain(text):
+            analyze = explain_mode(text) == "analyze"
+            entry["analyzed"] = analyze
+            try:
+                entry["plan"] = self._explain(cursor.connection, query, params, analyze)
+            except Exception as failure:
+                entry["explain_error"] = str(failure)
+        self._log.warning(json.dumps(entry))
+
+    def _should_explain(self, text: str) -> bool:
+        if not self.explain or explain_mode(text) is None:
+            return False
+        now = monotonic()
+        with self._lock:
+            last = self._explained.get(text)
+            if last is not None and now - last < self.explain_interval:
+                return False
+            self._explained[text] = now
+            return True
+
+    def _explain(self, conn: psycopg.Connection, query: Any, params: Any, analyze: bool = True) -> str:
+        if isinstance(query, bytes):
+            query = query.decode()
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+        explain_query = prefix + query if isinstance(query, str) else sql.Composed([sql.SQL(prefix), query])
+        # A plain cursor, so the EXPLAIN is not itself reported to the query listeners
+        with conn.transaction(force_rollback=True):
+            with psycopg.Cursor(conn) as cur:
+                cur.execute(explain_query, params)
+                return "\n".join(row[0] for row in cur.fetchall())
+
+    def close(self) -> None:
+        self._log.removeHandler(self._handler)
+        self._handler.close()
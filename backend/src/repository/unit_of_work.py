@@ -0,0 +1,47 @@
+import psycopg
+from contextlib import ExitStack
+from typing import Optional
+from src.repository import adapters
+from src.repository.authorized_user_repository import AuthorizedUserRepository
+from src.repository.bank_repository import BankRepository
+from src.repository.card_repository import CardRepository
+from src.repository.user_repository import UserRepository
+from src.settings import get_settings
+
+class UnitOfWork:
+    """One connection and one transaction shared by every repository used inside it.
+
+    with UnitOfWork() as uow:
+        card = uow.cards.create_card(card)
+        uow.cards.add_spending_categories([...])
+
+    Everything commits together when the block exits, or rolls back if it raises.
+    With pipeline=True statements are pipelined, so writes that don't need each
+    other's results go out in one burst. COPY and server-side cursors (sync_catalog,
+    the iter_* exports) can't run in pipeline mode; use pipeline=False for those.
+    """
+
+    def __init__(self, database_url=None, pipeline: bool = True):
+        self.database_url = database_url or get_settings().database_url
+        self.pipeline = pipeline
+        self.connection: Optional[psycopg.Connection] = None
+        self._stack: Optional[ExitStack] = None
+
+    def __enter__(self) -> "UnitOfWork":
+        with ExitStack() as stack:
+            self.connection = stack.enter_context(adapters.connect(self.database_url))
+            stack.enter_context(self.connection.transaction())
+            if self.pipeline:
+                stack.enter_context(self.connection.pipeline())
+            self._stack = stack.pop_all()
+
+        self.cards = CardRepository(connection=self.connection)
+        self.banks = BankRepository(connection=self.connection)
+        self.users = UserRepository(connection=self.connection)
+        self.authorized_users = AuthorizedUserRepository(connection=self.connection)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        stack, self._stack = self._stack, None
+        self.connection = None
+        return stack.__exit__(exc_type, exc, tb)
@@ -1,19 +1,18 @@
 import psycopg
-from typing import Optional, List
-from src.model.user import User, SpendingCategoryUser, AuthorizedUserInfo
-import os
-from dotenv import load_dotenv
+from typing import Any, Dict, Iterator, Optional, List, Tuple
+from src.model.batch import UserSpendBatch
+from src.model.card import Bank
+from src.model.user import (User, SpendingCategoryUser, AuthorizedUserInfo, UserProfile, AnonymisedUser,
+                            SpendAggregate, INCOME_BAND_WIDTH)
+from src.model.enums import SpendingCategory
+from src.repository.base import BaseRepository
 
-load_dotenv()
 
-class UserRepository:
+class UserRepository(BaseRepository):
 
-    def __init__(self, database_url=None):
-        self.database_url = database_url or os.getenv("DATABASE_URL")
-    
     def create_user(self, user: User) -> User:
         """Create new user and return with ID"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
                 with conn.cursor() as cur:
                     cur.execute(
                         """
@@ -26,12 +25,12 @@ class UserRepository:
                     user.id = result[0]
                     user.created_at = result[1]
                     
-                    conn.commit()
+                    self._commit(conn)
                     return user
         
     def get_user_by_id(self, user_id: int) -> Optional[User]:
-        """Get user with all spending categories"""
-        with psycopg.connect(self.database_url) as conn:
+        """Get the users row only. Use get_user_profile for spending, AU info and banks"""
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                 SELECT * FROM users WHERE id=%s """, (user_id,))
@@ -50,39 +49,63 @@ class UserRepository:
                     created_at= user_row[5]
                 )
 
-                conn.commit()
+                self._commit(conn)
 
                 return user
 
         
     def update_user(self, user_data: User) -> User:
         """Update user info (income, credit score, etc.)"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     """UPDATE users SET name=%s, email=%s, credit_score=%s, annual_income=%s
-                    WHERE id=%s""", (user_data.name, user_data.email, user_data.credit_score, 
+                    WHERE id=%s RETURNING *""", (user_data.name, user_data.email, user_data.credit_score, 
                     user_data.annual_income, user_data.id))
         
-                updated_row = cur.rowcount
+                user_row = cur.fetchone()
 
-                conn.commit()
+                self._commit(conn)
 
-                if not updated_row:
+                if not user_row:
                     return None
 
-                return self.get_user_by_id(user_data.id)
+                return User(
+                    id = user_row[0],
+                    name = user_row[1],
+                    email = user_row[2],
+                    credit_score= user_row[3],
+                    annual_income= user_row[4],
+                    created_at= user_row[5]
+                )
+
+    def patch_user(self, user_id: int, changes: Dict[str, Any]) -> Optional[User]:
+        """Update only the given fields and return the fresh user in one round trip"""
+        user_row = self._patch_row("users", user_id, changes, User,
+                                   ("name", "email", "credit_score", "annual_income"))
+
+        if not user_row:
+            return None
+
+        return User(
+            id = user_row[0],
+            name = user_row[1],
+            email = user_row[2],
+            credit_score= user_row[3],
+            annual_income= user_row[4],
+            created_at= user_row[5]
+        )
 
         
     def delete_user(self, user_id: int) -> bool:
         """Soft delete or hard delete user"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""DELETE FROM users WHERE id=%s""", (user_id,))
 
                 deleted_user = cur.rowcount
 
-                conn.commit()
+                self._commit(conn)
 
                 if(deleted_user):
                     return True
@@ -91,11 +114,13 @@ class UserRepository:
         
     def add_spending_category(self, spending: SpendingCategoryUser) -> SpendingCategoryUser:
         """Add or update a spending category"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                             INSERT INTO user_spending_category (user_id, category, user_spend)
-                            VALUES (%s, %s, %s) RETURNING id, created_at
+                            VALUES (%s, %s, %s)
+                            ON CONFLICT (user_id, category) DO UPDATE SET user_spend = EXCLUDED.user_spend
+                            RETURNING id, created_at
                             """, (spending.user_id, spending.category, spending.user_spend)
                             )
                 
@@ -105,7 +130,7 @@ class UserRepository:
                 spending.id = spending_row[0]
                 spending.created_at = spending_row[1]
 
-                conn.commit()
+                self._commit(conn)
 
                 if(added_category):
                     return spending
@@ -113,9 +138,115 @@ class UserRepository:
                     return None
                 
 
+    def add_spending_categories(self, spendings: List[SpendingCategoryUser]) -> List[SpendingCategoryUser]:
+        """Add or update several spending categories in one batch and return them with IDs"""
+        if not spendings:
+            return []
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.executemany("""
+                            INSERT INTO user_spending_category (user_id, category, user_spend)
+                            VALUES (%s, %s, %s)
+                            ON CONFLICT (user_id, category) DO UPDATE SET user_spend = EXCLUDED.user_spend
+                            RETURNING id, created_at
+                            """, [(spending.user_id, spending.category, spending.user_spend)
+                                  for spending in spendings], returning=True)
+
+                for spending in spendings:
+                    spending_row = cur.fetchone()
+                    spending.id = spending_row[0]
+                    spending.created_at = spending_row[1]
+                    cur.nextset()
+
+                self._commit(conn)
+
+                return spendings
+
+    def set_spending_profile(self, user_id: int, profile: Dict[SpendingCategory, float]) -> List[SpendingCategoryUser]:
+        """Replace a user's spend per category in one statement and return the new rows.
+
+        Categories in the profile are inserted or updated, categories left out are removed.
+        """
+        return self.set_spending_profiles({user_id: profile}).get(user_id, [])
+
+    def set_spending_profiles(self, profiles: Dict[int, Dict[SpendingCategory, float]]) -> Dict[int, List[SpendingCategoryUser]]:
+        """Replace the spend profiles of many users in one statement, keyed by user ID"""
+        if not profiles:
+            return {}
+
+        user_ids, categories, spends = [], [], []
+        for user_id, profile in profiles.items():
+            for category, spend in profile.items():
+                user_ids.append(user_id)
+                categories.append(SpendingCategory(category).value)
+                spends.append(round(spend))
+
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                            WITH desired AS (
+                                SELECT * FROM unnest(%s::integer[], %s::spending_category[], %s::integer[])
+                                    AS d(user_id, category, user_spend)
+                            ), removed AS (
+                                DELETE FROM user_spending_category usc
+                                WHERE usc.user_id = ANY(%s::integer[])
+                                  AND NOT EXISTS (
+                                      SELECT 1 FROM desired d
+                                      WHERE d.user_id = usc.user_id AND d.category = usc.category
+                                  )
+                            ), upserted AS (
+                                INSERT INTO user_spending_category (user_id, category, user_spend)
+                                SELECT user_id, category, user_spend FROM desired
+                                ON CONFLICT (user_id, category) DO UPDATE SET user_spend = EXCLUDED.user_spend
+                                RETURNING id, user_id, category, user_spend, created_at
+                            )
+                            SELECT * FROM upserted ORDER BY user_id, id
+                            """, (user_ids, categories, spends, list(profiles)))
+
+                spending_rows = cur.fetchall()
+                self._commit(conn)
+
+                result: Dict[int, List[SpendingCategoryUser]] = {user_id: [] for user_id in profiles}
+                for row in spending_rows:
+                    result[row[1]].append(SpendingCategoryUser(
+                        id=row[0],
+                        user_id=row[1],
+                        category=row[2],
+                        user_spend=row[3],
+                        created_at=row[4]
+                    ))
+                return result
+
+    def bulk_upsert_spending(self, rows: List[Tuple[int, SpendingCategory, float]], increment: bool = False) -> int:
+        """Write many (user_id, category, spend) rows in one statement. Returns rows written.
+
+        With increment=True the spend is added to the stored value instead of replacing it.
+        """
+        if not rows:
+            return 0
+
+        if increment:
+            assignment = "user_spend = user_spending_category.user_spend + EXCLUDED.user_spend"
+        else:
+            assignment = "user_spend = EXCLUDED.user_spend"
+
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"""
+                            INSERT INTO user_spending_category (user_id, category, user_spend)
+                            SELECT * FROM unnest(%s::integer[], %s::spending_category[], %s::integer[])
+                            ON CONFLICT (user_id, category) DO UPDATE SET {assignment}
+                            """, ([row[0] for row in rows],
+                                  [SpendingCategory(row[1]).value for row in rows],
+                                  [round(row[2]) for row in rows]))
+
+                written = cur.rowcount
+                self._commit(conn)
+                return written
+
     def remove_spending_category_by_id(self, user_category_id: int) -> bool:
         """Remove a spending category"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                             DELETE FROM user_spending_category
@@ -124,7 +255,7 @@ class UserRepository:
                 
                 deleted_category = cur.rowcount
 
-                conn.commit()
+                self._commit(conn)
 
                 if(deleted_category):
                     return True
@@ -133,7 +264,7 @@ class UserRepository:
 
     def add_authorized_user_info(self, au_info: AuthorizedUserInfo) -> AuthorizedUserInfo:
         """add authorized user info"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:   
 
                 cur.execute("""
@@ -145,14 +276,14 @@ class UserRepository:
 
                 au_info.id = inserted_row[0]
 
-                conn.commit()
+                self._commit(conn)
 
                 return au_info
                 
         
     def delete_authorized_user_info(self, au_id: int) -> bool:
         """delete authorized user info"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                             DELETE FROM authorized_user_info
@@ -160,14 +291,14 @@ class UserRepository:
                             """, (au_id,))
                 
                 deleted_info = cur.rowcount
-                conn.commit()
+                self._commit(conn)
                 if(deleted_info):
                     return True
                 else:
                     return False
     def get_spending_categories_by_user(self, user_id) -> List[SpendingCategoryUser]:
         """Get spending category by a given user id"""
-        with psycopg.connect(self.database_url) as conn:
+        with self._connect() as conn:
             with conn.cursor() as cur:
                 cur.execute("""
                             SELECT * FROM user_spending_category WHERE user_id=%s ORDER BY id
@@ -181,9 +312,140 @@ class UserRepository:
                     user_spend=row[3],
                     created_at=row[4]
                 ) for row in retrieved_info]
-                conn.commit()
+                self._commit(conn)
                 if(retrieved_info):
                     return return_list
                 else:
                     return []
-            
\ No newline at end of file
+
+    def get_spending_batch(self, user_ids: Optional[List[int]] = None) -> UserSpendBatch:
+        """Spending categories of the given users, or of everyone, as a UserSpendBatch ordered by user"""
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                if user_ids is None:
+                    cur.execute("SELECT * FROM user_spending_category ORDER BY user_id, id")
+                else:
+                    cur.execute("""
+                        SELECT * FROM user_spending_category WHERE user_id = ANY(%s) ORDER BY user_id, id
+                    """, (user_ids,))
+                return UserSpendBatch.from_rows(cur)
+
+    def get_users_by_ids(self, user_ids: List[int]) -> List[User]:
+        """Get many users by ID in one query, ordered by ID. Unknown IDs are skipped"""
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT * FROM users WHERE id = ANY(%s) ORDER BY id
+                """, (list(user_ids),))
+
+                user_rows = cur.fetchall()
+
+                return [
+                    User(
+                        id=row[0],
+                        name=row[1],
+                        email=row[2],
+                        credit_score=row[3],
+                        annual_income=row[4],
+                        created_at=row[5]
+                    ) for row in user_rows
+                ]
+
+    def get_user_profile(self, user_id: int) -> Optional[UserProfile]:
+        """Get a user with spending categories, AU info and referenced banks in one query"""
+        return self.get_user_profiles([user_id]).get(user_id)
+
+    def get_user_profiles(self, user_ids: List[int]) -> Dict[int, UserProfile]:
+        """Get profiles for many users in one query, keyed by user ID. Missing users are left out"""
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT u.id, u.name, u.email, u.credit_score, u.annual_income, u.created_at,
+                           COALESCE(spending.items, '[]'::json),
+                           COALESCE(au.items, '[]'::json),
+                           COALESCE(au_banks.items, '[]'::json)
+                    FROM users u
+                    LEFT JOIN LATERAL (
+                        SELECT json_agg(usc ORDER BY usc.id) AS items
+                        FROM user_spending_category usc
+                        WHERE usc.user_id = u.id
+                    ) spending ON TRUE
+                    LEFT JOIN LATERAL (
+                        SELECT json_agg(aui ORDER BY aui.created_at DESC, aui.id DESC) AS items
+                        FROM authorized_user_info aui
+                        WHERE aui.user_id = u.id
+                    ) au ON TRUE
+                    LEFT JOIN LATERAL (
+                        SELECT json_agg(b ORDER BY b.name) AS items
+                        FROM banks b
+                        WHERE b.id IN (SELECT bank_id FROM authorized_user_info WHERE user_id = u.id)
+                    ) au_banks ON TRUE
+                    WHERE u.id = ANY(%s)
+                """, (list(user_ids),))
+
+                profile_rows = cur.fetchall()
+
+                return {
+                    row[0]: UserProfile(
+                        user=User(
+                            id=row[0],
+                            name=row[1],
+                            email=row[2],
+                            credit_score=row[3],
+                            annual_income=row[4],
+                            created_at=row[5]
+                        ),
+                        spending_categories=[SpendingCategoryUser(**item) for item in row[6]],
+                        authorized_user_info=[AuthorizedUserInfo(**item) for item in row[7]],
+                        banks=[Bank(**item) for item in row[8]]
+                    ) for row in profile_rows
+                }
+
+    def iter_anonymised_users(self, batch_size: int = 1000) -> Iterator[AnonymisedUser]:
+        """Stream every user without identifiers through a server-side cursor.
+
+        Income is reduced to the lower bound of its INCOME_BAND_WIDTH band and the sign-up
+        time to the first day of its month. Rows are ordered by those exported columns only,
+        so their position says nothing about the user's ID.
+        """
+        with self._connect() as conn:
+            with conn.cursor(name="user_export") as cur:
+                cur.itersize = batch_size
+                cur.execute("""
+                    SELECT credit_score,
+                           floor(annual_income / %(width)s::float8)::int * %(width)s AS income_band,
+                           date_trunc('month', created_at)::date AS joined_month
+                    FROM users
+                    ORDER BY joined_month, credit_score, income_band
+                """, {"width": INCOME_BAND_WIDTH})
+
+                for row in cur:
+                    yield AnonymisedUser(
+                        credit_score=row[0],
+                        income_band=row[1],
+                        joined_month=row[2]
+                    )
+
+    def iter_spend_aggregates(self, min_group_size: int = 5, batch_size: int = 1000) -> Iterator[SpendAggregate]:
+        """Stream spend totals per category and credit score. Groups smaller than min_group_size are left out"""
+        with self._connect() as conn:
+            with conn.cursor(name="spend_export") as cur:
+                cur.itersize = batch_size
+                cur.execute("""
+                    SELECT usc.category, u.credit_score, COUNT(DISTINCT usc.user_id),
+                           SUM(usc.user_spend), AVG(usc.user_spend)::float8
+                    FROM user_spending_category usc
+                    JOIN users u ON u.id = usc.user_id
+                    GROUP BY usc.category, u.credit_score
+                    HAVING COUNT(DISTINCT usc.user_id) >= %s
+                    ORDER BY usc.category, u.credit_score
+                """, (min_group_size,))
+
+                for row in cur:
+                    yield SpendAggregate(
+                        category=row[0],
+                        credit_score=row[1],
+                        user_count=row[2],
+                        total_spend=row[3],
+                        average_spend=row[4]
+                    )
@@ -0,0 +1,166 @@
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from typing import List, Optional, Sequence, Tuple, Union
+from src.model.card import Card
+from src.service.scoring import CATEGORIES, CatalogMatrix
+
+# magic, layout version, categories per row, catalog version, card rows, card JSON length
+HEADER = struct.Struct("<8sIIqqq")
+MAGIC = b"CCRCATLG"
+LAYOUT_VERSION = 2
+
+# (attribute, typecode, whether it holds one value per category instead of one per card)
+SECTIONS = (
+    ("card_ids", "q", False),
+    ("annual_fees", "d", False),
+    ("point_values", "d", False),
+    ("base_rates", "d", False),
+    ("rates", "d", True),
+    ("caps", "d", True),
+    ("rotating", "b", True),
+    ("card_types", "b", False),
+)
+ITEM_SIZES = {"q": 8, "d": 8, "b": 1}
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def _layout(rows: int, width: int) -> List[Tuple[str, str, int, int]]:
+    """(attribute, typecode, byte offset, item count) for each array after the header.
+
+    The last entry is card_offsets: where each card's JSON starts in the card section,
+    plus its end, so any card can be found without reading the others.
+    """
+    layout = []
+    offset = _aligned(HEADER.size)
+    for attribute, typecode, per_category in SECTIONS:
+        count = rows * width if per_category else rows
+        layout.append((attribute, typecode, offset, count))
+        offset += _aligned(count * ITEM_SIZES[typecode])
+    layout.append(("card_offsets", "q", offset, rows + 1))
+    return layout
+
+
+def _cards_start(layout: List[Tuple[str, str, int, int]]) -> int:
+    _, typecode, offset, count = layout[-1]
+    return offset + _aligned(count * ITEM_SIZES[typecode])
+
+
+class MappedCards(Sequence[Card]):
+    """The cards of a mapped snapshot, each decoded from its own JSON only when indexed.
+
+    Nothing is decoded up front and nothing is kept, so attaching costs the same for any
+    catalog size and the cards stay in the shared pages rather than in each worker.
+    """
+
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Card, List[Card]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("card index out of range")
+        return Card.model_validate_json(bytes(self._data[self._offsets[index]:self._offsets[index + 1]]))
+
+
+def publish_catalog(path: str, matrix: CatalogMatrix, cards: List[Card]) -> int:
+    """Write a catalog snapshot file and atomically swap it in. Returns its size in bytes.
+
+    The new file replaces the old one by rename, so workers still mapped to the previous
+    snapshot keep reading it undisturbed until they remap.
+    """
+    rows, width = len(matrix), len(CATEGORIES)
+    encoded = [card.model_dump_json().encode() for card in cards]
+    card_offsets = array('q', [0])
+    for card_json in encoded:
+        card_offsets.append(card_offsets[-1] + len(card_json))
+    layout = _layout(rows, width)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".catalog-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(HEADER.pack(MAGIC, LAYOUT_VERSION, width, matrix.version, rows, card_offsets[-1]))
+            for attribute, typecode, offset, count in layout:
+                handle.seek(offset)
+                source = card_offsets if attribute == "card_offsets" else getattr(matrix, attribute)
+                data = memoryview(source).cast("B")
+                if len(data) != count * ITEM_SIZES[typecode]:
+                    raise ValueError(f"Catalog matrix {attribute} has the wrong length")
+                handle.write(data)
+            handle.seek(_cards_start(layout))
+            handle.writelines(encoded)
+            size = handle.tell()
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return size
+
+
+def attach_catalog(path: str) -> Tuple[CatalogMatrix, MappedCards]:
+    """Map a snapshot file and return a CatalogMatrix and cards viewing it without copying"""
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, layout_version, width, version, rows, cards_length = HEADER.unpack_from(mapped)
+    if magic != MAGIC or layout_version != LAYOUT_VERSION:
+        raise ValueError(f"{path} is not a catalog snapshot this version can read")
+    if width != len(CATEGORIES):
+        raise ValueError(f"{path} was written for {width} spending categories, expected {len(CATEGORIES)}")
+
+    view = memoryview(mapped)
+    layout = _layout(rows, width)
+    arrays = {}
+    for attribute, typecode, offset, count in layout:
+        arrays[attribute] = view[offset:offset + count * ITEM_SIZES[typecode]].cast(typecode)
+    cards_start = _cards_start(layout)
+    cards = MappedCards(arrays.pop("card_offsets"), view[cards_start:cards_start + cards_length])
+
+    return CatalogMatrix(version=version, **arrays), cards
+
+
+class CatalogSnapshotReader:
+    """A worker's view of the published catalog snapshot.
+
+    current() costs one stat() when nothing changed. When the loader has published a new
+    file it is mapped and handed out instead; the old mapping is released once nothing
+    refers to its arrays any more. Every worker maps the same pages, matrix and card JSON
+    alike, so memory does not grow with the number of workers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file_id: Optional[Tuple[int, int, int]] = None
+        self._catalog: Optional[Tuple[CatalogMatrix, MappedCards]] = None
+
+    def current(self) -> Tuple[CatalogMatrix, MappedCards]:
+        """The latest published matrix and cards, remapping if the snapshot changed"""
+        stat = os.stat(self.path)
+        file_id = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        catalog = self._catalog
+        if catalog is not None and file_id == self._file_id:
+            return catalog
+
+        with self._lock:
+            if self._catalog is None or file_id != self._file_id:
+                self._catalog = attach_catalog(self.path)
+                self._file_id = file_id
+            return self._catalog
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Callable, Dict, Generic, Hashable, Iterable, List, Optional, Set, TypeVar
+from starlette.concurrency import run_in_threadpool
+from src.model.card import Bank
+from src.repository.protocols import BankStore
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """Batches and memoizes lookups by key for the lifetime of one request.
+
+    Every load() made before the event loop gets back to this loader is collected and
+    sent to batch_load as one list. batch_load is a blocking function that returns a
+    dict of the keys it found; it runs in the threadpool. Keys it leaves out resolve
+    to None. Results stay memoized, so a key is fetched at most once per loader.
+    """
+
+    def __init__(self, batch_load: Callable[[List[K]], Dict[K, V]], max_batch_size: int = 500):
+        self.batch_load = batch_load
+        self.max_batch_size = max_batch_size
+        self._futures: Dict[K, asyncio.Future] = {}
+        self._pending: List[K] = []
+        self._tasks: Set[asyncio.Task] = set()
+
+    def load(self, key: K) -> "asyncio.Future[Optional[V]]":
+        """Future for the value of key, fetched with every other key requested in this tick"""
+        future = self._futures.get(key)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[key] = future
+        self._pending.append(key)
+        if len(self._pending) == 1:
+            loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+        """Values for several keys, in the order asked for"""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: K, value: V) -> None:
+        """Seed the memo with a value that is already known"""
+        if key in self._futures:
+            return
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._futures[key] = future
+
+    def clear(self, key: K) -> None:
+        """Forget a memoized key, e.g. after writing to it"""
+        self._futures.pop(key, None)
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.max_batch_size):
+            task = asyncio.ensure_future(self._load_batch(pending[start:start + self.max_batch_size]))
+            # The loop only keeps weak references to tasks
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, keys: List[K]) -> None:
+        try:
+            results = await run_in_threadpool(self.batch_load, keys)
+        except Exception as error:
+            for key in keys:
+                # Drop failed keys so a later load can retry them
+                future = self._futures.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(error)
+            return
+
+        for key in keys:
+            future = self._futures.get(key)
+            if future is not None and not future.done():
+                future.set_result(results.get(key))
+
+
+class RepositoryLoaders:
+    """The DataLoaders for one request, one per entity looked up by ID"""
+
+    def __init__(self, bank_repo: BankStore):
+        self.banks: DataLoader[int, Bank] = DataLoader(
+            lambda ids: {bank.id: bank for bank in bank_repo.get_banks_by_ids(ids)}
+        )
@@ -0,0 +1,86 @@
+import csv
+import io
+from typing import Iterable, Iterator, List, Optional, Type
+from pydantic import BaseModel
+from src.model.card import Card
+from src.model.user import AnonymisedUser, SpendAggregate
+from src.repository.card_repository import CardRepository
+from src.repository.protocols import CardStore, UserStore
+from src.repository.user_repository import UserRepository
+
+EXPORT_MODELS = {
+    "cards": Card,
+    "users": AnonymisedUser,
+    "spend": SpendAggregate,
+}
+EXPORT_FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Rows are buffered into chunks of roughly this many bytes before being handed on
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def iter_ndjson(rows: Iterable[BaseModel], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Encode models as newline-delimited JSON, yielding bounded chunks"""
+    buffer = bytearray()
+    for row in rows:
+        buffer += row.model_dump_json().encode()
+        buffer += b"\n"
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def iter_csv(rows: Iterable[BaseModel], fields: List[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Encode models as CSV with a header row, yielding bounded chunks"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        data = row.model_dump(mode="json")
+        writer.writerow(["" if data[field] is None else data[field] for field in fields])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class ExportService:
+    """Streams whole tables to partners without holding them in memory.
+
+    Rows come from server-side cursors and are encoded as they are consumed, so a slow
+    reader slows the database read down instead of piling rows up in memory.
+    """
+
+    def __init__(self, card_repo: Optional[CardStore] = None, user_repo: Optional[UserStore] = None):
+        self.card_repo: CardStore = card_repo or CardRepository()
+        self.user_repo: UserStore = user_repo or UserRepository()
+
+    def rows(self, dataset: str) -> Iterator[BaseModel]:
+        if dataset == "cards":
+            return self.card_repo.iter_all_cards()
+        if dataset == "users":
+            return self.user_repo.iter_anonymised_users()
+        if dataset == "spend":
+            return self.user_repo.iter_spend_aggregates()
+        raise ValueError(f"Unknown export dataset: {dataset}")
+
+    def stream(self, dataset: str, export_format: str = "ndjson",
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Encoded chunks of a dataset in the requested format"""
+        if dataset not in EXPORT_MODELS:
+            raise ValueError(f"Unknown export dataset: {dataset}")
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}")
+        model: Type[BaseModel] = EXPORT_MODELS[dataset]
+        rows = self.rows(dataset)
+        if export_format == "csv":
+            return iter_csv(rows, list(model.model_fields), chunk_size)
+        return iter_ndjson(rows, chunk_size)
@@ -0,0 +1,96 @@
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+from src.model.card import Card
+from src.model.recommendation import CardRecommendation
+from src.model.user import User, SpendingCategoryUser
+from src.repository.bank_repository import BankRepository
+from src.repository.card_repository import CardRepository
+from src.repository.protocols import BankStore, CardStore, UserStore
+from src.repository.user_repository import UserRepository
+from src.service.catalog_snapshot import CatalogSnapshotReader
+from src.service.scoring import (CatalogMatrix, annual_spend_vector, build_catalog_matrix,
+                                 eligible_rows, score_card)
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationService:
+    """Ranks cards for a user by estimated yearly rewards net of the annual fee.
+
+    With a snapshot reader the catalog comes from the shared snapshot published by
+    `python -m src.cli publish-catalog` instead of being loaded by this process. Until
+    a snapshot has been published the catalog is loaded from the repositories, which
+    may be any CardStore, BankStore and UserStore, such as the in-memory ones.
+    """
+
+    def __init__(self, card_repo: Optional[CardStore] = None, bank_repo: Optional[BankStore] = None,
+                 user_repo: Optional[UserStore] = None, snapshot: Optional[CatalogSnapshotReader] = None):
+        self.card_repo: CardStore = card_repo or CardRepository()
+        self.bank_repo: BankStore = bank_repo or BankRepository()
+        self.user_repo: UserStore = user_repo or UserRepository()
+        self.snapshot = snapshot
+        self._lock = threading.Lock()
+        self._catalog: Optional[Tuple[CatalogMatrix, Sequence[Card]]] = None
+        self._snapshot_missing = False
+
+    def get_catalog(self) -> Tuple[CatalogMatrix, Sequence[Card]]:
+        """Return the scoring matrix and its cards, rebuilding only when the catalog version moved"""
+        if self.snapshot is not None:
+            try:
+                catalog = self.snapshot.current()
+                self._snapshot_missing = False
+                return catalog
+            except FileNotFoundError:
+                if not self._snapshot_missing:
+                    logger.warning("No catalog snapshot at %s yet, loading the catalog from the database",
+                                   self.snapshot.path)
+                    self._snapshot_missing = True
+
+        version = self.card_repo.get_catalog_version()
+        catalog = self._catalog
+        if catalog is not None and catalog[0].version == version:
+            return catalog
+
+        with self._lock:
+            if self._catalog is not None and self._catalog[0].version == version:
+                return self._catalog
+            self._catalog = self.load_catalog(version)
+            return self._catalog
+
+    def load_catalog(self, version: int) -> Tuple[CatalogMatrix, List[Card]]:
+        """Read the catalog from the database and build its scoring matrix"""
+        cards = self.card_repo.get_all_cards()
+        categories = self.card_repo.get_spending_categories_for_cards([card.id for card in cards])
+        banks = self.bank_repo.get_all_banks()
+        return build_catalog_matrix(cards, categories, banks, version=version), cards
+
+    def recommend(self, user: User, spending: List[SpendingCategoryUser], limit: int = 10) -> List[CardRecommendation]:
+        """Score every eligible card against a user's monthly spend and return the best ones"""
+        matrix, cards = self.get_catalog()
+
+        monthly_spend: Dict = {}
+        for entry in spending:
+            monthly_spend[entry.category] = monthly_spend.get(entry.category, 0) + entry.user_spend
+        annual_spend = annual_spend_vector(monthly_spend)
+
+        scored = []
+        for row in eligible_rows(matrix, user.credit_score):
+            rewards = score_card(matrix, row, annual_spend)
+            scored.append((rewards - matrix.annual_fees[row], rewards, row))
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        return [
+            CardRecommendation(
+                card=cards[row],
+                estimated_annual_rewards=round(rewards, 2),
+                net_annual_value=round(net, 2)
+            ) for net, rewards, row in scored[:limit]
+        ]
+
+    def recommend_for_user(self, user_id: int, limit: int = 10) -> Optional[List[CardRecommendation]]:
+        """Recommend cards for a stored user. Returns None if the user does not exist"""
+        profile = self.user_repo.get_user_profile(user_id)
+        if profile is None:
+            return None
+        return self.recommend(profile.user, profile.spending_categories, limit)
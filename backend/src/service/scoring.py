@@ -0,0 +1,187 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from src.model.card import Bank, Card, SpendingCategoryInfo
+from src.model.enums import CardType, CreditScoreRating, RewardStructure, SpendingCategory
+
+CATEGORIES = list(SpendingCategory)
+CATEGORY_INDEX = {category: index for index, category in enumerate(CATEGORIES)}
+CARD_TYPES = list(CardType)
+CARD_TYPE_INDEX = {card_type: index for index, card_type in enumerate(CARD_TYPES)}
+
+# Cards earn this many points (or percent back) per dollar outside their bonus categories
+DEFAULT_BASE_RATE = 1.0
+# Cents per point when a bank has no transfer value, and for every cashback card
+DEFAULT_POINT_VALUE_CENTS = 1.0
+
+ELIGIBLE_CARD_TYPES = {
+    CreditScoreRating.EXCELLENT: set(CardType),
+    CreditScoreRating.GOOD: set(CardType),
+    CreditScoreRating.FAIR: {CardType.STUDENT, CardType.SECURED, CardType.GENERAL},
+    CreditScoreRating.POOR: {CardType.STUDENT, CardType.SECURED},
+    CreditScoreRating.NONE: {CardType.STUDENT, CardType.SECURED},
+}
+
+
+class CatalogMatrix:
+    """Card catalog flattened into typed arrays for scoring.
+
+    rates, caps and rotating are row-major (card x category). A rate of 0 means the
+    card has no bonus in that category and a cap of 0 means the bonus is uncapped.
+    """
+
+    def __init__(self, card_ids: Sequence[int], annual_fees: Sequence[float], point_values: Sequence[float],
+                 base_rates: Sequence[float], rates: Sequence[float], caps: Sequence[float],
+                 rotating: Sequence[int], card_types: Sequence[int], version: int = 0):
+        self.card_ids = card_ids
+        self.annual_fees = annual_fees
+        self.point_values = point_values
+        self.base_rates = base_rates
+        self.rates = rates
+        self.caps = caps
+        self.rotating = rotating
+        self.card_types = card_types
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.card_ids)
+
+
+def build_catalog_matrix(cards: List[Card], categories: List[SpendingCategoryInfo], banks: List[Bank],
+                         version: int = 0) -> CatalogMatrix:
+    """Flatten cards, their reward categories and bank point values into a CatalogMatrix"""
+    width = len(CATEGORIES)
+    row_by_card = {card.id: row for row, card in enumerate(cards)}
+    bank_values = {bank.id: bank.transfer_points_value_cents for bank in banks}
+
+    base_rates = array('d', [DEFAULT_BASE_RATE]) * len(cards)
+    rates = array('d', [0.0]) * (len(cards) * width)
+    caps = array('d', [0.0]) * (len(cards) * width)
+    rotating = array('b', [0]) * (len(cards) * width)
+
+    for info in categories:
+        row = row_by_card.get(info.card_id)
+        if row is None:
+            continue
+        if info.category == SpendingCategory.GENERAL and not info.quarterly_rotating:
+            base_rates[row] = info.rate
+        cell = row * width + CATEGORY_INDEX[info.category]
+        rates[cell] = info.rate
+        caps[cell] = info.cap or 0.0
+        rotating[cell] = 1 if info.quarterly_rotating else 0
+
+    point_values = array('d', [
+        (bank_values.get(card.bank_id) or DEFAULT_POINT_VALUE_CENTS)
+        if card.reward_structure == RewardStructure.POINTS else DEFAULT_POINT_VALUE_CENTS
+        for card in cards
+    ])
+
+    return CatalogMatrix(
+        card_ids=array('q', [card.id for card in cards]),
+        annual_fees=array('d', [card.annual_fee for card in cards]),
+        point_values=point_values,
+        base_rates=base_rates,
+        rates=rates,
+        caps=caps,
+        rotating=rotating,
+        card_types=array('b', [CARD_TYPE_INDEX[card.card_type] for card in cards]),
+        version=version
+    )
+
+
+def annual_spend_vector(monthly_spend: Dict[SpendingCategory, float]) -> array:
+    """Turn a user's monthly spend per category into an annual spend vector"""
+    vector = array('d', [0.0]) * len(CATEGORIES)
+    for category, spend in monthly_spend.items():
+        vector[CATEGORY_INDEX[category]] += spend * 12
+    return vector
+
+
+def _category_units(matrix: CatalogMatrix, cell: int, base: float, spend: float) -> float:
+    """Points (or cents back) a year of spend earns in one card x category cell"""
+    rate = matrix.rates[cell]
+    if rate <= base:
+        return spend * base
+    # A rotating bonus is only active for one quarter of the year
+    eligible = spend / 4 if matrix.rotating[cell] else spend
+    cap = matrix.caps[cell]
+    if cap and eligible > cap:
+        eligible = cap
+    return eligible * rate + (spend - eligible) * base
+
+
+def score_card(matrix: CatalogMatrix, row: int, annual_spend: Sequence[float]) -> float:
+    """Estimated yearly rewards in dollars for one card, honouring caps and rotating quarters"""
+    width = len(CATEGORIES)
+    offset = row * width
+    base = matrix.base_rates[row]
+    units = 0.0
+
+    for column in range(width):
+        spend = annual_spend[column]
+        if spend:
+            units += _category_units(matrix, offset + column, base, spend)
+
+    return units * matrix.point_values[row] / 100
+
+
+def category_values(matrix: CatalogMatrix, row: int, annual_spend: Sequence[float]) -> array:
+    """Yearly rewards in dollars per category for one card. Sums to score_card"""
+    width = len(CATEGORIES)
+    offset = row * width
+    base = matrix.base_rates[row]
+    scale = matrix.point_values[row] / 100
+    values = array('d', [0.0]) * width
+
+    for column in range(width):
+        spend = annual_spend[column]
+        if spend:
+            values[column] = _category_units(matrix, offset + column, base, spend) * scale
+
+    return values
+
+
+def optimize_wallet(matrix: CatalogMatrix, annual_spend: Sequence[float], rows: Iterable[int],
+                    max_cards: int = 3) -> Tuple[List[int], float]:
+    """Greedily pick up to max_cards cards to hold together, with their combined net value.
+
+    Each category's spend is assumed to go on whichever held card earns most there. Cards
+    are added one at a time by the largest gain over the current wallet net of their
+    annual fee, stopping early once no card adds value.
+    """
+    width = len(CATEGORIES)
+    values = {row: category_values(matrix, row, annual_spend) for row in rows}
+    best = array('d', [0.0]) * width
+    wallet: List[int] = []
+    net = 0.0
+
+    while len(wallet) < max_cards:
+        choice, choice_gain = None, 0.0
+        for row, row_values in values.items():
+            gain = -matrix.annual_fees[row]
+            for column in range(width):
+                if row_values[column] > best[column]:
+                    gain += row_values[column] - best[column]
+            if gain > choice_gain:
+                choice, choice_gain = row, gain
+        if choice is None:
+            break
+        wallet.append(choice)
+        net += choice_gain
+        chosen = values.pop(choice)
+        for column in range(width):
+            if chosen[column] > best[column]:
+                best[column] = chosen[column]
+
+    return wallet, net
+
+
+def score_all(matrix: CatalogMatrix, annual_spend: Sequence[float]) -> array:
+    """Estimated yearly rewards in dollars for every card in the matrix"""
+    return array('d', [score_card(matrix, row, annual_spend) for row in range(len(matrix))])
+
+
+def eligible_rows(matrix: CatalogMatrix, credit_score: Optional[CreditScoreRating]) -> List[int]:
+    """Rows of cards a user with this credit score can realistically be approved for"""
+    allowed = ELIGIBLE_CARD_TYPES.get(credit_score, ELIGIBLE_CARD_TYPES[CreditScoreRating.NONE])
+    allowed_codes = {CARD_TYPE_INDEX[card_type] for card_type in allowed}
+    return [row for row in range(len(matrix)) if matrix.card_types[row] in allowed_codes]
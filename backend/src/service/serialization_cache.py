@@ -0,0 +1,69 @@
+import gzip
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+
+class CachedPayload:
+    """Encoded JSON body of one catalog view, with its gzip variant"""
+
+    __slots__ = ("body", "gzip_body")
+
+    def __init__(self, body: bytes, gzip_body: bytes):
+        self.body = body
+        self.gzip_body = gzip_body
+
+
+class SerializationCache:
+    """Encoded catalog responses for the current catalog version.
+
+    Entries are keyed by a view key (endpoint and normalised query). Moving to a new
+    catalog version drops every entry from the old one, and the oldest views are evicted
+    once max_entries is reached.
+    """
+
+    def __init__(self, max_entries: int = 256, compress_level: int = 6):
+        self.max_entries = max_entries
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._entries: "OrderedDict[Hashable, CachedPayload]" = OrderedDict()
+
+    def get(self, version: int, view_key: Hashable) -> Optional[CachedPayload]:
+        """Cached payload for a view at this version, or None"""
+        with self._lock:
+            if version != self._version:
+                return None
+            payload = self._entries.get(view_key)
+            if payload is not None:
+                self._entries.move_to_end(view_key)
+            return payload
+
+    def put(self, version: int, view_key: Hashable, body: bytes) -> CachedPayload:
+        """Compress and store an encoded body. Bodies for an older version are not kept"""
+        payload = CachedPayload(body, gzip.compress(body, compresslevel=self.compress_level, mtime=0))
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._version = version
+                self._entries.clear()
+            if version == self._version:
+                self._entries[view_key] = payload
+                self._entries.move_to_end(view_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return payload
+
+    def get_or_build(self, version: int, view_key: Hashable, build: Callable[[], bytes]) -> CachedPayload:
+        """Return the cached payload, calling build() to encode it on a miss"""
+        payload = self.get(version, view_key)
+        if payload is None:
+            payload = self.put(version, view_key, build())
+        return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version = None
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
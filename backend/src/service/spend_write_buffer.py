@@ -0,0 +1,185 @@
+import atexit
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from src.model.enums import SpendingCategory
+from src.repository.user_repository import UserRepository
+
+logger = logging.getLogger(__name__)
+
+SpendKey = Tuple[int, SpendingCategory]
+
+
+class _PendingSpend:
+    """Coalesced writes for one (user, category): an optional absolute value plus a delta"""
+
+    __slots__ = ("absolute", "delta")
+
+    def __init__(self, absolute: Optional[float] = None, delta: float = 0.0):
+        self.absolute = absolute
+        self.delta = delta
+
+
+class SpendBufferMetrics(BaseModel):
+    queue_depth: int
+    flushes: int
+    failed_flushes: int
+    rows_flushed: int
+    writes_coalesced: int
+    last_flush_seconds: float
+    max_flush_seconds: float
+    total_flush_seconds: float
+
+
+class SpendWriteBuffer:
+    """Write-behind buffer for high-frequency user spend updates.
+
+    Updates are coalesced in memory per (user, category): a later set_spend replaces
+    earlier ones, and add_spend deltas are summed on top. A background thread flushes
+    them in bulk every flush_interval seconds, or sooner once max_pending keys are
+    waiting. close() stops the thread and does a final synchronous flush, and is also
+    run at interpreter exit. Rows that fail to flush are put back and retried.
+    """
+
+    def __init__(self, user_repo: Optional[UserRepository] = None, max_pending: int = 1000,
+                 flush_interval: float = 5.0, register_atexit: bool = True):
+        self.user_repo = user_repo or UserRepository()
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[SpendKey, _PendingSpend] = {}
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._flushes = 0
+        self._failed_flushes = 0
+        self._rows_flushed = 0
+        self._writes_coalesced = 0
+        self._last_flush_seconds = 0.0
+        self._max_flush_seconds = 0.0
+        self._total_flush_seconds = 0.0
+
+        if register_atexit:
+            atexit.register(self.close)
+
+    def start(self) -> "SpendWriteBuffer":
+        """Start the background flusher"""
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="spend-write-buffer", daemon=True)
+            self._thread.start()
+        return self
+
+    def set_spend(self, user_id: int, category: SpendingCategory, spend: float) -> None:
+        """Queue an absolute spend value for a user's category"""
+        self._record((user_id, SpendingCategory(category)), absolute=spend)
+
+    def add_spend(self, user_id: int, category: SpendingCategory, delta: float) -> None:
+        """Queue an amount to add to a user's category spend"""
+        self._record((user_id, SpendingCategory(category)), delta=delta)
+
+    def flush(self) -> int:
+        """Write everything pending now. Returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            absolute_rows: List[Tuple[int, SpendingCategory, float]] = []
+            delta_rows: List[Tuple[int, SpendingCategory, float]] = []
+            for (user_id, category), pending in batch.items():
+                if pending.absolute is not None:
+                    absolute_rows.append((user_id, category, pending.absolute + pending.delta))
+                else:
+                    delta_rows.append((user_id, category, pending.delta))
+
+            started = time.perf_counter()
+            try:
+                written = self.user_repo.bulk_upsert_spending(absolute_rows)
+                written += self.user_repo.bulk_upsert_spending(delta_rows, increment=True)
+            except Exception:
+                self._failed_flushes += 1
+                self._requeue(batch)
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                self._last_flush_seconds = elapsed
+                self._max_flush_seconds = max(self._max_flush_seconds, elapsed)
+                self._total_flush_seconds += elapsed
+
+            self._flushes += 1
+            self._rows_flushed += written
+            return written
+
+    def close(self) -> None:
+        """Stop the background flusher and durably flush what is left"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        atexit.unregister(self.close)
+
+    def metrics(self) -> SpendBufferMetrics:
+        with self._lock:
+            depth = len(self._pending)
+        return SpendBufferMetrics(
+            queue_depth=depth,
+            flushes=self._flushes,
+            failed_flushes=self._failed_flushes,
+            rows_flushed=self._rows_flushed,
+            writes_coalesced=self._writes_coalesced,
+            last_flush_seconds=self._last_flush_seconds,
+            max_flush_seconds=self._max_flush_seconds,
+            total_flush_seconds=self._total_flush_seconds
+        )
+
+    def __enter__(self) -> "SpendWriteBuffer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _record(self, key: SpendKey, absolute: Optional[float] = None, delta: float = 0.0) -> None:
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = _PendingSpend(absolute, delta)
+            else:
+                self._writes_coalesced += 1
+                if absolute is not None:
+                    pending.absolute = absolute
+                    pending.delta = 0.0
+                pending.delta += delta
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def _requeue(self, batch: Dict[SpendKey, _PendingSpend]) -> None:
+        """Put a failed batch back underneath anything recorded since it was taken"""
+        with self._lock:
+            for key, failed in batch.items():
+                newer = self._pending.get(key)
+                if newer is None:
+                    self._pending[key] = failed
+                elif newer.absolute is None:
+                    newer.absolute = failed.absolute
+                    newer.delta += failed.delta
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Spend write-behind flush failed; rows were requeued")
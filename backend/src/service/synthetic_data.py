@@ -0,0 +1,253 @@
+import math
+import random
+import time
+from enum import Enum
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import psycopg
+from pydantic import BaseModel
+from src.model.card import Bank, Card, SpendingCategoryInfo
+from src.model.enums import CardType, CreditScoreRating, RewardStructure, SpendingCategory
+from src.model.user import AuthorizedUserInfo, SpendingCategoryUser, User
+
+ISSUERS = ["Chase", "American Express", "Capital One", "Citi", "Discover", "Wells Fargo", "Bank of America",
+           "US Bank", "Barclays", "Synchrony", "PNC", "Truist", "TD Bank", "Navy Federal", "USAA"]
+CARD_WORDS = ["Freedom", "Sapphire", "Venture", "Quicksilver", "Double", "Cash", "Active", "Platinum", "Gold",
+              "Savor", "Journey", "Everyday", "Premier", "Horizon", "Summit", "Voyager"]
+FIRST_NAMES = ["Alex", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn", "Sam",
+               "Maria", "Wei", "Aisha", "Diego", "Priya", "Noah", "Olivia", "Liam", "Emma", "Mateo"]
+LAST_NAMES = ["Smith", "Johnson", "Garcia", "Nguyen", "Patel", "Kim", "Brown", "Lopez", "Chen", "Williams",
+              "Jones", "Martinez", "Davis", "Okafor", "Silva", "Cohen", "Singh", "Muller", "Rossi", "Khan"]
+
+CARD_TYPE_WEIGHTS = {CardType.GENERAL: 55, CardType.BUSINESS: 20, CardType.STUDENT: 15, CardType.SECURED: 10}
+ANNUAL_FEES = [0, 0, 0, 0, 0, 95, 95, 150, 250, 395, 550, 695]
+# Typical monthly spend per category for a median income user
+MONTHLY_SPEND = {
+    SpendingCategory.GROCERIES: 450,
+    SpendingCategory.DINING: 250,
+    SpendingCategory.GAS: 160,
+    SpendingCategory.ONLINE_RETAIL: 200,
+    SpendingCategory.TRAVEL: 150,
+    SpendingCategory.GENERAL: 600,
+    SpendingCategory.RIDESHARE: 60,
+    SpendingCategory.PUBLIC_TRANSIT: 50,
+    SpendingCategory.ENTERTAINMENT: 90,
+}
+MEDIAN_INCOME = 55_000
+CREDIT_SCORES = list(CreditScoreRating)
+# Credit score weights (excellent, good, fair, poor, none) by income band upper bound
+CREDIT_WEIGHTS = (
+    (20_000, (5, 15, 25, 20, 35)),
+    (50_000, (15, 30, 30, 15, 10)),
+    (100_000, (30, 40, 20, 7, 3)),
+    (math.inf, (50, 35, 10, 4, 1)),
+)
+
+BANK_COLUMNS = ("id", "name", "relationship_bank", "transfer_points_value_cents", "reports_under_eighteen")
+CARD_COLUMNS = ("id", "name", "bank_id", "card_type", "sub_max_value", "sub_description", "annual_fee",
+                "foreign_transaction_fee", "reward_structure", "fee_credits", "other_benefits")
+CARD_CATEGORY_COLUMNS = ("card_id", "category", "rate", "cap", "quarterly_rotating")
+USER_COLUMNS = ("id", "name", "email", "credit_score", "annual_income")
+USER_SPEND_COLUMNS = ("user_id", "category", "user_spend")
+AUTHORIZED_USER_COLUMNS = ("user_id", "bank_id", "add_after_age_eighteen")
+
+# Offsets that keep the random streams of different entity kinds apart
+_BANKS, _CARDS, _USERS = 1, 2, 3
+
+
+class SyntheticDataGenerator:
+    """Seeded, realistic-looking catalog and user data for scale testing.
+
+    Every card and user is drawn from its own random stream derived from the seed and
+    its ID, so the same seed always gives the same rows and any table can be streamed
+    on its own: the spend and authorized user streams redraw the user they belong to
+    rather than remembering it. IDs run from 1 so rows can be loaded with explicit keys.
+    Models are built with model_construct, skipping validation, because they are only
+    ever written straight back out.
+    """
+
+    def __init__(self, seed: int = 0, banks: int = 50, cards: int = 2_000, users: int = 10_000,
+                 authorized_user_rate: float = 0.15):
+        if banks < 1 and cards:
+            raise ValueError("Cards need at least one bank")
+        self.seed = seed
+        self.bank_count = banks
+        self.card_count = cards
+        self.user_count = users
+        self.authorized_user_rate = authorized_user_rate
+        self._banks = [self._draw_bank(bank_id) for bank_id in range(1, banks + 1)]
+        # Big issuers carry most of the catalog
+        self._bank_ids = [bank.id for bank in self._banks]
+        self._bank_weights = [1 / rank for rank in range(1, banks + 1)]
+        self._minor_bank_ids = [bank.id for bank in self._banks if bank.reports_under_eighteen] or self._bank_ids
+
+    def _rng(self, kind: int, entity_id: int) -> random.Random:
+        return random.Random((self.seed * 8 + kind) * 1_000_000_007 + entity_id)
+
+    def _draw_bank(self, bank_id: int) -> Bank:
+        rng = self._rng(_BANKS, bank_id)
+        issuer = ISSUERS[(bank_id - 1) % len(ISSUERS)]
+        name = issuer if bank_id <= len(ISSUERS) else f"{issuer} {(bank_id - 1) // len(ISSUERS) + 1}"
+        return Bank.model_construct(
+            id=bank_id,
+            name=name,
+            relationship_bank=rng.random() < 0.25,
+            transfer_points_value_cents=round(rng.uniform(1.0, 2.2), 2) if rng.random() < 0.6 else None,
+            reports_under_eighteen=rng.random() < 0.5,
+            created_at=None
+        )
+
+    def banks(self) -> Iterator[Bank]:
+        return iter(self._banks)
+
+    def _draw_card(self, card_id: int) -> Tuple[Card, List[SpendingCategoryInfo]]:
+        rng = self._rng(_CARDS, card_id)
+        bank_id = rng.choices(self._bank_ids, self._bank_weights)[0]
+        card_type = rng.choices(list(CARD_TYPE_WEIGHTS), list(CARD_TYPE_WEIGHTS.values()))[0]
+        reward_structure = RewardStructure.POINTS if rng.random() < 0.5 else RewardStructure.CASHBACK
+        annual_fee = 0 if card_type in (CardType.STUDENT, CardType.SECURED) else rng.choice(ANNUAL_FEES)
+        sub_max_value = rng.choice([0, 10_000, 20_000, 60_000, 75_000, 100_000]) if annual_fee else \
+            rng.choice([0, 0, 200, 20_000])
+        card = Card.model_construct(
+            id=card_id,
+            name=f"{self._banks[bank_id - 1].name} {rng.choice(CARD_WORDS)} {card_id}",
+            bank_id=bank_id,
+            card_type=card_type,
+            sub_max_value=sub_max_value,
+            sub_description=f"Spend ${rng.choice([500, 1000, 3000, 4000, 6000])} in the first 3 months"
+            if sub_max_value else None,
+            annual_fee=annual_fee,
+            foreign_transaction_fee=0.0 if annual_fee or rng.random() < 0.4 else 0.03,
+            reward_structure=reward_structure,
+            fee_credits=f"${rng.choice([50, 100, 300])} annual travel credit" if annual_fee >= 250 else None,
+            other_benefits=None,
+            created_at=None
+        )
+
+        categories = [SpendingCategoryInfo.model_construct(
+            id=None, card_id=card_id, category=SpendingCategory.GENERAL,
+            rate=rng.choice([1.0, 1.0, 1.25, 1.5, 2.0]), cap=None, quarterly_rotating=False
+        )]
+        bonus = [category for category in SpendingCategory if category != SpendingCategory.GENERAL]
+        rotating = reward_structure == RewardStructure.CASHBACK and rng.random() < 0.15
+        for category in rng.sample(bonus, rng.randint(1, 4) if not rotating else 4):
+            categories.append(SpendingCategoryInfo.model_construct(
+                id=None, card_id=card_id, category=category,
+                rate=5.0 if rotating else rng.choice([2.0, 3.0, 3.0, 4.0, 5.0]),
+                cap=1500.0 if rotating else (rng.choice([6000.0, 25000.0]) if rng.random() < 0.3 else None),
+                quarterly_rotating=rotating
+            ))
+        return card, categories
+
+    def cards(self) -> Iterator[Card]:
+        for card_id in range(1, self.card_count + 1):
+            yield self._draw_card(card_id)[0]
+
+    def card_categories(self) -> Iterator[SpendingCategoryInfo]:
+        for card_id in range(1, self.card_count + 1):
+            yield from self._draw_card(card_id)[1]
+
+    def _draw_user(self, user_id: int) -> Tuple[random.Random, User]:
+        rng = self._rng(_USERS, user_id)
+        income = min(5_000_000, int(rng.lognormvariate(math.log(MEDIAN_INCOME), 0.7)) // 100 * 100)
+        weights = next(weights for bound, weights in CREDIT_WEIGHTS if income < bound)
+        user = User.model_construct(
+            id=user_id,
+            name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            email=f"user{user_id}@example.com",
+            credit_score=rng.choices(CREDIT_SCORES, weights)[0],
+            annual_income=income,
+            created_at=None
+        )
+        return rng, user
+
+    def users(self) -> Iterator[User]:
+        for user_id in range(1, self.user_count + 1):
+            yield self._draw_user(user_id)[1]
+
+    def _draw_spending(self, rng: random.Random, user: User) -> List[SpendingCategoryUser]:
+        scale = (max(user.annual_income, 10_000) / MEDIAN_INCOME) ** 0.5
+        chosen = rng.sample(list(MONTHLY_SPEND), rng.randint(3, len(MONTHLY_SPEND)))
+        return [
+            SpendingCategoryUser.model_construct(
+                id=None, user_id=user.id, category=category,
+                user_spend=round(MONTHLY_SPEND[category] * scale * rng.lognormvariate(0, 0.5)),
+                created_at=None
+            ) for category in chosen
+        ]
+
+    def user_spending(self) -> Iterator[SpendingCategoryUser]:
+        for user_id in range(1, self.user_count + 1):
+            rng, user = self._draw_user(user_id)
+            yield from self._draw_spending(rng, user)
+
+    def authorized_users(self) -> Iterator[AuthorizedUserInfo]:
+        for user_id in range(1, self.user_count + 1):
+            rng, user = self._draw_user(user_id)
+            self._draw_spending(rng, user)
+            if rng.random() >= self.authorized_user_rate:
+                continue
+            count = min(len(self._minor_bank_ids), 1 if rng.random() < 0.8 else 2)
+            for bank_id in rng.sample(self._minor_bank_ids, count):
+                yield AuthorizedUserInfo.model_construct(
+                    id=None, user_id=user_id, bank_id=bank_id,
+                    add_after_age_eighteen=rng.random() < 0.3, created_at=None
+                )
+
+
+def _rows(models: Iterable[BaseModel], columns: Tuple[str, ...]) -> Iterator[tuple]:
+    for model in models:
+        values = model.__dict__
+        yield tuple(value.value if isinstance(value, Enum) else value for value in map(values.__getitem__, columns))
+
+
+def _copy(conn: psycopg.Connection, table: str, columns: Tuple[str, ...], models: Iterable[BaseModel]) -> int:
+    count = 0
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in _rows(models, columns):
+                copy.write_row(row)
+                count += 1
+    return count
+
+
+LOAD_ORDER: Tuple[Tuple[str, Tuple[str, ...], Callable[[SyntheticDataGenerator], Iterable[BaseModel]]], ...] = (
+    ("banks", BANK_COLUMNS, SyntheticDataGenerator.banks),
+    ("credit_cards", CARD_COLUMNS, SyntheticDataGenerator.cards),
+    ("card_spending_category", CARD_CATEGORY_COLUMNS, SyntheticDataGenerator.card_categories),
+    ("users", USER_COLUMNS, SyntheticDataGenerator.users),
+    ("user_spending_category", USER_SPEND_COLUMNS, SyntheticDataGenerator.user_spending),
+    ("authorized_user_info", AUTHORIZED_USER_COLUMNS, SyntheticDataGenerator.authorized_users),
+)
+
+
+def load_synthetic_data(database_url: str, generator: SyntheticDataGenerator, truncate: bool = False,
+                        progress: Optional[Callable[[str, int, float], None]] = None) -> Dict[str, int]:
+    """COPY every generated table into the database in one transaction. Returns rows per table.
+
+    Generated rows use IDs from 1, so the tables must be empty; pass truncate=True to
+    empty them first. Serial sequences are moved past the loaded IDs afterwards.
+    """
+    counts: Dict[str, int] = {}
+    with psycopg.connect(database_url) as conn:
+        tables = [table for table, _, _ in LOAD_ORDER]
+        if truncate:
+            conn.execute(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE")
+        else:
+            for table in tables:
+                if conn.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0]:
+                    raise ValueError(f"{table} already has rows; load into empty tables or truncate")
+
+        for table, columns, stream in LOAD_ORDER:
+            started = time.perf_counter()
+            counts[table] = _copy(conn, table, columns, stream(generator))
+            if progress is not None:
+                progress(table, counts[table], time.perf_counter() - started)
+
+        for table in tables:
+            conn.execute(f"""
+                SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false)
+                FROM {table}
+            """)
+        conn.execute("ANALYZE")
+        conn.commit()
+    return counts
@@ -0,0 +1,46 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Mapping, Optional
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+# Loaders NUMERIC_LOADER may pick for every connection. "scaled" is left out: it turns
+# every DECIMAL column into integers, so it is only registered on the cursors that want it
+NUMERIC_LOADER_SETTINGS = ("float", "decimal")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Process configuration, read from the environment and an optional .env file"""
+
+    database_url: Optional[str] = None
+    catalog_snapshot_path: Optional[str] = None
+    repository_instrumentation: bool = False
+    slow_query_log: Optional[str] = None
+    slow_query_threshold_ms: float = 200.0
+    numeric_loader: str = "float"
+
+    @classmethod
+    def from_environ(cls, environ: Mapping[str, str]) -> "Settings":
+        numeric_loader = environ.get("NUMERIC_LOADER", "").lower() or "float"
+        if numeric_loader not in NUMERIC_LOADER_SETTINGS:
+            raise ValueError(f"NUMERIC_LOADER must be one of {', '.join(NUMERIC_LOADER_SETTINGS)}, "
+                             f"not {numeric_loader!r}")
+        return cls(
+            database_url=environ.get("DATABASE_URL"),
+            catalog_snapshot_path=environ.get("CATALOG_SNAPSHOT_PATH") or None,
+            repository_instrumentation=environ.get("REPOSITORY_INSTRUMENTATION", "").lower() in TRUE_VALUES,
+            slow_query_log=environ.get("SLOW_QUERY_LOG") or None,
+            slow_query_threshold_ms=float(environ.get("SLOW_QUERY_THRESHOLD_MS", "200")),
+            numeric_loader=numeric_loader,
+        )
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Load the settings the first time they are needed. get_settings.cache_clear() reloads them"""
+    # dotenv is only imported here, so processes that never touch the database skip it
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    return Settings.from_environ(os.environ)
@@ -0,0 +1,191 @@
+import pytest
+from unittest.mock import Mock
+from fastapi.testclient import TestClient
+from src.main import create_app
+from src.controller.dependencies import get_bank_repository, get_card_repository, get_serialization_cache
+from src.model.card import Bank, Card, SpendingCategoryInfo
+from src.model.enums import CardType, RewardStructure, SpendingCategory
+from src.service.serialization_cache import SerializationCache
+
+class TestCardController():
+
+    @pytest.fixture
+    def card_repo(self):
+        repo = Mock()
+        repo.get_catalog_version.return_value = 7
+        return repo
+
+    @pytest.fixture
+    def bank_repo(self):
+        return Mock()
+
+    @pytest.fixture
+    def cache(self):
+        return SerializationCache()
+
+    @pytest.fixture
+    def client(self, card_repo, bank_repo, cache):
+        app = create_app()
+        app.dependency_overrides[get_card_repository] = lambda: card_repo
+        app.dependency_overrides[get_bank_repository] = lambda: bank_repo
+        app.dependency_overrides[get_serialization_cache] = lambda: cache
+        return TestClient(app, headers={"Accept-Encoding": "identity"})
+
+    @pytest.fixture
+    def model_card(self):
+        return Card(
+            id=1,
+            name="Chase Freedom",
+            bank_id=1,
+            card_type=CardType.STUDENT,
+            reward_structure=RewardStructure.CASHBACK
+        )
+
+    def test_search_cards_returns_cards_with_etag(self, client, card_repo, model_card):
+        """Test searching cards returns the catalog with its version ETag"""
+        # Arrange
+        card_repo.search_cards.return_value = [model_card]
+
+        # Act
+        response = client.get("/cards", params={"card_type": "student", "max_fee": 0})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["ETag"] == '"catalog-7"'
+        assert response.json()[0]["name"] == "Chase Freedom"
+        kwargs = card_repo.search_cards.call_args.kwargs
+        assert kwargs["card_type"] == CardType.STUDENT
+        assert kwargs["max_fee"] == 0
+
+    def test_search_cards_not_modified(self, client, card_repo):
+        """Test a matching If-None-Match skips the catalog query"""
+        # Act
+        response = client.get("/cards", headers={"If-None-Match": 'W/"catalog-7"'})
+
+        # Assert
+        assert response.status_code == 304
+        assert response.headers["ETag"] == '"catalog-7"'
+        assert response.content == b""
+        card_repo.search_cards.assert_not_called()
+
+    def test_search_cards_stale_etag(self, client, card_repo, model_card):
+        """Test an old ETag gets the full payload"""
+        # Arrange
+        card_repo.search_cards.return_value = [model_card]
+
+        # Act
+        response = client.get("/cards", headers={"If-None-Match": '"catalog-6"'})
+
+        # Assert
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+
+    def test_get_card_detail(self, client, card_repo, bank_repo, model_card):
+        """Test card detail includes bank and reward categories"""
+        # Arrange
+        card_repo.get_card_by_id.return_value = model_card
+        card_repo.get_spending_categories_by_card.return_value = [
+            SpendingCategoryInfo(id=1, card_id=1, category=SpendingCategory.DINING, rate=3.0)
+        ]
+        bank_repo.get_banks_by_ids.return_value = [Bank(
+            id=1,
+            name="Chase",
+            relationship_bank=True,
+            reports_under_eighteen=False
+        )]
+
+        # Act
+        response = client.get("/cards/1")
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert body["card"]["id"] == 1
+        assert body["bank"]["name"] == "Chase"
+        assert body["spending_categories"][0]["category"] == "dining"
+
+    def test_get_card_detail_not_found(self, client, card_repo):
+        """Test card detail for a missing card"""
+        # Arrange
+        card_repo.get_card_by_id.return_value = None
+        card_repo.get_spending_categories_by_card.return_value = []
+
+        # Act
+        response = client.get("/cards/99999")
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_get_card_detail_not_found_with_current_etag(self, client, card_repo):
+        """Test a missing card is a 404 even when the client sends the current catalog ETag"""
+        # Arrange
+        card_repo.get_card_by_id.return_value = None
+        card_repo.get_spending_categories_by_card.return_value = []
+
+        # Act
+        response = client.get("/cards/99999", headers={"If-None-Match": '"catalog-7"'})
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_get_card_detail_not_modified(self, client, card_repo, bank_repo, model_card):
+        """Test an existing card at the current catalog version answers 304"""
+        # Arrange
+        card_repo.get_card_by_id.return_value = model_card
+        card_repo.get_spending_categories_by_card.return_value = []
+        bank_repo.get_banks_by_ids.return_value = [Bank(
+            id=1,
+            name="Chase",
+            relationship_bank=True,
+            reports_under_eighteen=False
+        )]
+
+        # Act
+        response = client.get("/cards/1", headers={"If-None-Match": '"catalog-7"'})
+
+        # Assert
+        assert response.status_code == 304
+        assert response.headers["ETag"] == '"catalog-7"'
+
+    def test_search_cards_served_from_cache(self, client, card_repo, model_card):
+        """Test a repeated view at the same version reuses the encoded bytes"""
+        # Arrange
+        card_repo.search_cards.return_value = [model_card]
+
+        # Act
+        first = client.get("/cards", params={"card_type": "student"})
+        second = client.get("/cards", params={"card_type": "student"})
+
+        # Assert
+        assert first.content == second.content
+        card_repo.search_cards.assert_called_once()
+
+    def test_search_cards_cache_dropped_on_new_version(self, client, card_repo, model_card):
+        """Test a catalog version change re-encodes the view"""
+        # Arrange
+        card_repo.search_cards.return_value = [model_card]
+
+        # Act
+        client.get("/cards")
+        card_repo.get_catalog_version.return_value = 8
+        response = client.get("/cards")
+
+        # Assert
+        assert response.headers["ETag"] == '"catalog-8"'
+        assert card_repo.search_cards.call_count == 2
+
+    def test_search_cards_gzip(self, client, card_repo, model_card):
+        """Test gzip clients get the compressed variant under its own ETag"""
+        # Arrange
+        card_repo.search_cards.return_value = [model_card]
+
+        # Act
+        response = client.get("/cards", headers={"Accept-Encoding": "gzip"})
+        revalidated = client.get("/cards", headers={"Accept-Encoding": "gzip", "If-None-Match": '"catalog-7-gzip"'})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["ETag"] == '"catalog-7-gzip"'
+        assert response.json()[0]["name"] == "Chase Freedom"
+        assert revalidated.status_code == 304
@@ -0,0 +1,47 @@
+import pytest
+from unittest.mock import Mock
+from fastapi.testclient import TestClient
+from src.main import create_app
+from src.controller.dependencies import get_export_service
+
+class TestExportController():
+
+    @pytest.fixture
+    def service(self):
+        service = Mock()
+        service.stream.return_value = iter([b'{"id":1}\n', b'{"id":2}\n'])
+        return service
+
+    @pytest.fixture
+    def client(self, service):
+        app = create_app()
+        app.dependency_overrides[get_export_service] = lambda: service
+        return TestClient(app)
+
+    def test_export_streams_chunks(self, client, service):
+        """Test the export endpoint streams every chunk"""
+        # Act
+        response = client.get("/export/cards")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert response.content == b'{"id":1}\n{"id":2}\n'
+        service.stream.assert_called_once_with("cards", "ndjson")
+
+    def test_export_csv_filename(self, client, service):
+        """Test CSV exports are sent as an attachment"""
+        # Act
+        response = client.get("/export/spend", params={"format": "csv"})
+
+        # Assert
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="spend.csv"' in response.headers["content-disposition"]
+
+    def test_export_unknown_dataset(self, client):
+        """Test exporting an unknown dataset"""
+        # Act
+        response = client.get("/export/passwords")
+
+        # Assert
+        assert response.status_code == 422
@@ -0,0 +1,168 @@
+import psycopg
+import pytest
+from unittest.mock import Mock
+from fastapi.testclient import TestClient
+from src.main import create_app
+from src.controller.dependencies import (get_bank_repository, get_card_repository, get_recommendation_service,
+                                         get_user_repository)
+from src.model.card import Bank, Card
+from src.model.enums import CardType, RewardStructure, SpendingCategory
+from src.model.recommendation import CardRecommendation
+from src.model.user import AuthorizedUserInfo, SpendingCategoryUser, User, UserProfile
+
+class TestUserController():
+
+    @pytest.fixture
+    def user_repo(self):
+        return Mock()
+
+    @pytest.fixture
+    def bank_repo(self):
+        return Mock()
+
+    @pytest.fixture
+    def service(self):
+        return Mock()
+
+    @pytest.fixture
+    def client(self, user_repo, bank_repo, service):
+        app = create_app()
+        app.dependency_overrides[get_bank_repository] = lambda: bank_repo
+        app.dependency_overrides[get_card_repository] = lambda: Mock()
+        app.dependency_overrides[get_user_repository] = lambda: user_repo
+        app.dependency_overrides[get_recommendation_service] = lambda: service
+        return TestClient(app)
+
+    @pytest.fixture
+    def sample_user(self):
+        return User(
+            id=1,
+            name="Test User",
+            email="test@example.com",
+            annual_income=50000,
+            credit_score="good"
+        )
+
+    def test_get_user_profile(self, client, user_repo, sample_user):
+        """Test the profile combines user, spending, authorized user info and banks"""
+        # Arrange
+        user_repo.get_user_profile.return_value = UserProfile(
+            user=sample_user,
+            spending_categories=[
+                SpendingCategoryUser(id=1, user_id=1, category=SpendingCategory.GAS, user_spend=300)
+            ],
+            authorized_user_info=[
+                AuthorizedUserInfo(id=1, user_id=1, bank_id=2, add_after_age_eighteen=True)
+            ],
+            banks=[Bank(id=2, name="Chase", relationship_bank=True, reports_under_eighteen=False)]
+        )
+
+        # Act
+        response = client.get("/users/1")
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert body["user"]["email"] == "test@example.com"
+        assert body["spending_categories"][0]["user_spend"] == 300
+        assert body["authorized_user_info"][0]["bank_id"] == 2
+        assert body["banks"][0]["name"] == "Chase"
+        user_repo.get_user_profile.assert_called_once_with(1)
+
+    def test_get_user_profile_not_found(self, client, user_repo):
+        """Test the profile of a missing user"""
+        # Arrange
+        user_repo.get_user_profile.return_value = None
+
+        # Act
+        response = client.get("/users/99999")
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_get_recommendations(self, client, service, bank_repo):
+        """Test recommendations keep service order and get their banks in one batch"""
+        # Arrange
+        cards = [
+            Card(id=3, name="Cash Card", bank_id=1, card_type=CardType.GENERAL,
+                 reward_structure=RewardStructure.CASHBACK),
+            Card(id=4, name="Points Card", bank_id=2, card_type=CardType.GENERAL,
+                 reward_structure=RewardStructure.POINTS),
+            Card(id=5, name="Other Cash Card", bank_id=1, card_type=CardType.GENERAL,
+                 reward_structure=RewardStructure.CASHBACK)
+        ]
+        service.recommend_for_user.return_value = [
+            CardRecommendation(card=card, estimated_annual_rewards=100.0 - i, net_annual_value=100.0 - i)
+            for i, card in enumerate(cards)
+        ]
+        bank_repo.get_banks_by_ids.return_value = [
+            Bank(id=1, name="Chase", relationship_bank=True, reports_under_eighteen=False),
+            Bank(id=2, name="Amex", relationship_bank=False, reports_under_eighteen=False)
+        ]
+
+        # Act
+        response = client.get("/users/1/recommendations", params={"limit": 5})
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert [rec["card"]["name"] for rec in body] == ["Cash Card", "Points Card", "Other Cash Card"]
+        assert [rec["bank"]["name"] for rec in body] == ["Chase", "Amex", "Chase"]
+        service.recommend_for_user.assert_called_once_with(1, 5)
+        bank_repo.get_banks_by_ids.assert_called_once()
+        assert sorted(bank_repo.get_banks_by_ids.call_args.args[0]) == [1, 2]
+
+    def test_get_recommendations_user_not_found(self, client, service):
+        """Test recommendations for a missing user"""
+        # Arrange
+        service.recommend_for_user.return_value = None
+
+        # Act
+        response = client.get("/users/99999/recommendations")
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_patch_user_sends_only_set_fields(self, client, user_repo, sample_user):
+        """Test PATCH passes only the fields in the body to the repository"""
+        # Arrange
+        user_repo.patch_user.return_value = sample_user
+
+        # Act
+        response = client.patch("/users/1", json={"annual_income": 65000})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["email"] == "test@example.com"
+        user_repo.patch_user.assert_called_once_with(1, {"annual_income": 65000})
+
+    def test_patch_user_not_found(self, client, user_repo):
+        """Test PATCH on a missing user"""
+        # Arrange
+        user_repo.patch_user.return_value = None
+
+        # Act
+        response = client.patch("/users/99999", json={"name": "New Name"})
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_patch_user_duplicate_email(self, client, user_repo):
+        """Test changing the email to one another user has is a conflict"""
+        # Arrange
+        user_repo.patch_user.side_effect = psycopg.errors.UniqueViolation("users_email_key")
+
+        # Act
+        response = client.patch("/users/1", json={"email": "taken@example.com"})
+
+        # Assert
+        assert response.status_code == 409
+
+    def test_patch_user_invalid_value(self, client, user_repo):
+        """Test PATCH with a value the model rejects"""
+        # Act
+        response = client.patch("/users/1", json={"credit_score": "amazing"})
+
+        # Assert
+        assert response.status_code == 422
+        user_repo.patch_user.assert_not_called()
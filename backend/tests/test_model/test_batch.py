@@ -0,0 +1,107 @@
+import pytest
+from array import array
+from datetime import datetime
+from src.model.batch import CardBatch, ColumnarBatch, UserSpendBatch
+from src.model.card import Card
+from src.model.enums import CardType, RewardStructure, SpendingCategory
+from src.model.user import SpendingCategoryUser
+
+class TestCardBatch():
+
+    @pytest.fixture
+    def created_at(self):
+        return datetime(2024, 5, 17, 9, 30, 15, 123456)
+
+    @pytest.fixture
+    def rows(self, created_at):
+        """SELECT * FROM credit_cards rows, enums as the strings psycopg returns without adapters"""
+        return [
+            (1, "Sapphire", 3, "general", 60000, "Spend $4000", 95, 0.0, "points", None, "Lounge access",
+             created_at),
+            (2, "Freedom", 3, "student", None, "Spend $4000", 0, 0.03, "cashback", "None", None, None),
+        ]
+
+    def test_columns_are_typed_arrays(self, rows):
+        """Test numbers and enums are stored in arrays and repeated text only once"""
+        # Act
+        batch = CardBatch.from_rows(rows)
+
+        # Assert
+        assert len(batch) == 2
+        assert batch.column("id") == array('q', [1, 2])
+        assert batch.column("annual_fee") == array('q', [95, 0])
+        assert batch.column("foreign_transaction_fee") == array('d', [0.0, 0.03])
+        assert batch.column("card_type") == array('b', [3, 0])
+        assert batch.column("sub_description") == array('l', [0, 0])
+        assert batch.columns["sub_description"].values == ["Spend $4000"]
+
+    def test_views_decode_lazily(self, rows, created_at):
+        """Test a row view reads fields back, including NULLs, without building a Card"""
+        # Arrange
+        batch = CardBatch.from_rows(rows)
+
+        # Act
+        first, last = batch[0], batch[-1]
+
+        # Assert
+        assert first.card_type is CardType.GENERAL
+        assert first.reward_structure is RewardStructure.POINTS
+        assert first.created_at == created_at
+        assert first.fee_credits is None
+        assert last.sub_max_value is None
+        assert last.created_at is None
+        assert last.fee_credits == "None"
+        with pytest.raises(AttributeError):
+            first.missing
+        with pytest.raises(IndexError):
+            batch[2]
+
+    def test_models_round_trip(self, rows):
+        """Test models built from a batch equal the models it was built from"""
+        # Arrange
+        cards = [Card(**dict(zip(CardBatch().columns, row))) for row in rows]
+
+        # Act
+        batch = CardBatch.from_models(cards)
+
+        # Assert
+        assert batch.to_models() == cards
+        assert [view.to_model() for view in batch] == cards
+
+    def test_rows_must_match_the_columns(self, rows):
+        """Test a row with a missing or extra column is refused instead of misaligning the batch"""
+        # Act / Assert
+        with pytest.raises(ValueError):
+            CardBatch.from_rows([rows[0][:-1]])
+        with pytest.raises(ValueError):
+            CardBatch.from_rows([rows[0] + (None,)])
+
+    def test_base_class_is_abstract(self):
+        """Test only batches that declare their columns can be built"""
+        with pytest.raises(TypeError):
+            ColumnarBatch()
+
+
+class TestUserSpendBatch():
+
+    @pytest.fixture
+    def batch(self):
+        return UserSpendBatch.from_rows([
+            (1, 1, "gas", 100, None),
+            (2, 1, "dining", 250, None),
+            (5, 4, "travel", 80, None),
+        ])
+
+    def test_views_and_models(self, batch):
+        """Test spending rows decode to enums and floats"""
+        # Act / Assert
+        assert batch[1].category is SpendingCategory.DINING
+        assert batch[1].user_spend == 250
+        assert batch[2].to_model() == SpendingCategoryUser(id=5, user_id=4, category=SpendingCategory.TRAVEL,
+                                                           user_spend=80)
+
+    def test_user_ranges(self, batch):
+        """Test rows are grouped into one range per user"""
+        # Act / Assert
+        assert list(batch.user_ranges()) == [(1, 0, 2), (4, 2, 3)]
+        assert list(UserSpendBatch().user_ranges()) == []
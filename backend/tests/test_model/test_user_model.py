@@ -1,5 +1,5 @@
 import pytest
-from src.model.user import User, CreditScoreRating
+from src.model.user import User, UserPatch, CreditScoreRating
 from pydantic import ValidationError
 class TestUserModel():
 
@@ -39,4 +39,16 @@ class TestUserModel():
     def test_user_invalid_income(self):
         """Test invalid email raises error"""
         with pytest.raises(ValidationError):
-            User(name="Test", email="1@gmail.com", credit_score="definately_not_valid", annual_income="a")
\ No newline at end of file
+            User(name="Test", email="1@gmail.com", credit_score="definately_not_valid", annual_income="a")
+
+    def test_user_email_domain_is_normalised(self):
+        """Test the email domain is lowercased the way EmailStr did"""
+        user = User(name="Test", email="Someone@Example.COM", credit_score="good", annual_income=4000)
+
+        assert user.email == "Someone@example.com"
+        assert User.model_json_schema()["properties"]["email"]["format"] == "email"
+
+    def test_user_patch_invalid_email(self):
+        """Test a patch is held to the same email rules"""
+        with pytest.raises(ValidationError):
+            UserPatch(email="invalid-email")
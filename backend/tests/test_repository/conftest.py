@@ -1,31 +1,127 @@
 import os
+import time
 import pytest
 import psycopg
 from dotenv import load_dotenv
+from psycopg import sql
+from psycopg.conninfo import conninfo_to_dict, make_conninfo
 from src.model.user import User
+from src.repository import query_counter
 from src.repository.user_repository import UserRepository
 
 load_dotenv()
 
+TABLES = ("users", "banks", "credit_cards", "card_spending_category", "authorized_user_info",
+          "user_spending_category")
+
+# "transaction" rolls each test back; "truncate" commits and truncates every table before each test
+ISOLATION = os.getenv("TEST_DB_ISOLATION", "transaction")
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "committed: the test's writes must be committed and visible to other connections, "
+        "so its tables are truncated instead of rolled back"
+    )
+    config.addinivalue_line(
+        "markers",
+        "no_database: the test never touches PostgreSQL, so no connection or cleanup is set up"
+    )
+
+def truncate_tables(conn):
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY CASCADE").format(
+            sql.SQL(", ").join(sql.Identifier(table) for table in TABLES)
+        ))
+    conn.commit()
+
+def clone_database(admin_url, template, name, attempts=10):
+    """CREATE DATABASE name from template, retrying while another worker is still copying it"""
+    with psycopg.connect(admin_url, autocommit=True) as conn:
+        conn.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(name)))
+        for attempt in range(attempts):
+            try:
+                conn.execute(sql.SQL("CREATE DATABASE {} TEMPLATE {}").format(
+                    sql.Identifier(name), sql.Identifier(template)
+                ))
+                return
+            except psycopg.errors.ObjectInUse:
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(0.2 * (attempt + 1))
+
+@pytest.fixture(scope="session")
+def test_db_url():
+    """TEST_DB_URL, or under pytest-xdist a copy of that migrated database for this worker alone"""
+    template_url = os.getenv("TEST_DB_URL")
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    if not worker:
+        with psycopg.connect(template_url) as conn:
+            truncate_tables(conn)
+        yield template_url
+        return
+
+    template = conninfo_to_dict(template_url)["dbname"]
+    name = f"{template}_{worker}"
+    admin_url = make_conninfo(template_url, dbname="postgres")
+    clone_database(admin_url, template, name)
+    worker_url = make_conninfo(template_url, dbname=name)
+    with psycopg.connect(worker_url) as conn:
+        truncate_tables(conn)
+    yield worker_url
+    with psycopg.connect(admin_url, autocommit=True) as conn:
+        conn.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(name)))
+
 @pytest.fixture
-def test_db_connection():
+def test_db_connection(test_db_url):
     """Create a test database connection"""
-    conn = psycopg.connect(os.getenv("TEST_DB_URL"))
+    conn = psycopg.connect(test_db_url)
     yield conn
     conn.close()
 
+@pytest.fixture
+def committed(request):
+    """Whether this test commits its writes rather than running in a rolled back transaction"""
+    return ISOLATION == "truncate" or request.node.get_closest_marker("committed") is not None
+
 @pytest.fixture(autouse=True)
-def clean_db(test_db_connection):
-    """Clean database before each test"""
+def clean_db(request, committed):
+    """Give each test empty tables and IDs starting from 1.
+
+    Normally the test runs inside a transaction on test_db_connection that is rolled back
+    afterwards. Tests marked committed get their tables truncated before and after instead,
+    and tests marked no_database are left alone.
+    """
+    if request.node.get_closest_marker("no_database") is not None:
+        yield None
+        return
+
+    test_db_connection = request.getfixturevalue("test_db_connection")
+    if committed:
+        truncate_tables(test_db_connection)
+        yield test_db_connection
+        truncate_tables(test_db_connection)
+        return
+
     with test_db_connection.cursor() as cur:
-        cur.execute("TRUNCATE users, banks, credit_cards, card_spending_category, authorized_user_info, user_spending_category RESTART IDENTITY CASCADE")
+        # setval is not transactional, so IDs restart at 1 for every test even though the inserts roll back
+        cur.execute("""
+            SELECT setval(pg_get_serial_sequence(table_name, 'id'), 1, false)
+            FROM unnest(%s::text[]) AS table_name
+        """, (list(TABLES),))
     test_db_connection.commit()
-    yield test_db_connection
+    with test_db_connection.transaction(force_rollback=True):
+        yield test_db_connection
 
 @pytest.fixture
-def user_repo():
+def repo_connection(test_db_connection, committed):
+    """Connection for repositories under test: the test's transaction, or None to let them commit"""
+    return None if committed else test_db_connection
+
+@pytest.fixture
+def user_repo(test_db_url, repo_connection):
     """Create UserRepository instance for testing"""
-    return UserRepository(os.getenv("TEST_DB_URL"))
+    return UserRepository(test_db_url, connection=repo_connection)
 
 @pytest.fixture
 def sample_user():
@@ -35,4 +131,9 @@ def sample_user():
         email="test@example.com",
         annual_income=50000,
         credit_score="good"
-    )
\ No newline at end of file
+    )
+
+@pytest.fixture
+def query_budget():
+    """Context manager failing the test if its block exceeds a query or round trip budget"""
+    return query_counter.query_budget
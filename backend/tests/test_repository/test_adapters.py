@@ -0,0 +1,250 @@
+import psycopg
+import pytest
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
+from psycopg.adapt import AdaptersMap, PyFormat, Transformer
+from psycopg.pq import Format
+from psycopg.types.enum import EnumInfo
+from psycopg.types.numeric import DecimalBinaryDumper
+from src.model.card import Bank
+from src.model.enums import CardType, CreditScoreRating, SpendingCategory
+from src.repository import adapters
+from src.repository.bank_repository import BankRepository
+
+NUMERIC_OID = psycopg.postgres.types["numeric"].oid
+
+class TestEnumAdapters():
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        adapters.clear_enum_cache()
+        yield
+        adapters.clear_enum_cache()
+
+    @pytest.fixture
+    def infos(self):
+        return {
+            "credit_score": EnumInfo("credit_score", 90001, 90002, [rating.value for rating in CreditScoreRating]),
+            "card_type": EnumInfo("card_type", 90003, 90004, [card_type.value for card_type in CardType]),
+        }
+
+    @pytest.fixture
+    def conn(self):
+        """Enough of a connection to register adapters on, without a database"""
+        return SimpleNamespace(adapters=AdaptersMap(psycopg.adapters), connection=None,
+                               info=SimpleNamespace(dsn="dbname=unused"))
+
+    @pytest.mark.no_database
+    @pytest.mark.parametrize("format", [Format.TEXT, Format.BINARY])
+    def test_values_load_into_python_enums(self, conn, infos, format):
+        """Test both wire formats decode enum labels straight to members"""
+        # Arrange
+        adapters.register_enums(conn, infos)
+        transformer = Transformer(conn)
+
+        # Act
+        loaded = transformer.get_loader(90001, format).load(b"excellent")
+
+        # Assert
+        assert loaded is CreditScoreRating.EXCELLENT
+
+    @pytest.mark.no_database
+    @pytest.mark.parametrize("format", [PyFormat.TEXT, PyFormat.BINARY])
+    def test_members_dump_as_labels(self, conn, infos, format):
+        """Test members are sent as their value, typed with the enum's OID"""
+        # Arrange
+        adapters.register_enums(conn, infos)
+
+        # Act
+        dumper = Transformer(conn).get_dumper(CardType.BUSINESS, format)
+
+        # Assert
+        assert bytes(dumper.dump(CardType.BUSINESS)) == b"business"
+        assert dumper.oid == 90003
+
+    @pytest.mark.no_database
+    def test_missing_types_are_skipped(self, conn, infos):
+        """Test enums the database doesn't have keep loading as strings"""
+        # Act
+        adapters.register_enums(conn, infos)
+
+        # Assert
+        assert conn.adapters.types.get("spending_category") is None
+        assert adapters.enums_registered(conn)
+
+    @pytest.mark.no_database
+    def test_enum_infos_are_fetched_once_per_database(self, conn, infos):
+        """Test later connections to the same database reuse the first lookup"""
+        # Arrange
+        other = SimpleNamespace(info=SimpleNamespace(dsn="dbname=other"))
+
+        # Act
+        with patch.object(adapters, "fetch_enum_infos", return_value=infos) as fetch:
+            adapters.enum_infos(conn)
+            adapters.enum_infos(conn)
+            adapters.enum_infos(other)
+
+        # Assert
+        assert fetch.call_count == 2
+
+    @pytest.mark.no_database
+    def test_shared_adapters_are_built_once_per_database(self, conn, infos):
+        """Test connections to one database share one map, and copying it matches registering directly"""
+        # Arrange
+        other = SimpleNamespace(adapters=AdaptersMap(psycopg.adapters), connection=None)
+        direct = SimpleNamespace(adapters=AdaptersMap(psycopg.adapters), connection=None)
+        adapters.register_enums(direct, infos)
+        adapters.register_numeric(direct, "float")
+
+        # Act
+        with patch.object(adapters, "fetch_enum_infos", return_value=infos), \
+                patch.object(adapters, "register_enum", wraps=adapters.register_enum) as register:
+            first = adapters.shared_adapters("dbname=unused", conn)
+            second = adapters.shared_adapters("dbname=unused", conn)
+        adapters.copy_adapters(first, other)
+
+        # Assert
+        assert first is second
+        assert register.call_count == len(infos)
+        for context in (other, direct):
+            transformer = Transformer(context)
+            assert transformer.get_loader(90001, Format.BINARY).load(b"good") is CreditScoreRating.GOOD
+            assert transformer.get_loader(NUMERIC_OID, Format.TEXT).load(b"1.25") == 1.25
+            assert bytes(transformer.get_dumper(CardType.BUSINESS, PyFormat.BINARY).dump(CardType.BUSINESS)) == \
+                b"business"
+            assert transformer.get_loader(90002, Format.TEXT).load(b"{good,fair}") == \
+                [CreditScoreRating.GOOD, CreditScoreRating.FAIR]
+
+    @pytest.mark.no_database
+    def test_connect_starts_from_the_shared_map(self, infos):
+        """Test only the first connection to a database builds adapters, and later ones are created from them"""
+        # Arrange
+        calls = []
+
+        class FakeConnection(SimpleNamespace):
+            """Can be weakly referenced and hashed, unlike SimpleNamespace"""
+            __hash__ = object.__hash__
+
+        def fake_connect(url, context=None, **kwargs):
+            calls.append(context)
+            return FakeConnection(adapters=AdaptersMap(context.adapters if context else psycopg.adapters),
+                                   connection=None, info=SimpleNamespace(dsn=url))
+
+        # Act
+        with patch.object(adapters.psycopg, "connect", fake_connect), \
+                patch.object(adapters, "fetch_enum_infos", return_value=infos) as fetch:
+            first = adapters.connect("dbname=shared")
+            second = adapters.connect("dbname=shared")
+
+        # Assert
+        assert calls[0] is None
+        assert calls[1] is adapters.shared_adapters("dbname=shared", first)
+        assert fetch.call_count == 1
+        for conn in (first, second):
+            assert Transformer(conn).get_loader(90001, Format.TEXT).load(b"fair") is CreditScoreRating.FAIR
+
+    def test_repository_rows_load_enums(self, test_db_connection, user_repo, sample_user):
+        """Test repository connections decode enum columns to Python enums in text and binary"""
+        # Arrange
+        user_repo.create_user(sample_user)
+        user_repo.set_spending_profile(1, {SpendingCategory.DINING: 100})
+        adapters.register_enums(test_db_connection)
+
+        # Act
+        with test_db_connection.cursor() as cur:
+            cur.execute("SELECT credit_score FROM users")
+            text_row = cur.fetchone()
+        with test_db_connection.cursor(binary=True) as cur:
+            cur.execute("SELECT category FROM user_spending_category WHERE category = %s", (SpendingCategory.DINING,))
+            binary_row = cur.fetchone()
+
+        # Assert
+        assert text_row[0] is CreditScoreRating.GOOD
+        assert binary_row[0] is SpendingCategory.DINING
+
+
+class TestNumericLoaders():
+
+    @pytest.fixture
+    def context(self):
+        return SimpleNamespace(adapters=AdaptersMap(psycopg.adapters), connection=None)
+
+    def load(self, context, value, format):
+        """Load a NUMERIC value the way the server would send it in the given format"""
+        if format == Format.BINARY:
+            data = bytes(DecimalBinaryDumper(Decimal).dump(Decimal(value)))
+        else:
+            data = value.encode()
+        return Transformer(context).get_loader(NUMERIC_OID, format).load(data)
+
+    @pytest.mark.no_database
+    @pytest.mark.parametrize("format", [Format.TEXT, Format.BINARY])
+    @pytest.mark.parametrize("value", ["1.25", "-0.035", "12345678.901", "100", "0.0001", "0"])
+    def test_float_matches_decimal(self, context, format, value):
+        """Test floats come out exactly as converting the Decimal would give"""
+        # Arrange
+        adapters.register_numeric(context, "float")
+
+        # Act
+        loaded = self.load(context, value, format)
+
+        # Assert
+        assert type(loaded) is float
+        assert loaded == float(Decimal(value))
+
+    @pytest.mark.no_database
+    @pytest.mark.parametrize("format", [Format.TEXT, Format.BINARY])
+    @pytest.mark.parametrize("value, cents", [
+        ("1.25", 125), ("-0.25", -25), ("-1.5", -150), ("100", 10000), ("0.005", 1), ("-0.035", -4), ("0.0049", 0),
+        ("12345678.901", 1234567890),
+    ])
+    def test_scaled_rounds_half_away_from_zero(self, context, format, value, cents):
+        """Test scaled integers round the dropped digits like PostgreSQL's round()"""
+        # Arrange
+        adapters.register_numeric(context, "scaled", scale=2)
+
+        # Act / Assert
+        assert self.load(context, value, format) == cents
+
+    @pytest.mark.no_database
+    @pytest.mark.parametrize("format", [Format.TEXT, Format.BINARY])
+    def test_scaled_refuses_nan(self, context, format):
+        """Test NaN has no integer form"""
+        # Arrange
+        adapters.register_numeric(context, "scaled")
+
+        # Act / Assert
+        with pytest.raises(psycopg.DataError):
+            self.load(context, "NaN", format)
+
+    @pytest.mark.no_database
+    def test_decimal_and_unknown_modes(self, context):
+        """Test decimal restores psycopg's default and unknown modes are refused"""
+        # Arrange
+        adapters.register_numeric(context, "float")
+
+        # Act
+        adapters.register_numeric(context, "decimal")
+
+        # Assert
+        assert self.load(context, "0.030", Format.TEXT) == Decimal("0.030")
+        with pytest.raises(ValueError):
+            adapters.register_numeric(context, "money")
+
+    def test_repository_rows_load_floats(self, test_db_connection, test_db_url, repo_connection):
+        """Test DECIMAL columns reach repository code as floats"""
+        # Arrange
+        bank_repo = BankRepository(test_db_url, connection=repo_connection)
+        bank_repo.create_bank(Bank(name="Chase", relationship_bank=True, transfer_points_value_cents=1.25,
+                                   reports_under_eighteen=False))
+        adapters.configure_connection(test_db_connection)
+
+        # Act
+        with test_db_connection.cursor() as cur:
+            cur.execute("SELECT transfer_points_value_cents FROM banks")
+            row = cur.fetchone()
+
+        # Assert
+        assert row[0] == 1.25
+        assert type(row[0]) is float
@@ -1,42 +1,25 @@
-import pytest, psycopg, os
+import pytest
 from datetime import datetime
-from dotenv import load_dotenv
 from src.repository.authorized_user_repository import AuthorizedUserRepository
 from src.repository.user_repository import UserRepository
 from src.repository.bank_repository import BankRepository
 from src.model.user import AuthorizedUserInfo, User
 from src.model.card import Bank
 
-load_dotenv()
 
 class TestAuthorizedUserRepository():
 
     @pytest.fixture
-    def test_db_connection(self):
-        """Create a test database connection"""
-        conn = psycopg.connect(os.getenv("TEST_DB_URL"))
-        yield conn
-        conn.close()
-
-    @pytest.fixture()
-    def clean_db(self, test_db_connection):
-        """Clean database before each test"""
-        with test_db_connection.cursor() as cur:
-            cur.execute("TRUNCATE users, banks, credit_cards, card_spending_category, authorized_user_info, user_spending_category RESTART IDENTITY CASCADE")
-        test_db_connection.commit()
-        yield test_db_connection
+    def au_repo(self, test_db_url, repo_connection):
+        return AuthorizedUserRepository(test_db_url, connection=repo_connection)
 
     @pytest.fixture
-    def au_repo(self):
-        return AuthorizedUserRepository(os.getenv("TEST_DB_URL"))
+    def user_repo(self, test_db_url, repo_connection):
+        return UserRepository(test_db_url, connection=repo_connection)
 
     @pytest.fixture
-    def user_repo(self):
-        return UserRepository(os.getenv("TEST_DB_URL"))
-
-    @pytest.fixture
-    def bank_repo(self):
-        return BankRepository(os.getenv("TEST_DB_URL"))
+    def bank_repo(self, test_db_url, repo_connection):
+        return BankRepository(test_db_url, connection=repo_connection)
 
     @pytest.fixture
     def db_with_user_and_bank(self, clean_db, user_repo, bank_repo):
@@ -485,15 +468,12 @@ class TestAuthorizedUserRepository():
         assert result_true.add_after_age_eighteen is True
         assert result_false.add_after_age_eighteen is False
 
-    def test_update_info_all_fields(self, au_repo, clean_db, db_with_user_and_bank):
+    def test_update_info_all_fields(self, au_repo, user_repo, bank_repo, clean_db, db_with_user_and_bank):
         """Test updating all fields of authorized user info"""
         # Arrange
         user, bank = db_with_user_and_bank
         
         # Create another user and bank for testing
-        user_repo = UserRepository(os.getenv("TEST_DB_URL"))
-        bank_repo = BankRepository(os.getenv("TEST_DB_URL"))
-        
         user2 = User(name="User 2", email="user2@example.com", credit_score='none', annual_income=40000)
         bank2 = Bank(name="Bank 2", relationship_bank=False, reports_under_eighteen=True)
         
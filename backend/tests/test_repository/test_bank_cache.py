@@ -0,0 +1,117 @@
+import pytest
+from unittest.mock import patch
+from src.model.card import Bank
+from src.repository.bank_cache import BankCache
+from src.repository.bank_repository import BankRepository
+
+pytestmark = pytest.mark.no_database
+
+class TestBankCache():
+
+    @pytest.fixture
+    def banks(self):
+        return [
+            Bank(id=1, name="Amex", relationship_bank=False, reports_under_eighteen=True),
+            Bank(id=2, name="Chase", relationship_bank=True, transfer_points_value_cents=1.25,
+                 reports_under_eighteen=False),
+        ]
+
+    @pytest.fixture
+    def loads(self):
+        return []
+
+    @pytest.fixture
+    def load(self, banks, loads):
+        def load():
+            loads.append(1)
+            return banks
+        return load
+
+    @pytest.fixture
+    def cache(self):
+        """A cache whose listener is treated as connected, without a database"""
+        cache = BankCache("postgresql://unused")
+        with patch.object(BankCache, "start", return_value=cache):
+            cache._listening.set()
+            yield cache
+
+    def test_snapshot_is_loaded_once(self, cache, load, loads):
+        """Test repeated reads are served from the same snapshot"""
+        # Act
+        first = cache.snapshot(load)
+        second = cache.snapshot(load)
+
+        # Assert
+        assert first is second
+        assert loads == [1]
+        assert set(first.by_id) == {1, 2}
+        assert [bank.name for bank in first.relationship] == ["Chase"]
+
+    def test_invalidate_reloads(self, cache, load, loads):
+        """Test a notification drops the snapshot"""
+        # Arrange
+        cache.snapshot(load)
+
+        # Act
+        cache.invalidate()
+        cache.snapshot(load)
+
+        # Assert
+        assert loads == [1, 1]
+
+    def test_not_listening_falls_back(self, cache, load, loads):
+        """Test nothing is served from memory without a live listener"""
+        # Arrange
+        cache._listening.clear()
+
+        # Act
+        result = cache.snapshot(load)
+
+        # Assert
+        assert result is None
+        assert loads == []
+
+    def test_load_racing_invalidation_is_not_kept(self, cache, banks, loads):
+        """Test a snapshot loaded across a notification is used once but not stored"""
+        # Arrange
+        def racing_load():
+            loads.append(1)
+            cache.invalidate()
+            return banks
+
+        # Act
+        result = cache.snapshot(racing_load)
+
+        # Assert
+        assert result is not None
+        assert cache._snapshot is None
+
+    def test_repository_reads_from_cache(self, cache, banks):
+        """Test BankRepository lookups are answered by the snapshot"""
+        # Arrange
+        repo = BankRepository("postgresql://unused", cache=cache)
+        cache.snapshot(lambda: banks)
+
+        # Act
+        by_id = repo.get_bank_by_id(2)
+        by_id.name = "Changed"
+
+        # Assert
+        assert repo.get_bank_by_id(2).name == "Chase"
+        assert repo.get_bank_by_id(99) is None
+        assert repo.get_bank_by_name("Amex").id == 1
+        assert repo.bank_exists(1)
+        assert not repo.bank_exists(99)
+        assert [bank.id for bank in repo.get_relationship_banks()] == [2]
+        assert [bank.id for bank in repo.get_banks_by_ids([2, 1, 99])] == [1, 2]
+
+    def test_bound_repository_skips_cache(self, cache):
+        """Test a repository inside a transaction never reads the shared snapshot"""
+        # Arrange
+        repo = BankRepository("postgresql://unused", connection=object(), cache=cache)
+
+        # Act
+        result = repo._cached()
+
+        # Assert
+        assert result is None
@@ -1,32 +1,17 @@
-import pytest, psycopg, os
+import pytest, time
 from unittest.mock import Mock, patch
 from datetime import datetime
-from dotenv import load_dotenv
+from src.repository import instrumentation
+from src.repository.bank_cache import BankCache
 from src.repository.bank_repository import BankRepository
 from src.model.card import Bank
 
-load_dotenv()
 
 class TestBankRepository():
 
     @pytest.fixture
-    def test_db_connection(self):
-        """Create a test database connection"""
-        conn = psycopg.connect(os.getenv("TEST_DB_URL"))
-        yield conn
-        conn.close()
-
-    @pytest.fixture()
-    def clean_db(self, test_db_connection):
-        """Clean database before each test"""
-        with test_db_connection.cursor() as cur:
-            cur.execute("TRUNCATE users, banks, credit_cards, card_spending_category, authorized_user_info, user_spending_category RESTART IDENTITY CASCADE")
-        test_db_connection.commit()
-        yield test_db_connection
-
-    @pytest.fixture
-    def bank_repo(self):
-        return BankRepository(os.getenv("TEST_DB_URL"))
+    def bank_repo(self, test_db_url, repo_connection):
+        return BankRepository(test_db_url, connection=repo_connection)
     
     @pytest.fixture
     def model_bank(self):
@@ -501,4 +486,89 @@ class TestBankRepository():
         assert len(result) == 3
         assert result[0].name == "Alpha Bank"
         assert result[1].name == "Beta Bank"
-        assert result[2].name == "Zebra Bank"
\ No newline at end of file
+        assert result[2].name == "Zebra Bank"
+    def test_get_banks_by_ids(self, bank_repo, clean_db):
+        """Test getting several banks by ID in one call"""
+        # Arrange
+        created = [
+            bank_repo.create_bank(Bank(name=name, relationship_bank=False, reports_under_eighteen=False))
+            for name in ["Bank A", "Bank B", "Bank C"]
+        ]
+
+        # Act
+        result = bank_repo.get_banks_by_ids([created[2].id, created[0].id, 99999])
+
+        # Assert
+        assert [bank.name for bank in result] == ["Bank A", "Bank C"]
+
+    def test_patch_bank_success(self, bank_repo, clean_db, model_bank):
+        """Test patching a single bank field"""
+        # Arrange
+        created_bank = bank_repo.create_bank(model_bank)
+
+        # Act
+        result = bank_repo.patch_bank(created_bank.id, {"transfer_points_value_cents": 1.5})
+
+        # Assert
+        assert result.id == created_bank.id
+        assert result.name == "Chase"
+        assert result.transfer_points_value_cents == 1.5
+        assert result.relationship_bank is True
+
+    def test_patch_bank_not_found(self, bank_repo, clean_db):
+        """Test patching a bank that doesn't exist"""
+        # Act
+        result = bank_repo.patch_bank(99999, {"name": "Nobody"})
+
+        # Assert
+        assert result is None
+
+    @pytest.mark.committed
+    def test_cached_reads_follow_other_writers(self, test_db_url, clean_db, model_bank):
+        """Test a cached repository sees changes made through another connection"""
+        # Arrange
+        cache = BankCache(test_db_url, poll_timeout=0.05)
+        cached_repo = BankRepository(test_db_url, cache=cache)
+        writer = BankRepository(test_db_url)
+        created_bank = writer.create_bank(model_bank)
+        cache.start()
+        deadline = time.monotonic() + 5
+        while not cache.listening and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cached_repo.get_bank_by_id(created_bank.id).name == "Chase"
+
+        # Act
+        writer.patch_bank(created_bank.id, {"name": "Chase Sapphire"})
+        deadline = time.monotonic() + 5
+        while cached_repo.get_bank_by_id(created_bank.id).name == "Chase" and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # Assert
+        try:
+            assert cached_repo.get_bank_by_id(created_bank.id).name == "Chase Sapphire"
+            assert cached_repo.get_bank_by_name("Chase") is None
+            assert cached_repo.bank_exists(created_bank.id)
+        finally:
+            cache.close()
+
+    @pytest.mark.committed
+    def test_instrumentation_records_timings_and_rows(self, bank_repo, clean_db, model_bank):
+        """Test instrumented calls record acquire, execute and fetch time and rows"""
+        # Arrange
+        bank_repo.create_bank(model_bank)
+        instrumentation.reset()
+        instrumentation.enable()
+
+        # Act
+        try:
+            bank_repo.get_all_banks()
+        finally:
+            instrumentation.disable()
+
+        # Assert
+        stats = instrumentation.stats()["BankRepository.get_all_banks"]
+        instrumentation.reset()
+        assert stats.calls == 1
+        assert stats.rows.total == 1
+        assert stats.acquire.total > 0
+        assert stats.execute.total > 0
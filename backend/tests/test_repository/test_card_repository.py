@@ -1,26 +1,20 @@
-import pytest, psycopg, os
+import pytest
+import psycopg
 from unittest.mock import Mock, patch
 from datetime import datetime
-from dotenv import load_dotenv
-from src.model.enums import CardType, RewardStructure
+from src.model.enums import CardType, RewardStructure, SpendingCategory
 from src.repository.card_repository import CardRepository
 from src.repository.bank_repository import BankRepository
-from src.model.card import Bank, Card
+from src.repository.query_cache import QueryCache
+from src.model.batch import CardBatch
+from src.model.card import Bank, Card, SpendingCategoryInfo
 
-load_dotenv()
 
 class TestCardRepository():
 
     @pytest.fixture
-    def test_db_connection(self):
-        """Create a test database connection"""
-        conn = psycopg.connect(os.getenv("TEST_DB_URL"))
-        yield conn
-        conn.close()
-
-    @pytest.fixture
-    def card_repo(self):
-        return CardRepository(os.getenv("TEST_DB_URL"))
+    def card_repo(self, test_db_url, repo_connection):
+        return CardRepository(test_db_url, connection=repo_connection)
     
 
     @pytest.fixture
@@ -39,17 +33,9 @@ class TestCardRepository():
     )
     
     
-    @pytest.fixture()
-    def clean_db(self, test_db_connection):
-        """Clean database before each test"""
-        with test_db_connection.cursor() as cur:
-            cur.execute("TRUNCATE users, banks, credit_cards, card_spending_category, authorized_user_info, user_spending_category RESTART IDENTITY CASCADE")
-        test_db_connection.commit()
-        yield test_db_connection
-
     @pytest.fixture
-    def db_with_bank(self):
-        bank_repo = BankRepository(database_url=os.getenv("TEST_DB_URL"))
+    def db_with_bank(self, test_db_url, repo_connection):
+        bank_repo = BankRepository(database_url=test_db_url, connection=repo_connection)
         bank: Bank = Bank(
             name="Chase",
             relationship_bank=True,
@@ -575,4 +561,202 @@ class TestCardRepository():
         result = card_repo.get_cards_by_fee_range(min_fee=1000, max_fee=2000)
         
         # Assert
-        assert result == []
\ No newline at end of file
+        assert result == []
+    def test_search_cards_combined_filters(self, card_repo, clean_db, db_with_bank):
+        """Test searching cards with several filters at once"""
+        # Arrange
+        card_repo.create_card(Card(name="Student Cash", bank_id=1, card_type=CardType.STUDENT,
+                                   annual_fee=0, reward_structure=RewardStructure.CASHBACK))
+        card_repo.create_card(Card(name="Student Points", bank_id=1, card_type=CardType.STUDENT,
+                                   annual_fee=0, reward_structure=RewardStructure.POINTS))
+        card_repo.create_card(Card(name="Premium Points", bank_id=1, card_type=CardType.GENERAL,
+                                   annual_fee=550, reward_structure=RewardStructure.POINTS))
+
+        # Act
+        result = card_repo.search_cards(reward_structure=RewardStructure.POINTS, max_fee=100)
+
+        # Assert
+        assert len(result) == 1
+        assert result[0].name == "Student Points"
+
+    def test_search_cards_no_filters_ordered_by_name(self, card_repo, clean_db, db_with_bank):
+        """Test searching without filters returns every card ordered by name"""
+        # Arrange
+        for name in ["Zeta Card", "Alpha Card"]:
+            card_repo.create_card(Card(name=name, bank_id=1, card_type=CardType.GENERAL,
+                                       reward_structure=RewardStructure.CASHBACK))
+
+        # Act
+        result = card_repo.search_cards()
+
+        # Assert
+        assert [card.name for card in result] == ["Alpha Card", "Zeta Card"]
+
+    def test_add_and_get_spending_categories(self, card_repo, clean_db, db_with_bank, model_card):
+        """Test adding reward categories to a card and reading them back"""
+        # Arrange
+        card = card_repo.create_card(model_card)
+
+        # Act
+        added = card_repo.add_spending_category(SpendingCategoryInfo(
+            card_id=card.id,
+            category=SpendingCategory.DINING,
+            rate=3.0,
+            cap=6000,
+            quarterly_rotating=False
+        ))
+        result = card_repo.get_spending_categories_by_card(card.id)
+
+        # Assert
+        assert added.id is not None
+        assert len(result) == 1
+        assert result[0].id == added.id
+        assert result[0].category == SpendingCategory.DINING
+        assert result[0].rate == 3.0
+        assert result[0].cap == 6000
+
+    def test_catalog_version_changes_on_write(self, card_repo, clean_db, db_with_bank, model_card):
+        """Test the catalog version moves when a card is written"""
+        # Arrange
+        before = card_repo.get_catalog_version()
+
+        # Act
+        card_repo.create_card(model_card)
+        after = card_repo.get_catalog_version()
+
+        # Assert
+        assert after > before
+
+    def test_iter_all_cards_streams_in_id_order(self, card_repo, clean_db, db_with_bank):
+        """Test streaming every card through the server-side cursor"""
+        # Arrange
+        for name in ["Zeta Card", "Alpha Card", "Mid Card"]:
+            card_repo.create_card(Card(name=name, bank_id=1, card_type=CardType.GENERAL,
+                                       reward_structure=RewardStructure.CASHBACK))
+
+        # Act
+        result = list(card_repo.iter_all_cards(batch_size=2))
+
+        # Assert
+        assert [card.name for card in result] == ["Zeta Card", "Alpha Card", "Mid Card"]
+        assert all(isinstance(card, Card) for card in result)
+
+    def test_get_all_cards_batch_matches_get_all_cards(self, card_repo, clean_db, db_with_bank):
+        """Test the columnar scan holds the same cards, in the same order, as the list scan"""
+        # Arrange
+        for name, fee in [("Zeta Card", 95), ("Alpha Card", 0), ("Mid Card", 550)]:
+            card_repo.create_card(Card(name=name, bank_id=1, card_type=CardType.GENERAL, annual_fee=fee,
+                                       foreign_transaction_fee=0.03, reward_structure=RewardStructure.CASHBACK))
+
+        # Act
+        result = card_repo.get_all_cards_batch(limit=2, offset=1)
+
+        # Assert
+        assert isinstance(result, CardBatch)
+        assert result.to_models() == card_repo.get_all_cards(limit=2, offset=1)
+        assert list(result.column("annual_fee")) == [card.annual_fee for card in result]
+
+    def test_sync_catalog_inserts_updates_and_deletes(self, card_repo, clean_db, db_with_bank):
+        """Test syncing a feed reports inserted, updated, unchanged and deleted cards"""
+        # Arrange
+        feed = [
+            Card(name="Card A", bank_id=1, card_type=CardType.GENERAL, annual_fee=0,
+                 reward_structure=RewardStructure.CASHBACK),
+            Card(name="Card B", bank_id=1, card_type=CardType.STUDENT, annual_fee=0,
+                 reward_structure=RewardStructure.POINTS),
+            Card(name="Card C", bank_id=1, card_type=CardType.GENERAL, annual_fee=95,
+                 reward_structure=RewardStructure.POINTS)
+        ]
+        first = card_repo.sync_catalog(feed)
+
+        feed[0].annual_fee = 39
+        del feed[2]
+
+        # Act
+        second = card_repo.sync_catalog(feed)
+
+        # Assert
+        assert (first.inserted, first.updated, first.unchanged, first.deleted) == (3, 0, 0, 0)
+        assert (second.inserted, second.updated, second.unchanged, second.deleted) == (0, 1, 1, 1)
+        cards = card_repo.get_all_cards()
+        assert sorted(card.name for card in cards) == ["Card A", "Card B"]
+        assert card_repo.search_cards(min_fee=1)[0].annual_fee == 39
+
+    def test_sync_catalog_is_idempotent(self, card_repo, clean_db, db_with_bank, model_card):
+        """Test syncing the same feed twice changes nothing the second time"""
+        # Arrange
+        card_repo.sync_catalog([model_card])
+
+        # Act
+        result = card_repo.sync_catalog([model_card])
+
+        # Assert
+        assert (result.inserted, result.updated, result.unchanged, result.deleted) == (0, 0, 1, 0)
+
+    def test_sync_catalog_empty_feed(self, card_repo, clean_db):
+        """Test an empty feed is refused instead of deleting the catalog"""
+        with pytest.raises(ValueError):
+            card_repo.sync_catalog([])
+
+    def test_sync_catalog_failing_feed(self, card_repo, clean_db, db_with_bank, model_card):
+        """Test a feed with one bad row leaves the stored cards as they were"""
+        # Arrange
+        card_repo.sync_catalog([model_card])
+        feed = [
+            Card(name="Card A", bank_id=1, card_type=CardType.GENERAL, annual_fee=0,
+                 reward_structure=RewardStructure.CASHBACK),
+            Card(name="Card B", bank_id=999, card_type=CardType.GENERAL, annual_fee=0,
+                 reward_structure=RewardStructure.CASHBACK)
+        ]
+
+        # Act
+        with pytest.raises(psycopg.errors.ForeignKeyViolation):
+            card_repo.sync_catalog(feed)
+
+        # Assert
+        assert [card.name for card in card_repo.get_all_cards()] == [model_card.name]
+
+    def test_patch_card_success(self, card_repo, clean_db, db_with_bank, model_card):
+        """Test patching card fields leaves the others alone"""
+        # Arrange
+        created_card = card_repo.create_card(model_card)
+
+        # Act
+        result = card_repo.patch_card(created_card.id, {"annual_fee": 0, "card_type": CardType.STUDENT})
+
+        # Assert
+        assert result.id == created_card.id
+        assert result.annual_fee == 0
+        assert result.card_type == CardType.STUDENT
+        assert result.name == created_card.name
+        assert result.sub_max_value == created_card.sub_max_value
+
+    def test_patch_card_invalid_value(self, card_repo, clean_db, db_with_bank, model_card):
+        """Test patching with a value the model rejects"""
+        # Arrange
+        created_card = card_repo.create_card(model_card)
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            card_repo.patch_card(created_card.id, {"card_type": "platinum"})
+
+    @pytest.mark.committed
+    def test_cached_reads_until_table_changes(self, test_db_url, clean_db, db_with_bank, model_card):
+        """Test cached results are reused until a write bumps the table version"""
+        # Arrange
+        query_cache = QueryCache()
+        cached_repo = CardRepository(test_db_url, query_cache=query_cache)
+        writer = CardRepository(test_db_url)
+        writer.create_card(model_card)
+
+        # Act
+        first = cached_repo.get_cards_by_type(CardType.GENERAL)
+        second = cached_repo.get_cards_by_type(CardType.GENERAL)
+        writer.patch_card(first[0].id, {"name": "Chase Sapphire Reserve"})
+        third = cached_repo.get_cards_by_type(CardType.GENERAL)
+
+        # Assert
+        assert [card.name for card in second] == ["Chase Sapphire Preferred"]
+        assert [card.name for card in third] == ["Chase Sapphire Reserve"]
+        assert query_cache.hits == 1
+        assert query_cache.misses == 2
@@ -0,0 +1,111 @@
+import pytest
+from unittest.mock import MagicMock
+from src.repository import instrumentation
+from src.repository.bank_repository import BankRepository
+from src.repository.card_repository import CardRepository
+
+pytestmark = pytest.mark.no_database
+
+class TestInstrumentation():
+
+    @pytest.fixture
+    def enabled(self):
+        instrumentation.reset()
+        instrumentation.enable()
+        yield
+        instrumentation.disable()
+        instrumentation.reset()
+
+    @pytest.fixture
+    def conn(self):
+        return MagicMock()
+
+    def test_histogram_percentiles(self):
+        """Test percentiles report the bucket bound holding that share of values"""
+        # Arrange
+        histogram = instrumentation.Histogram((1, 2, 4, 8))
+        for value in (0.5, 1.5, 1.5, 3, 100):
+            histogram.observe(value)
+
+        # Act / Assert
+        assert histogram.count == 5
+        assert histogram.percentile(0.5) == 2
+        assert histogram.percentile(0.99) == 100
+        assert histogram.mean == pytest.approx(21.3)
+
+    def test_disabled_leaves_methods_untouched(self):
+        """Test nothing is wrapped unless instrumentation is enabled"""
+        # Arrange
+        original = BankRepository.__dict__["bank_exists"]
+
+        # Act
+        instrumentation.enable()
+        wrapped = BankRepository.__dict__["bank_exists"]
+        instrumentation.disable()
+
+        # Assert
+        assert wrapped is not original
+        assert BankRepository.__dict__["bank_exists"] is original
+
+    def test_records_calls_and_errors(self, enabled, conn):
+        """Test every call is counted and failures are counted as errors"""
+        # Arrange
+        repo = BankRepository(connection=conn)
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = (1,)
+
+        # Act
+        repo.bank_exists(1)
+        cursor.execute.side_effect = RuntimeError("database down")
+        with pytest.raises(RuntimeError):
+            repo.bank_exists(2)
+
+        # Assert
+        stats = instrumentation.stats()["BankRepository.bank_exists"]
+        assert stats.calls == 2
+        assert stats.errors == 1
+        assert stats.total.count == 2
+
+    def test_nested_calls_count_once(self, enabled, conn):
+        """Test a repository method called by another is attributed to the outer call"""
+        # Arrange
+        repo = BankRepository(connection=conn)
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = []
+
+        # Act
+        repo.get_banks_by_ids([1, 2])
+
+        # Assert
+        assert list(instrumentation.stats()) == ["BankRepository.get_banks_by_ids"]
+
+    def test_generator_methods_are_recorded(self, enabled, conn):
+        """Test streaming methods are recorded when the stream finishes"""
+        # Arrange
+        repo = CardRepository(connection=conn)
+
+        # Act
+        rows = list(repo.iter_all_cards())
+
+        # Assert
+        assert rows == []
+        assert instrumentation.stats()["CardRepository.iter_all_cards"].calls == 1
+
+    def test_exporters_receive_stats(self, conn):
+        """Test export hands the stats to every exporter"""
+        # Arrange
+        exporter = MagicMock()
+        instrumentation.reset()
+        instrumentation.enable([exporter])
+        try:
+            BankRepository(connection=conn).bank_exists(1)
+
+            # Act
+            instrumentation.export()
+        finally:
+            instrumentation.disable()
+            instrumentation.reset()
+
+        # Assert
+        exported = exporter.export.call_args.args[0]
+        assert exported["BankRepository.bank_exists"].calls == 1
@@ -0,0 +1,493 @@
+import inspect
+from datetime import datetime
+import psycopg
+import pytest
+from src.model.card import Bank, Card, SpendingCategoryInfo
+from src.model.enums import CardType, CreditScoreRating, RewardStructure, SpendingCategory
+from src.model.user import AnonymisedUser, AuthorizedUserInfo, SpendingCategoryUser, User
+from src.repository.authorized_user_repository import AuthorizedUserRepository
+from src.repository.bank_repository import BankRepository
+from src.repository.base import BaseRepository
+from src.repository.card_repository import CardRepository
+from src.repository.memory import (MemoryAuthorizedUserRepository, MemoryBankRepository, MemoryCardRepository,
+                                   MemoryStore, MemoryUserRepository, Table)
+from src.repository.protocols import AuthorizedUserStore, BankStore, CardStore, UserStore
+from src.repository.user_repository import UserRepository
+
+pytestmark = pytest.mark.no_database
+
+class TestMemoryRepository():
+
+    @pytest.fixture
+    def store(self):
+        return MemoryStore()
+
+    @pytest.fixture
+    def bank_repo(self, store):
+        return MemoryBankRepository(store)
+
+    @pytest.fixture
+    def card_repo(self, store):
+        return MemoryCardRepository(store)
+
+    @pytest.fixture
+    def user_repo(self, store):
+        return MemoryUserRepository(store)
+
+    @pytest.fixture
+    def au_repo(self, store):
+        return MemoryAuthorizedUserRepository(store)
+
+    @pytest.fixture
+    def banks(self, bank_repo):
+        return [
+            bank_repo.create_bank(Bank(name="Chase", relationship_bank=True, transfer_points_value_cents=1.25,
+                                       reports_under_eighteen=False)),
+            bank_repo.create_bank(Bank(name="Amex", relationship_bank=False, transfer_points_value_cents=2.004,
+                                       reports_under_eighteen=True))
+        ]
+
+    @pytest.fixture
+    def cards(self, card_repo, banks):
+        return [
+            card_repo.create_card(Card(name="Sapphire", bank_id=banks[0].id, card_type=CardType.GENERAL,
+                                       annual_fee=95, reward_structure=RewardStructure.POINTS)),
+            card_repo.create_card(Card(name="Freedom", bank_id=banks[0].id, card_type=CardType.GENERAL,
+                                       reward_structure=RewardStructure.CASHBACK, sub_max_value=200)),
+            card_repo.create_card(Card(name="Gold", bank_id=banks[1].id, card_type=CardType.GENERAL,
+                                       annual_fee=250, reward_structure=RewardStructure.POINTS,
+                                       foreign_transaction_fee=0.0304))
+        ]
+
+    @pytest.fixture
+    def user(self, user_repo):
+        return user_repo.create_user(User(name="Test User", email="test@example.com", annual_income=50000,
+                                          credit_score=CreditScoreRating.GOOD))
+
+    @pytest.mark.parametrize("protocol, sql_class, memory_class", [
+        (BankStore, BankRepository, MemoryBankRepository),
+        (CardStore, CardRepository, MemoryCardRepository),
+        (UserStore, UserRepository, MemoryUserRepository),
+        (AuthorizedUserStore, AuthorizedUserRepository, MemoryAuthorizedUserRepository),
+    ])
+    def test_both_backends_satisfy_the_protocol(self, protocol, sql_class, memory_class):
+        """Test both backends implement every protocol method with its signature, and nothing public beyond it"""
+        # Arrange
+        methods = {name for name, _ in inspect.getmembers(protocol, inspect.isfunction) if not name.startswith("_")}
+
+        # Assert
+        assert not issubclass(memory_class, BaseRepository)
+        for backend in (sql_class, memory_class):
+            public = {name for name, _ in inspect.getmembers(backend, inspect.isfunction) if not name.startswith("_")}
+            assert public == methods, backend.__name__
+            for name in methods:
+                assert inspect.signature(getattr(backend, name)) == inspect.signature(getattr(protocol, name)), name
+
+    def test_create_assigns_ids_and_created_at(self, cards):
+        """Test created rows get serial IDs and a timestamp on the passed object"""
+        # Assert
+        assert [card.id for card in cards] == [1, 2, 3]
+        assert all(card.created_at is not None for card in cards)
+
+    def test_results_are_copies(self, card_repo, cards):
+        """Test mutating a returned card does not change the stored row"""
+        # Act
+        card_repo.get_card_by_id(cards[0].id).name = "Changed"
+
+        # Assert
+        assert card_repo.get_card_by_id(cards[0].id).name == "Sapphire"
+
+    def test_orderings_match_sql(self, bank_repo, card_repo, banks, cards):
+        """Test each query returns rows in its ORDER BY order"""
+        # Act / Assert
+        assert [bank.name for bank in bank_repo.get_all_banks()] == ["Amex", "Chase"]
+        assert [bank.name for bank in bank_repo.get_banks_with_transfer_points()] == ["Amex", "Chase"]
+        assert [card.name for card in card_repo.get_cards_by_bank(banks[0].id)] == ["Freedom", "Sapphire"]
+        assert [card.name for card in card_repo.get_cards_by_fee_range(0, 100)] == ["Freedom", "Sapphire"]
+        assert [card.id for card in card_repo.get_all_cards()] == [3, 2, 1]
+        assert [card.name for card in card_repo.search_cards(reward_structure=RewardStructure.POINTS)] == \
+            ["Gold", "Sapphire"]
+
+    def test_created_at_ties_break_by_id(self, store, card_repo, au_repo, banks, user):
+        """Test rows written in one transaction, so with the same created_at, come newest ID first"""
+        # Arrange
+        store.now = lambda: datetime(2024, 1, 1)
+        for name in ["First", "Second"]:
+            card_repo.create_card(Card(name=name, bank_id=banks[0].id, card_type=CardType.GENERAL,
+                                       reward_structure=RewardStructure.CASHBACK))
+            au_repo.add_info(AuthorizedUserInfo(user_id=user.id, bank_id=banks[0].id, add_after_age_eighteen=True))
+
+        # Act / Assert
+        assert [card.name for card in card_repo.get_all_cards()] == ["Second", "First"]
+        assert [info.id for info in au_repo.get_all_info_by_user(user.id)] == [2, 1]
+        assert [info.id for info in au_repo.get_all_info()] == [2, 1]
+
+    def test_pagination(self, card_repo, cards):
+        """Test limit and offset page through the ordered rows"""
+        # Act / Assert
+        assert [card.id for card in card_repo.get_all_cards(limit=2)] == [3, 2]
+        assert [card.id for card in card_repo.get_all_cards(limit=2, offset=2)] == [1]
+        assert [card.id for card in card_repo.get_all_cards(offset=1)] == [2, 1]
+
+    def test_numeric_columns_are_rounded(self, bank_repo, card_repo, banks, cards):
+        """Test values are stored at the scale of their DECIMAL column"""
+        # Act / Assert
+        assert bank_repo.get_bank_by_id(banks[1].id).transfer_points_value_cents == 2.0
+        assert card_repo.get_card_by_id(cards[2].id).foreign_transaction_fee == 0.03
+
+    def test_unique_name(self, card_repo, cards):
+        """Test a second card with the same name is refused and uses up an ID"""
+        # Act
+        with pytest.raises(psycopg.errors.UniqueViolation):
+            card_repo.create_card(cards[0].model_copy(update={"id": None}))
+        created = card_repo.create_card(cards[0].model_copy(update={"id": None, "name": "Ink"}))
+
+        # Assert
+        assert created.id == 5
+
+    def test_foreign_keys(self, card_repo, bank_repo, banks, cards):
+        """Test unknown references and deleting a referenced bank are refused"""
+        # Act / Assert
+        with pytest.raises(psycopg.errors.ForeignKeyViolation):
+            card_repo.create_card(Card(name="Orphan", bank_id=99, card_type=CardType.GENERAL,
+                                       reward_structure=RewardStructure.POINTS))
+        with pytest.raises(psycopg.errors.ForeignKeyViolation):
+            bank_repo.delete_bank(banks[0].id)
+        assert bank_repo.bank_exists(banks[0].id)
+
+    def test_not_null(self, card_repo, banks):
+        """Test a NULL foreign transaction fee is refused as the column is NOT NULL"""
+        # Act / Assert
+        with pytest.raises(psycopg.errors.NotNullViolation):
+            card_repo.create_card(Card(name="Null Fee", bank_id=banks[0].id, card_type=CardType.GENERAL,
+                                       reward_structure=RewardStructure.POINTS, foreign_transaction_fee=None))
+
+    def test_delete_card_cascades_to_categories(self, card_repo, cards):
+        """Test deleting a card removes its reward categories"""
+        # Arrange
+        card_repo.add_spending_categories([
+            SpendingCategoryInfo(card_id=cards[0].id, category=SpendingCategory.DINING, rate=3),
+            SpendingCategoryInfo(card_id=cards[1].id, category=SpendingCategory.GENERAL, rate=1.5)
+        ])
+
+        # Act
+        deleted = card_repo.delete_card(cards[0].id)
+
+        # Assert
+        assert deleted is True
+        assert card_repo.get_spending_categories_by_card(cards[0].id) == []
+        assert [category.card_id for category in card_repo.get_spending_categories_for_cards([1, 2])] == [2]
+        assert card_repo.delete_card(cards[0].id) is False
+
+    def test_delete_user_cascades(self, user_repo, au_repo, banks, user):
+        """Test deleting a user removes their spending and authorized user rows"""
+        # Arrange
+        user_repo.set_spending_profile(user.id, {SpendingCategory.GAS: 100})
+        au_repo.add_info(AuthorizedUserInfo(user_id=user.id, bank_id=banks[0].id, add_after_age_eighteen=True))
+
+        # Act
+        user_repo.delete_user(user.id)
+
+        # Assert
+        assert user_repo.get_spending_categories_by_user(user.id) == []
+        assert au_repo.get_info_count() == 0
+
+    def test_unique_email(self, user_repo, user):
+        """Test two users cannot share an email"""
+        # Act / Assert
+        with pytest.raises(psycopg.errors.UniqueViolation):
+            user_repo.create_user(user.model_copy(update={"id": None, "name": "Other"}))
+
+    def test_patch_validates_columns(self, user_repo, user):
+        """Test patches reject unknown columns and coerce values"""
+        # Act
+        patched = user_repo.patch_user(user.id, {"credit_score": "excellent"})
+
+        # Assert
+        assert patched.credit_score == CreditScoreRating.EXCELLENT
+        with pytest.raises(ValueError):
+            user_repo.patch_user(user.id, {"created_at": None})
+        assert user_repo.patch_user(99, {"name": "Nobody"}) is None
+
+    def test_set_spending_profile_replaces(self, user_repo, user):
+        """Test categories left out of the new profile are removed and the rest upserted"""
+        # Arrange
+        first = user_repo.set_spending_profile(user.id, {SpendingCategory.GAS: 100, SpendingCategory.DINING: 50.6})
+
+        # Act
+        second = user_repo.set_spending_profile(user.id, {SpendingCategory.DINING: 80})
+
+        # Assert
+        assert [(row.category, row.user_spend) for row in first] == \
+            [(SpendingCategory.GAS, 100), (SpendingCategory.DINING, 51)]
+        assert [(row.id, row.user_spend) for row in second] == [(first[1].id, 80)]
+        assert [row.category for row in user_repo.get_spending_categories_by_user(user.id)] == \
+            [SpendingCategory.DINING]
+
+    def test_anonymised_users_are_banded(self, user_repo, user):
+        """Test the users export has no identifiers, banded incomes and sign-up months"""
+        # Arrange
+        user_repo.create_user(User(name="Other", email="other@example.com", annual_income=124999,
+                                   credit_score=CreditScoreRating.EXCELLENT))
+
+        # Act
+        result = list(user_repo.iter_anonymised_users())
+
+        # Assert
+        month = user.created_at.date().replace(day=1)
+        assert [(row.credit_score, row.income_band, row.joined_month) for row in result] == [
+            (CreditScoreRating.EXCELLENT, 100000, month), (CreditScoreRating.GOOD, 50000, month)
+        ]
+        assert "id" not in AnonymisedUser.model_fields
+
+    def test_add_spending_category_upserts(self, user_repo, user):
+        """Test adding a category the user already has replaces its spend in the same row"""
+        # Arrange
+        first = user_repo.add_spending_category(SpendingCategoryUser(user_id=user.id, category=SpendingCategory.GAS,
+                                                                     user_spend=300))
+
+        # Act
+        second = user_repo.add_spending_category(SpendingCategoryUser(user_id=user.id, category=SpendingCategory.GAS,
+                                                                      user_spend=120))
+
+        # Assert
+        assert second.id == first.id
+        assert [row.user_spend for row in user_repo.get_spending_categories_by_user(user.id)] == [120]
+
+    def test_bulk_upsert_increment(self, user_repo, user):
+        """Test increment adds to the stored spend and duplicate keys are refused"""
+        # Arrange
+        user_repo.bulk_upsert_spending([(user.id, SpendingCategory.GAS, 100)])
+
+        # Act
+        written = user_repo.bulk_upsert_spending([(user.id, SpendingCategory.GAS, 25)], increment=True)
+
+        # Assert
+        assert written == 1
+        assert user_repo.get_spending_categories_by_user(user.id)[0].user_spend == 125
+        with pytest.raises(psycopg.errors.CardinalityViolation):
+            user_repo.bulk_upsert_spending([(user.id, SpendingCategory.GAS, 1), (user.id, "gas", 2)])
+
+    def test_spend_aggregates_follow_enum_order(self, user_repo):
+        """Test groups come out in enum declaration order, with small groups left out"""
+        # Arrange
+        for index in range(3):
+            user = user_repo.create_user(User(name=f"User {index}", email=f"user{index}@example.com",
+                                              annual_income=1000, credit_score=CreditScoreRating.FAIR))
+            user_repo.set_spending_profile(user.id, {SpendingCategory.DINING: 10 * (index + 1),
+                                                     SpendingCategory.GAS: 5})
+        user_repo.patch_user(1, {"credit_score": "excellent"})
+
+        # Act
+        aggregates = list(user_repo.iter_spend_aggregates(min_group_size=2))
+
+        # Assert
+        assert [(aggregate.category, aggregate.credit_score, aggregate.total_spend) for aggregate in aggregates] == [
+            (SpendingCategory.GAS, CreditScoreRating.FAIR, 10),
+            (SpendingCategory.DINING, CreditScoreRating.FAIR, 50),
+        ]
+
+    def test_user_profile(self, user_repo, au_repo, banks, user):
+        """Test a profile gathers spending, authorized user rows and their banks"""
+        # Arrange
+        user_repo.set_spending_profile(user.id, {SpendingCategory.TRAVEL: 300})
+        au_repo.add_all_info([
+            AuthorizedUserInfo(user_id=user.id, bank_id=banks[0].id, add_after_age_eighteen=True),
+            AuthorizedUserInfo(user_id=user.id, bank_id=banks[1].id, add_after_age_eighteen=False)
+        ])
+
+        # Act
+        profile = user_repo.get_user_profile(user.id)
+
+        # Assert
+        assert profile.user.email == "test@example.com"
+        assert [row.user_spend for row in profile.spending_categories] == [300]
+        assert [info.bank_id for info in profile.authorized_user_info] == [2, 1]
+        assert [bank.name for bank in profile.banks] == ["Amex", "Chase"]
+        assert user_repo.get_user_profile(99) is None
+
+    def test_catalog_version_moves_on_writes(self, card_repo, bank_repo, cards):
+        """Test catalog writes change the version, including updates that match no row"""
+        # Arrange
+        version = card_repo.get_catalog_version()
+
+        # Act
+        card_repo.add_spending_category(SpendingCategoryInfo(card_id=cards[0].id, category=SpendingCategory.GAS,
+                                                             rate=2))
+        after_category = card_repo.get_catalog_version()
+        bank_repo.patch_bank(99, {"name": "Missing"})
+
+        # Assert
+        assert after_category > version
+        assert card_repo.get_catalog_version() > after_category
+
+    def test_sync_catalog(self, card_repo, banks, cards):
+        """Test a feed inserts, updates, keeps and deletes cards by name"""
+        # Arrange
+        feed = [
+            Card(name="Sapphire", bank_id=banks[0].id, card_type=CardType.GENERAL, annual_fee=95,
+                 reward_structure=RewardStructure.POINTS),
+            Card(name="Gold", bank_id=banks[1].id, card_type=CardType.GENERAL, annual_fee=325,
+                 reward_structure=RewardStructure.POINTS, foreign_transaction_fee=0.03),
+            Card(name="Platinum", bank_id=banks[1].id, card_type=CardType.GENERAL, annual_fee=695,
+                 reward_structure=RewardStructure.POINTS)
+        ]
+
+        # Act
+        result = card_repo.sync_catalog(feed)
+
+        # Assert
+        assert (result.inserted, result.updated, result.unchanged, result.deleted) == (1, 1, 1, 1)
+        assert [card.name for card in card_repo.iter_all_cards()] == ["Sapphire", "Gold", "Platinum"]
+        with pytest.raises(ValueError):
+            card_repo.sync_catalog([])
+
+    def test_failing_sync_catalog_changes_nothing(self, card_repo, banks, cards):
+        """Test a feed with one bad row leaves the catalog and its version as they were"""
+        # Arrange
+        version = card_repo.get_catalog_version()
+        feed = [
+            Card(name="Platinum", bank_id=banks[1].id, card_type=CardType.GENERAL, annual_fee=695,
+                 reward_structure=RewardStructure.POINTS),
+            Card(name="Bad", bank_id=99, card_type=CardType.GENERAL, reward_structure=RewardStructure.POINTS)
+        ]
+
+        # Act
+        with pytest.raises(psycopg.errors.ForeignKeyViolation):
+            card_repo.sync_catalog(feed)
+
+        # Assert
+        assert [card.name for card in card_repo.iter_all_cards()] == ["Sapphire", "Freedom", "Gold"]
+        assert card_repo.get_catalog_version() == version
+        assert card_repo.get_card_by_id(cards[0].id) == cards[0]
+
+    def test_failing_spending_batches_change_nothing(self, user_repo, user):
+        """Test a spending batch with one bad user leaves every row and the caller's objects alone"""
+        # Arrange
+        user_repo.set_spending_profile(user.id, {SpendingCategory.GAS: 10})
+        spendings = [
+            SpendingCategoryUser(user_id=user.id, category=SpendingCategory.TRAVEL, user_spend=5),
+            SpendingCategoryUser(user_id=99, category=SpendingCategory.TRAVEL, user_spend=5)
+        ]
+
+        # Act
+        with pytest.raises(psycopg.errors.ForeignKeyViolation):
+            user_repo.set_spending_profiles({user.id: {SpendingCategory.DINING: 5}, 99: {SpendingCategory.GAS: 1}})
+        with pytest.raises(psycopg.errors.ForeignKeyViolation):
+            user_repo.bulk_upsert_spending([(user.id, SpendingCategory.GAS, 5), (99, SpendingCategory.GAS, 5)],
+                                           increment=True)
+        with pytest.raises(psycopg.errors.ForeignKeyViolation):
+            user_repo.add_spending_categories(spendings)
+
+        # Assert
+        assert [(row.category, row.user_spend) for row in user_repo.get_spending_categories_by_user(user.id)] == \
+            [(SpendingCategory.GAS, 10)]
+        assert spendings[0].id is None
+
+    def test_failing_insert_batches_change_nothing(self, card_repo, au_repo, cards, user, banks):
+        """Test category and authorized user batches with one bad row insert nothing"""
+        # Arrange
+        categories = [
+            SpendingCategoryInfo(card_id=cards[0].id, category=SpendingCategory.DINING, rate=3),
+            SpendingCategoryInfo(card_id=99, category=SpendingCategory.DINING, rate=3)
+        ]
+        infos = [
+            AuthorizedUserInfo(user_id=user.id, bank_id=banks[0].id, add_after_age_eighteen=True),
+            AuthorizedUserInfo(user_id=user.id, bank_id=99, add_after_age_eighteen=True)
+        ]
+
+        # Act
+        with pytest.raises(psycopg.errors.ForeignKeyViolation):
+            card_repo.add_spending_categories(categories)
+        with pytest.raises(psycopg.errors.ForeignKeyViolation):
+            au_repo.add_all_info(infos)
+
+        # Assert
+        assert card_repo.get_spending_categories_by_card(cards[0].id) == []
+        assert au_repo.get_info_count() == 0
+        assert categories[0].id is None and infos[0].id is None
+
+    def test_batches(self, card_repo, user_repo, cards, user):
+        """Test batch scans hold the same rows, in the same order, as the list scans"""
+        # Arrange
+        other = user_repo.create_user(User(name="Other", email="other@example.com", annual_income=1,
+                                           credit_score=CreditScoreRating.FAIR))
+        user_repo.set_spending_profile(other.id, {SpendingCategory.GAS: 10})
+        user_repo.set_spending_profile(user.id, {SpendingCategory.TRAVEL: 30, SpendingCategory.GAS: 20})
+
+        # Act
+        card_batch = card_repo.get_all_cards_batch(limit=2)
+        spend_batch = user_repo.get_spending_batch()
+
+        # Assert
+        assert card_batch.to_models() == card_repo.get_all_cards(limit=2)
+        assert [(row.user_id, row.category) for row in spend_batch] == [
+            (user.id, SpendingCategory.TRAVEL), (user.id, SpendingCategory.GAS), (other.id, SpendingCategory.GAS)
+        ]
+        assert len(user_repo.get_spending_batch([other.id, 99])) == 1
+
+    def test_authorized_user_queries(self, au_repo, user, banks):
+        """Test lookups by user, bank and pair, newest first"""
+        # Arrange
+        first = au_repo.add_info(AuthorizedUserInfo(user_id=user.id, bank_id=banks[0].id,
+                                                    add_after_age_eighteen=True))
+        second = au_repo.add_info(AuthorizedUserInfo(user_id=user.id, bank_id=banks[1].id,
+                                                     add_after_age_eighteen=False))
+
+        # Act / Assert
+        assert [info.id for info in au_repo.get_all_info_by_user(user.id)] == [second.id, first.id]
+        assert [info.id for info in au_repo.get_all_info_by_bank(banks[1].id)] == [second.id]
+        assert au_repo.get_info_by_user_and_bank(user.id, banks[0].id).id == first.id
+        assert au_repo.remove_all_info_by_user(user.id) == 2
+        assert au_repo.get_all_info() == []
+
+
+class TestTable():
+
+    @pytest.fixture
+    def table(self):
+        return Table("items", unique={"name": lambda row: row["name"]},
+                     hashed={"group": lambda row: row["group"]},
+                     ordered={"rank": lambda row: (row["rank"],)})
+
+    def test_indexes_follow_replace_and_delete(self, table):
+        """Test every index is kept in step with the rows"""
+        # Arrange
+        table.insert(1, {"name": "a", "group": 1, "rank": 3})
+        table.insert(2, {"name": "b", "group": 1, "rank": 1})
+        table.insert(3, {"name": None, "group": 2, "rank": 2})
+        table.insert(4, {"name": None, "group": 2, "rank": 2})
+
+        # Act
+        table.replace(1, {"name": "c", "group": 2, "rank": 0})
+        table.delete(2)
+
+        # Assert
+        assert table.find_unique("name", "c")["rank"] == 0
+        assert table.find_unique("name", "a") is None
+        assert table.ids("group", 1) == []
+        assert table.ids("group", 2) == [1, 3, 4]
+        assert [row["rank"] for row in table.scan("rank")] == [0, 2, 2]
+        with pytest.raises(psycopg.errors.UniqueViolation):
+            table.insert(5, {"name": "c", "group": 3, "rank": 5})
+
+    def test_rollback_restores_rows_and_indexes(self, table):
+        """Test rolling back undoes inserts, replaces and deletes, and keeps taken IDs used"""
+        # Arrange
+        table.insert(table.next_id(), {"name": "a", "group": 1, "rank": 3})
+        table.insert(table.next_id(), {"name": "b", "group": 1, "rank": 1})
+        table.begin()
+        table.insert(table.next_id(), {"name": "c", "group": 2, "rank": 2})
+        table.replace(1, {"name": "d", "group": 2, "rank": 0})
+        table.delete(2)
+        table.replace(1, {"name": "e", "group": 3, "rank": 4})
+
+        # Act
+        table.rollback()
+
+        # Assert
+        assert table.rows == {1: {"name": "a", "group": 1, "rank": 3}, 2: {"name": "b", "group": 1, "rank": 1}}
+        assert table.ids("group", 1) == [1, 2]
+        assert table.find_unique("name", "d") is None
+        assert [row["name"] for row in table.scan("rank")] == ["b", "a"]
+        assert table.next_id() == 4
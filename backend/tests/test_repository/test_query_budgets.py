@@ -0,0 +1,160 @@
+import pytest
+from unittest.mock import Mock
+from fastapi.testclient import TestClient
+from src.main import create_app
+from src.controller.dependencies import (get_bank_repository, get_card_repository, get_serialization_cache,
+                                         get_user_repository)
+from src.model.card import Bank, Card, SpendingCategoryInfo
+from src.model.enums import CardType, RewardStructure, SpendingCategory
+from src.model.user import AuthorizedUserInfo, SpendingCategoryUser
+from src.repository.bank_repository import BankRepository
+from src.repository.card_repository import CardRepository
+from src.repository import query_counter
+from src.service.recommendation_service import RecommendationService
+from src.service.serialization_cache import SerializationCache
+
+
+class TestQueryCounter():
+
+    def test_counts_statements_and_round_trips(self):
+        """Test executemany counts one statement per row but one round trip"""
+        # Arrange
+        counter = query_counter.QueryCounter()
+
+        # Act
+        counter.on_connect(0.001)
+        counter.on_query(Mock(), "SELECT 1", None, 0.001, 1, None)
+        counter.on_query(Mock(), "INSERT INTO banks (name)\n VALUES (%s)", [("a",), ("b",)], 0.001, 2, None)
+
+        # Assert
+        assert counter.queries == 3
+        assert counter.round_trips == 3
+        assert counter.connections == 1
+        assert counter.statements == ["SELECT 1", "INSERT INTO banks (name) VALUES (%s)"]
+
+    def test_budget_exceeded_lists_statements(self):
+        """Test a blown budget fails with every statement that ran"""
+        # Act / Assert
+        with pytest.raises(AssertionError, match="Query budget of 1 exceeded") as raised:
+            with query_counter.query_budget(max_queries=1) as counter:
+                counter.on_query(Mock(), "SELECT 1", None, 0.001, 1, None)
+                counter.on_query(Mock(), "SELECT 2", None, 0.001, 1, None)
+        assert "2. SELECT 2" in str(raised.value)
+
+    def test_counts_real_queries(self, query_budget, user_repo, sample_user):
+        """Test statements run through a repository reach the counter"""
+        # Arrange
+        user = user_repo.create_user(sample_user)
+
+        # Act
+        with query_budget(max_queries=1, max_round_trips=2) as counter:
+            user_repo.get_user_by_id(user.id)
+
+        # Assert
+        assert counter.queries == 1
+
+
+class TestQueryBudgets():
+
+    @pytest.fixture
+    def card_repo(self, test_db_url, repo_connection):
+        return CardRepository(test_db_url, connection=repo_connection)
+
+    @pytest.fixture
+    def bank_repo(self, test_db_url, repo_connection):
+        return BankRepository(test_db_url, connection=repo_connection)
+
+    @pytest.fixture
+    def catalog(self, card_repo, bank_repo):
+        """Two banks with three cards, each card earning in two categories"""
+        banks = [bank_repo.create_bank(Bank(name=name, relationship_bank=False, reports_under_eighteen=True))
+                 for name in ("Chase", "Amex")]
+        cards = []
+        for index in range(3):
+            card = card_repo.create_card(Card(
+                name=f"Card {index}",
+                bank_id=banks[index % 2].id,
+                card_type=CardType.GENERAL,
+                annual_fee=index * 95,
+                reward_structure=RewardStructure.CASHBACK
+            ))
+            card_repo.add_spending_categories([
+                SpendingCategoryInfo(card_id=card.id, category=SpendingCategory.DINING, rate=2 + index),
+                SpendingCategoryInfo(card_id=card.id, category=SpendingCategory.GROCERIES, rate=1 + index)
+            ])
+            cards.append(card)
+        return banks, cards
+
+    @pytest.fixture
+    def users(self, user_repo, sample_user, catalog):
+        """Five users, each with spending and an authorized user card"""
+        banks, cards = catalog
+        users = []
+        for index in range(5):
+            user = user_repo.create_user(sample_user.model_copy(update={"email": f"user{index}@example.com"}))
+            user_repo.add_spending_categories([
+                SpendingCategoryUser(user_id=user.id, category=SpendingCategory.DINING, user_spend=300),
+                SpendingCategoryUser(user_id=user.id, category=SpendingCategory.GROCERIES, user_spend=500)
+            ])
+            user_repo.add_authorized_user_info(AuthorizedUserInfo(user_id=user.id, bank_id=banks[0].id,
+                                                                  add_after_age_eighteen=False))
+            users.append(user)
+        return users
+
+    @pytest.fixture
+    def client(self, card_repo, bank_repo, user_repo):
+        cache = SerializationCache()
+        app = create_app()
+        app.dependency_overrides[get_card_repository] = lambda: card_repo
+        app.dependency_overrides[get_bank_repository] = lambda: bank_repo
+        app.dependency_overrides[get_user_repository] = lambda: user_repo
+        app.dependency_overrides[get_serialization_cache] = lambda: cache
+        return TestClient(app, headers={"Accept-Encoding": "identity"})
+
+    def test_user_profile_budget(self, query_budget, user_repo, users):
+        """Test a full profile loads in one query"""
+        with query_budget(max_queries=1, max_round_trips=2):
+            profile = user_repo.get_user_profile(users[0].id)
+
+        assert len(profile.spending_categories) == 2
+        assert len(profile.banks) == 1
+
+    def test_user_profiles_budget_does_not_grow_with_users(self, query_budget, user_repo, users):
+        """Test loading many profiles costs the same as loading one"""
+        with query_budget(max_queries=1, max_round_trips=2):
+            profiles = user_repo.get_user_profiles([user.id for user in users])
+
+        assert len(profiles) == len(users)
+
+    def test_recommendation_budget(self, query_budget, card_repo, bank_repo, user_repo, users):
+        """Test the catalog is loaded once and later recommendations only read the version and profile"""
+        # Arrange
+        service = RecommendationService(card_repo, bank_repo, user_repo)
+
+        # Act / Assert
+        with query_budget(max_queries=5, max_round_trips=10):
+            first = service.recommend_for_user(users[0].id)
+        with query_budget(max_queries=2 * len(users), max_round_trips=4 * len(users)):
+            for user in users:
+                assert service.recommend_for_user(user.id) == first
+
+    def test_catalog_search_budget(self, query_budget, client, catalog):
+        """Test rendering the catalog reads the version and the cards, and only the version once cached"""
+        with query_budget(max_queries=2, max_round_trips=4):
+            response = client.get("/cards")
+        assert len(response.json()) == 3
+
+        with query_budget(max_queries=1, max_round_trips=2):
+            etag = client.get("/cards").headers["ETag"]
+        with query_budget(max_queries=1, max_round_trips=2):
+            assert client.get("/cards", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_card_detail_budget(self, query_budget, client, catalog):
+        """Test a card page reads the version, card, categories and bank once each"""
+        _, cards = catalog
+
+        with query_budget(max_queries=4, max_round_trips=8):
+            response = client.get(f"/cards/{cards[0].id}")
+
+        assert response.status_code == 200
+        assert len(response.json()["spending_categories"]) == 2
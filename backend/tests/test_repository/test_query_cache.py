@@ -0,0 +1,87 @@
+import pytest
+from unittest.mock import MagicMock
+from src.model.card import Bank
+from src.repository.query_cache import QueryCache
+
+pytestmark = pytest.mark.no_database
+
+class TestQueryCache():
+
+    @pytest.fixture
+    def versions(self):
+        return {"banks": 1}
+
+    @pytest.fixture
+    def conn(self, versions):
+        """A connection whose table_versions query answers from the versions dict"""
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.side_effect = lambda: list(versions.items())
+        return conn
+
+    @pytest.fixture
+    def loads(self):
+        return []
+
+    @pytest.fixture
+    def load(self, loads):
+        def load():
+            loads.append(1)
+            return [Bank(id=len(loads), name="Chase", relationship_bank=True, reports_under_eighteen=False)]
+        return load
+
+    def test_hit_skips_load(self, conn, load, loads):
+        """Test an unchanged table version serves the stored result"""
+        # Arrange
+        cache = QueryCache()
+
+        # Act
+        first = cache.get_or_load(conn, "key", ("banks",), load)
+        second = cache.get_or_load(conn, "key", ("banks",), load)
+
+        # Assert
+        assert loads == [1]
+        assert second[0].id == first[0].id
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_version_bump_reloads(self, conn, versions, load, loads):
+        """Test a write to the table makes the entry stale"""
+        # Arrange
+        cache = QueryCache()
+        cache.get_or_load(conn, "key", ("banks",), load)
+
+        # Act
+        versions["banks"] = 2
+        result = cache.get_or_load(conn, "key", ("banks",), load)
+
+        # Assert
+        assert loads == [1, 1]
+        assert result[0].id == 2
+
+    def test_results_are_copies(self, conn, load):
+        """Test changing a returned model leaves the cached one alone"""
+        # Arrange
+        cache = QueryCache()
+        cache.get_or_load(conn, "key", ("banks",), load)[0].name = "Changed"
+
+        # Act
+        result = cache.get_or_load(conn, "key", ("banks",), load)
+
+        # Assert
+        assert result[0].name == "Chase"
+
+    def test_lru_eviction(self, conn, load, loads):
+        """Test the least recently used entry goes first"""
+        # Arrange
+        cache = QueryCache(max_entries=2)
+        cache.get_or_load(conn, "a", ("banks",), load)
+        cache.get_or_load(conn, "b", ("banks",), load)
+        cache.get_or_load(conn, "a", ("banks",), load)
+
+        # Act
+        cache.get_or_load(conn, "c", ("banks",), load)
+        cache.get_or_load(conn, "a", ("banks",), load)
+
+        # Assert
+        assert len(cache) == 2
+        assert len(loads) == 3
@@ -0,0 +1,189 @@
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+from src.repository import instrumentation
+from src.repository.slow_query_log import SlowQueryLog, explain_mode, redact
+
+class TestSlowQueryLog():
+
+    @pytest.fixture
+    def log_path(self, tmp_path):
+        return tmp_path / "slow.log"
+
+    @pytest.fixture
+    def slow_log(self, log_path):
+        slow_log = SlowQueryLog(str(log_path), threshold=0.1)
+        yield slow_log
+        slow_log.close()
+
+    def entries(self, log_path):
+        return [json.loads(line) for line in log_path.read_text().splitlines()]
+
+    @pytest.mark.no_database
+    def test_redact_keeps_only_types(self):
+        """Test parameter values are replaced by their type names"""
+        assert redact(("someone@example.com", 5, None)) == ["str", "int", "NoneType"]
+        assert redact({"email": "someone@example.com"}) == {"email": "str"}
+        assert redact(None) is None
+
+    @pytest.mark.no_database
+    def test_fast_queries_are_ignored(self, slow_log, log_path):
+        """Test statements under the threshold are not logged"""
+        # Act
+        slow_log.on_query(MagicMock(), "SELECT 1", None, 0.05, 1, None)
+
+        # Assert
+        assert log_path.read_text() == ""
+
+    @pytest.mark.no_database
+    def test_slow_select_is_logged_with_plan(self, slow_log, log_path):
+        """Test a slow read is logged with redacted params and its plan"""
+        # Arrange
+        cursor = MagicMock()
+
+        # Act
+        with patch.object(SlowQueryLog, "_explain", return_value="Seq Scan on users") as explain:
+            slow_log.on_query(cursor, "SELECT *\n  FROM users WHERE email = %s", ("someone@example.com",),
+                              0.25, 1, None)
+
+        # Assert
+        explain.assert_called_once_with(cursor.connection, "SELECT *\n  FROM users WHERE email = %s",
+                                        ("someone@example.com",), True)
+        [entry] = self.entries(log_path)
+        assert entry["sql"] == "SELECT * FROM users WHERE email = %s"
+        assert entry["params"] == ["str"]
+        assert entry["elapsed_ms"] == 250
+        assert entry["plan"] == "Seq Scan on users"
+        assert entry["analyzed"] is True
+        assert "someone@example.com" not in log_path.read_text()
+
+    @pytest.mark.no_database
+    def test_writes_are_planned_without_analyze(self, slow_log, log_path):
+        """Test writes get a plain EXPLAIN so they are never run a second time"""
+        # Act
+        with patch.object(SlowQueryLog, "_explain", return_value="Delete on users") as explain:
+            slow_log.on_query(MagicMock(), "DELETE FROM users", None, 0.2, 1, None)
+
+        # Assert
+        assert explain.call_args.args[3] is False
+        [entry] = self.entries(log_path)
+        assert entry["plan"] == "Delete on users"
+        assert entry["analyzed"] is False
+
+    @pytest.mark.no_database
+    @pytest.mark.parametrize("text, mode", [
+        ("SELECT * FROM users", "analyze"),
+        ("WITH recent AS (SELECT id FROM users) SELECT * FROM recent", "analyze"),
+        ("SELECT updated_at FROM table_versions", "analyze"),
+        ("VALUES (1)", "analyze"),
+        ("WITH gone AS (DELETE FROM users RETURNING id) SELECT count(*) FROM gone", "plan"),
+        ("WITH patched AS (UPDATE users SET name = %s RETURNING *) SELECT * FROM patched", "plan"),
+        ("SELECT * FROM users WHERE id = %s FOR UPDATE", "plan"),
+        ("SELECT nextval('users_id_seq')", "plan"),
+        ("INSERT INTO banks (name) VALUES (%s) ON CONFLICT DO NOTHING", "plan"),
+        ("COPY banks FROM STDIN", None),
+        ("TRUNCATE users", None),
+    ])
+    def test_explain_mode(self, text, mode):
+        """Test only statements that cannot write or lock are run under ANALYZE"""
+        assert explain_mode(text) == mode
+
+    @pytest.mark.no_database
+    def test_batches_and_failures_are_not_explained(self, slow_log, log_path):
+        """Test executemany batches and failed statements are logged without a plan"""
+        # Act
+        with patch.object(SlowQueryLog, "_explain") as explain:
+            slow_log.on_query(MagicMock(), "INSERT INTO banks (name) VALUES (%s)", [("a",), ("b",)], 0.2, 2, None)
+            slow_log.on_query(MagicMock(), "SELECT 1", None, 0.2, 1, RuntimeError("canceled"))
+
+        # Assert
+        explain.assert_not_called()
+        inserted, failed = self.entries(log_path)
+        assert inserted["rows"] == 2
+        assert "plan" not in failed
+        assert failed["error"] == "RuntimeError"
+
+    @pytest.mark.no_database
+    def test_same_statement_explained_once_per_interval(self, slow_log, log_path):
+        """Test a repeatedly slow statement is only explained again after the interval"""
+        # Act
+        with patch.object(SlowQueryLog, "_explain", return_value="plan") as explain:
+            slow_log.on_query(MagicMock(), "SELECT 1", None, 0.2, 1, None)
+            slow_log.on_query(MagicMock(), "SELECT 1", None, 0.2, 1, None)
+
+        # Assert
+        assert explain.call_count == 1
+        assert len(self.entries(log_path)) == 2
+
+    @pytest.mark.no_database
+    def test_explain_failure_is_logged(self, slow_log, log_path):
+        """Test the statement is still logged when its plan cannot be read"""
+        # Act
+        with patch.object(SlowQueryLog, "_explain", side_effect=RuntimeError("connection closed")):
+            slow_log.on_query(MagicMock(), "SELECT 1", None, 0.2, 1, None)
+
+        # Assert
+        [entry] = self.entries(log_path)
+        assert entry["explain_error"] == "connection closed"
+
+    @pytest.mark.no_database
+    def test_log_rotates(self, log_path):
+        """Test the log file rolls over once it reaches max_bytes"""
+        # Arrange
+        slow_log = SlowQueryLog(str(log_path), threshold=0, max_bytes=200, backup_count=2, explain=False)
+
+        # Act
+        for _ in range(10):
+            slow_log.on_query(MagicMock(), "SELECT 1", None, 0.2, 1, None)
+        slow_log.close()
+
+        # Assert
+        assert (log_path.parent / "slow.log.1").exists()
+        assert not (log_path.parent / "slow.log.3").exists()
+
+    def test_real_slow_query_is_explained(self, slow_log, log_path, test_db_connection):
+        """Test a slow statement on a listened connection is logged with its real plan"""
+        # Arrange
+        instrumentation.instrument_connection(test_db_connection)
+        instrumentation.add_listener(slow_log)
+
+        # Act
+        try:
+            with test_db_connection.cursor() as cur:
+                cur.execute("SELECT pg_sleep(0.15), count(*) FROM users WHERE email = %s", ("someone@example.com",))
+                assert cur.fetchone()[1] == 0
+        finally:
+            instrumentation.remove_listener(slow_log)
+
+        # Assert
+        [entry] = self.entries(log_path)
+        assert entry["params"] == ["str"]
+        assert "actual time" in entry["plan"]
+
+    def test_slow_modifying_cte_is_not_run_twice(self, slow_log, log_path, test_db_connection):
+        """Test a slow WITH ... INSERT gets a plan without its insert or nextval being repeated"""
+        # Arrange
+        instrumentation.instrument_connection(test_db_connection)
+        instrumentation.add_listener(slow_log)
+
+        # Act
+        try:
+            with test_db_connection.cursor() as cur:
+                cur.execute("""
+                    WITH added AS (
+                        INSERT INTO banks (name, relationship_bank, reports_under_eighteen)
+                        VALUES (%s, false, false) RETURNING id
+                    )
+                    SELECT id, pg_sleep(0.15) FROM added
+                """, ("Slow Bank",))
+                [(bank_id, _)] = cur.fetchall()
+                cur.execute("SELECT count(*), max(id) FROM banks")
+                counts = cur.fetchone()
+        finally:
+            instrumentation.remove_listener(slow_log)
+
+        # Assert
+        [entry] = self.entries(log_path)
+        assert entry["analyzed"] is False
+        assert "actual time" not in entry["plan"]
+        assert counts == (1, bank_id)
@@ -0,0 +1,78 @@
+import pytest
+from src.model.card import Bank, Card, SpendingCategoryInfo
+from src.model.enums import CardType, RewardStructure, SpendingCategory
+from src.model.user import AuthorizedUserInfo, SpendingCategoryUser, User
+from src.repository.card_repository import CardRepository
+from src.repository.unit_of_work import UnitOfWork
+
+
+@pytest.mark.committed
+class TestUnitOfWork():
+
+    @pytest.fixture
+    def uow(self, test_db_url):
+        return UnitOfWork(test_db_url)
+
+    def test_create_card_with_categories(self, uow, user_repo, test_db_url):
+        """Test a card and its categories are written in one transaction"""
+        # Act
+        with uow:
+            bank = uow.banks.create_bank(Bank(name="Chase", relationship_bank=True, reports_under_eighteen=False))
+            card = uow.cards.create_card(Card(name="Freedom", bank_id=bank.id, card_type=CardType.GENERAL,
+                                              reward_structure=RewardStructure.CASHBACK))
+            uow.cards.add_spending_categories([
+                SpendingCategoryInfo(card_id=card.id, category=SpendingCategory.DINING, rate=3.0),
+                SpendingCategoryInfo(card_id=card.id, category=SpendingCategory.GENERAL, rate=1.5)
+            ])
+
+        # Assert
+        card_repo = CardRepository(test_db_url)
+        categories = card_repo.get_spending_categories_by_card(card.id)
+        assert card_repo.get_card_by_id(card.id).name == "Freedom"
+        assert [c.category for c in categories] == [SpendingCategory.DINING, SpendingCategory.GENERAL]
+        assert all(c.id is not None for c in categories)
+
+    def test_create_user_with_spending_and_au_info(self, uow, user_repo, sample_user):
+        """Test a user, their spend rows and AU info commit together"""
+        # Act
+        with uow:
+            bank = uow.banks.create_bank(Bank(name="Chase", relationship_bank=True, reports_under_eighteen=False))
+            user = uow.users.create_user(sample_user)
+            uow.users.add_spending_categories([
+                SpendingCategoryUser(user_id=user.id, category=SpendingCategory.GAS, user_spend=300),
+                SpendingCategoryUser(user_id=user.id, category=SpendingCategory.DINING, user_spend=150)
+            ])
+            uow.authorized_users.add_all_info([
+                AuthorizedUserInfo(user_id=user.id, bank_id=bank.id, add_after_age_eighteen=False)
+            ])
+
+        # Assert
+        profile = user_repo.get_user_profile(user.id)
+        assert len(profile.spending_categories) == 2
+        assert len(profile.authorized_user_info) == 1
+        assert profile.banks[0].name == "Chase"
+
+    def test_rollback_on_error(self, uow, user_repo, sample_user):
+        """Test nothing is committed when the block raises"""
+        # Act
+        with pytest.raises(RuntimeError):
+            with uow:
+                user = uow.users.create_user(sample_user)
+                uow.users.add_spending_categories([
+                    SpendingCategoryUser(user_id=user.id, category=SpendingCategory.GAS, user_spend=300)
+                ])
+                raise RuntimeError("import failed")
+
+        # Assert
+        assert user_repo.get_user_by_id(user.id) is None
+        assert user_repo.get_spending_categories_by_user(user.id) == []
+
+    def test_reads_see_uncommitted_writes(self, uow, sample_user):
+        """Test repositories inside the unit of work see each other's writes"""
+        # Act
+        with uow:
+            user = uow.users.create_user(sample_user)
+            found = uow.users.get_user_by_id(user.id)
+
+        # Assert
+        assert found == user
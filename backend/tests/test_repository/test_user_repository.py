@@ -1,4 +1,7 @@
-from src.model.user import User, SpendingCategoryUser
+import pytest
+from src.model.user import User, SpendingCategoryUser, AuthorizedUserInfo
+from src.repository.authorized_user_repository import AuthorizedUserRepository
+from src.repository.bank_repository import BankRepository
 from src.model.card import Bank
 from src.model.enums import SpendingCategory
 class TestUserRepository():
@@ -146,6 +149,29 @@ class TestUserRepository():
         assert result.id is not None
         assert result.created_at is not None
         
+    def test_add_spending_category_twice_updates_the_row(self, user_repo, sample_user):
+        """Test a second add for the same category replaces its spend instead of adding a row"""
+        # Arrange
+        user = user_repo.create_user(sample_user)
+        first = user_repo.add_spending_category(SpendingCategoryUser(
+            user_id=user.id,
+            category=SpendingCategory.GAS,
+            user_spend=300
+        ))
+
+        # Act
+        second = user_repo.add_spending_category(SpendingCategoryUser(
+            user_id=user.id,
+            category=SpendingCategory.GAS,
+            user_spend=120
+        ))
+
+        # Assert
+        assert second.id == first.id
+        result = user_repo.get_spending_categories_by_user(user.id)
+        assert len(result) == 1
+        assert result[0].user_spend == 120
+
     def test_remove_spending_catagory_success(self, user_repo, sample_user):
 
         #Arrange
@@ -254,4 +280,339 @@ class TestUserRepository():
         print(result)
         print(inital_list)
         assert result == inital_list
-        
+
+    def test_get_user_profile(self, user_repo, sample_user, test_db_url, repo_connection):
+
+        #Arrange
+
+        user = user_repo.create_user(sample_user)
+        bank = BankRepository(test_db_url, connection=repo_connection).create_bank(Bank(
+            name="Chase",
+            relationship_bank=True,
+            reports_under_eighteen=False
+        ))
+        user_repo.add_spending_category(SpendingCategoryUser(
+            user_id=user.id,
+            category=SpendingCategory.GAS,
+            user_spend=300
+        ))
+        AuthorizedUserRepository(test_db_url, connection=repo_connection).add_info(AuthorizedUserInfo(
+            user_id=user.id,
+            bank_id=bank.id,
+            add_after_age_eighteen=True
+        ))
+
+        #Act
+
+        profile = user_repo.get_user_profile(user.id)
+
+        #Assert
+
+        assert profile.user == user
+        assert len(profile.spending_categories) == 1
+        assert profile.spending_categories[0].category == SpendingCategory.GAS
+        assert profile.spending_categories[0].user_spend == 300
+        assert len(profile.authorized_user_info) == 1
+        assert profile.authorized_user_info[0].bank_id == bank.id
+        assert [b.name for b in profile.banks] == ["Chase"]
+
+    def test_get_user_profile_empty_relations(self, user_repo, sample_user):
+
+        #Arrange
+
+        user = user_repo.create_user(sample_user)
+
+        #Act
+
+        profile = user_repo.get_user_profile(user.id)
+
+        #Assert
+
+        assert profile.user == user
+        assert profile.spending_categories == []
+        assert profile.authorized_user_info == []
+        assert profile.banks == []
+
+    def test_get_user_profile_not_found(self, user_repo, sample_user):
+
+        #Act
+
+        profile = user_repo.get_user_profile(999)
+
+        #Assert
+
+        assert profile is None
+
+    def test_get_user_profiles_batch(self, user_repo, sample_user):
+
+        #Arrange
+
+        first = user_repo.create_user(sample_user)
+        second = user_repo.create_user(User(
+            name="Second User",
+            email="second@example.com",
+            annual_income=20000,
+            credit_score="fair"
+        ))
+        user_repo.add_spending_category(SpendingCategoryUser(
+            user_id=second.id,
+            category=SpendingCategory.DINING,
+            user_spend=120
+        ))
+
+        #Act
+
+        profiles = user_repo.get_user_profiles([first.id, second.id, 999])
+
+        #Assert
+
+        assert set(profiles) == {first.id, second.id}
+        assert profiles[first.id].spending_categories == []
+        assert profiles[second.id].spending_categories[0].user_spend == 120
+
+    def test_get_spending_batch(self, user_repo, sample_user):
+        """Test spending rows come back in columns, grouped by user"""
+        # Arrange
+        first = user_repo.create_user(sample_user)
+        second = user_repo.create_user(User(
+            name="Second User",
+            email="second@example.com",
+            annual_income=20000,
+            credit_score="fair"
+        ))
+        user_repo.set_spending_profile(second.id, {SpendingCategory.DINING: 120})
+        user_repo.set_spending_profile(first.id, {SpendingCategory.GAS: 40, SpendingCategory.TRAVEL: 300})
+
+        # Act
+        result = user_repo.get_spending_batch()
+        only_second = user_repo.get_spending_batch([second.id, 999])
+
+        # Assert
+        assert list(result.user_ranges()) == [(first.id, 0, 2), (second.id, 2, 3)]
+        assert result[2].category == SpendingCategory.DINING
+        assert result[2].user_spend == 120
+        assert only_second.to_models() == user_repo.get_spending_categories_by_user(second.id)
+
+    def test_iter_anonymised_users(self, user_repo, sample_user):
+
+        #Arrange
+
+        user = user_repo.create_user(sample_user)
+
+        #Act
+
+        result = list(user_repo.iter_anonymised_users())
+
+        #Assert
+
+        assert len(result) == 1
+        assert result[0].income_band == 50000
+        assert result[0].joined_month == user.created_at.date().replace(day=1)
+        assert set(result[0].model_dump()) == {"credit_score", "income_band", "joined_month"}
+
+    def test_iter_spend_aggregates_hides_small_groups(self, user_repo, sample_user):
+
+        #Arrange
+
+        for i in range(3):
+            user = user_repo.create_user(User(
+                name=f"User {i}",
+                email=f"user{i}@example.com",
+                annual_income=40000,
+                credit_score="good"
+            ))
+            user_repo.add_spending_category(SpendingCategoryUser(
+                user_id=user.id,
+                category=SpendingCategory.GAS,
+                user_spend=100 * (i + 1)
+            ))
+
+        #Act
+
+        grouped = list(user_repo.iter_spend_aggregates(min_group_size=3))
+        hidden = list(user_repo.iter_spend_aggregates(min_group_size=4))
+
+        #Assert
+
+        assert len(grouped) == 1
+        assert grouped[0].category == SpendingCategory.GAS
+        assert grouped[0].user_count == 3
+        assert grouped[0].total_spend == 600
+        assert grouped[0].average_spend == 200
+        assert hidden == []
+
+    def test_patch_user_changes_only_given_fields(self, user_repo, sample_user):
+
+        #Arrange
+
+        user = user_repo.create_user(sample_user)
+
+        #Act
+
+        patched = user_repo.patch_user(user.id, {"annual_income": 75000, "credit_score": "excellent"})
+
+        #Assert
+
+        assert patched.id == user.id
+        assert patched.name == "Test User"
+        assert patched.email == "test@example.com"
+        assert patched.annual_income == 75000
+        assert patched.credit_score == "excellent"
+        assert patched.created_at == user.created_at
+
+    def test_patch_user_unchanged_value_returns_row(self, user_repo, sample_user):
+
+        #Arrange
+
+        user = user_repo.create_user(sample_user)
+
+        #Act
+
+        patched = user_repo.patch_user(user.id, {"annual_income": 50000})
+        empty = user_repo.patch_user(user.id, {})
+
+        #Assert
+
+        assert patched == user
+        assert patched.annual_income == 50000
+        assert empty == user
+
+    def test_patch_user_not_found(self, user_repo, sample_user):
+
+        #Act
+
+        patched = user_repo.patch_user(999, {"name": "Nobody"})
+
+        #Assert
+
+        assert patched is None
+
+    def test_patch_user_unknown_column(self, user_repo, sample_user):
+
+        #Arrange
+
+        user = user_repo.create_user(sample_user)
+
+        #Act & Assert
+
+        with pytest.raises(ValueError):
+            user_repo.patch_user(user.id, {"id": 5})
+
+    def test_add_spending_category_updates_existing(self, user_repo, sample_user):
+
+        #Arrange
+
+        user = user_repo.create_user(sample_user)
+        first = user_repo.add_spending_category(SpendingCategoryUser(
+            user_id=user.id,
+            category=SpendingCategory.GAS,
+            user_spend=300
+        ))
+
+        #Act
+
+        second = user_repo.add_spending_category(SpendingCategoryUser(
+            user_id=user.id,
+            category=SpendingCategory.GAS,
+            user_spend=450
+        ))
+
+        #Assert
+
+        result = user_repo.get_spending_categories_by_user(user.id)
+        assert second.id == first.id
+        assert len(result) == 1
+        assert result[0].user_spend == 450
+
+    def test_set_spending_profile_replaces_categories(self, user_repo, sample_user):
+
+        #Arrange
+
+        user = user_repo.create_user(sample_user)
+        user_repo.set_spending_profile(user.id, {
+            SpendingCategory.GAS: 300,
+            SpendingCategory.DINING: 200
+        })
+
+        #Act
+
+        result = user_repo.set_spending_profile(user.id, {
+            SpendingCategory.DINING: 250,
+            SpendingCategory.TRAVEL: 100
+        })
+
+        #Assert
+
+        stored = user_repo.get_spending_categories_by_user(user.id)
+        assert {row.category: row.user_spend for row in result} == {
+            SpendingCategory.DINING: 250,
+            SpendingCategory.TRAVEL: 100
+        }
+        assert {row.category: row.user_spend for row in stored} == {
+            SpendingCategory.DINING: 250,
+            SpendingCategory.TRAVEL: 100
+        }
+
+    def test_set_spending_profile_empty_clears(self, user_repo, sample_user):
+
+        #Arrange
+
+        user = user_repo.create_user(sample_user)
+        user_repo.set_spending_profile(user.id, {SpendingCategory.GAS: 300})
+
+        #Act
+
+        result = user_repo.set_spending_profile(user.id, {})
+
+        #Assert
+
+        assert result == []
+        assert user_repo.get_spending_categories_by_user(user.id) == []
+
+    def test_set_spending_profiles_batch(self, user_repo, sample_user):
+
+        #Arrange
+
+        first = user_repo.create_user(sample_user)
+        second = user_repo.create_user(User(
+            name="Second User",
+            email="second@example.com",
+            annual_income=20000,
+            credit_score="fair"
+        ))
+        user_repo.set_spending_profile(second.id, {SpendingCategory.GAS: 80})
+
+        #Act
+
+        result = user_repo.set_spending_profiles({
+            first.id: {SpendingCategory.GROCERIES: 400},
+            second.id: {SpendingCategory.RIDESHARE: 60}
+        })
+
+        #Assert
+
+        assert [row.category for row in result[first.id]] == [SpendingCategory.GROCERIES]
+        assert [row.category for row in result[second.id]] == [SpendingCategory.RIDESHARE]
+        assert [row.category for row in user_repo.get_spending_categories_by_user(second.id)] == [SpendingCategory.RIDESHARE]
+
+    def test_bulk_upsert_spending_sets_and_increments(self, user_repo, sample_user):
+
+        #Arrange
+
+        user = user_repo.create_user(sample_user)
+        user_repo.set_spending_profile(user.id, {SpendingCategory.GAS: 80})
+
+        #Act
+
+        written = user_repo.bulk_upsert_spending([
+            (user.id, SpendingCategory.GAS, 100),
+            (user.id, SpendingCategory.DINING, 50)
+        ])
+        incremented = user_repo.bulk_upsert_spending([(user.id, SpendingCategory.GAS, 25)], increment=True)
+
+        #Assert
+
+        spending = {row.category: row.user_spend for row in user_repo.get_spending_categories_by_user(user.id)}
+        assert written == 2
+        assert incremented == 1
+        assert spending == {SpendingCategory.GAS: 125, SpendingCategory.DINING: 50}
@@ -0,0 +1,143 @@
+import os
+import pytest
+from unittest.mock import Mock
+from src.model.card import Bank, Card, SpendingCategoryInfo
+from src.model.enums import CardType, RewardStructure, SpendingCategory
+from src.service.catalog_snapshot import CatalogSnapshotReader, MappedCards, attach_catalog, publish_catalog
+from src.service.recommendation_service import RecommendationService
+from src.service.scoring import annual_spend_vector, build_catalog_matrix, score_all
+
+class TestCatalogSnapshot():
+
+    @pytest.fixture
+    def cards(self):
+        return [
+            Card(id=1, name="Dining Points", bank_id=1, card_type=CardType.GENERAL, annual_fee=95,
+                 reward_structure=RewardStructure.POINTS),
+            Card(id=2, name="Rotating Cash", bank_id=2, card_type=CardType.STUDENT,
+                 reward_structure=RewardStructure.CASHBACK)
+        ]
+
+    @pytest.fixture
+    def matrix(self, cards):
+        categories = [
+            SpendingCategoryInfo(id=1, card_id=1, category=SpendingCategory.DINING, rate=4.0),
+            SpendingCategoryInfo(id=2, card_id=2, category=SpendingCategory.GAS, rate=5.0, cap=1500,
+                                 quarterly_rotating=True)
+        ]
+        banks = [Bank(id=1, name="Points Bank", relationship_bank=False, transfer_points_value_cents=2.0,
+                      reports_under_eighteen=False)]
+        return build_catalog_matrix(cards, categories, banks, version=7)
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "catalog.bin")
+
+    def test_attach_round_trips_matrix(self, path, matrix, cards):
+        """Test a published snapshot maps back to the same arrays and cards"""
+        # Arrange
+        publish_catalog(path, matrix, cards)
+
+        # Act
+        attached, attached_cards = attach_catalog(path)
+
+        # Assert
+        assert attached.version == 7
+        assert len(attached) == 2
+        for attribute in ("card_ids", "annual_fees", "point_values", "base_rates", "rates", "caps",
+                          "rotating", "card_types"):
+            assert list(getattr(attached, attribute)) == list(getattr(matrix, attribute))
+        assert [card.name for card in attached_cards] == ["Dining Points", "Rotating Cash"]
+        spend = annual_spend_vector({SpendingCategory.DINING: 100, SpendingCategory.GAS: 200})
+        assert list(score_all(attached, spend)) == list(score_all(matrix, spend))
+
+    def test_cards_are_decoded_by_index(self, path, matrix, cards):
+        """Test attached cards stay in the mapping and each decodes to the published card on access"""
+        # Arrange
+        publish_catalog(path, matrix, cards)
+
+        # Act
+        _, attached_cards = attach_catalog(path)
+
+        # Assert
+        assert isinstance(attached_cards, MappedCards)
+        assert len(attached_cards) == 2
+        assert attached_cards[1].model_dump() == cards[1].model_dump()
+        assert attached_cards[-2].name == "Dining Points"
+        assert [card.id for card in attached_cards[::-1]] == [2, 1]
+        with pytest.raises(IndexError):
+            attached_cards[2]
+
+    def test_reader_remaps_new_version(self, path, matrix, cards):
+        """Test workers pick up a newly published snapshot"""
+        # Arrange
+        publish_catalog(path, matrix, cards)
+        reader = CatalogSnapshotReader(path)
+        first, _ = reader.current()
+        matrix.version = 8
+
+        # Act
+        publish_catalog(path, matrix, cards)
+        second, _ = reader.current()
+
+        # Assert
+        assert first.version == 7
+        assert second.version == 8
+        assert reader.current()[0] is second
+
+    def test_rejects_other_files(self, path):
+        """Test attaching something that isn't a snapshot fails clearly"""
+        # Arrange
+        with open(path, "wb") as handle:
+            handle.write(b"\0" * 64)
+
+        # Act / Assert
+        with pytest.raises(ValueError):
+            attach_catalog(path)
+
+    def test_publish_leaves_no_temp_files(self, path, matrix, cards):
+        """Test publishing only leaves the snapshot behind"""
+        # Act
+        publish_catalog(path, matrix, cards)
+
+        # Assert
+        assert os.listdir(os.path.dirname(path)) == ["catalog.bin"]
+
+    def test_service_reads_snapshot(self, path, matrix, cards):
+        """Test the recommendation service uses the snapshot instead of the database"""
+        # Arrange
+        publish_catalog(path, matrix, cards)
+        card_repo = Mock()
+        service = RecommendationService(card_repo=card_repo, bank_repo=Mock(), user_repo=Mock(),
+                                        snapshot=CatalogSnapshotReader(path))
+
+        # Act
+        attached, attached_cards = service.get_catalog()
+
+        # Assert
+        assert attached.version == 7
+        assert len(attached_cards) == 2
+        card_repo.get_catalog_version.assert_not_called()
+
+    def test_service_falls_back_until_snapshot_is_published(self, path, matrix, cards, caplog):
+        """Test a missing snapshot is logged and the catalog is built from the repositories instead"""
+        # Arrange
+        card_repo = Mock()
+        card_repo.get_catalog_version.return_value = 3
+        card_repo.get_all_cards.return_value = cards
+        card_repo.get_spending_categories_for_cards.return_value = []
+        bank_repo = Mock()
+        bank_repo.get_all_banks.return_value = []
+        service = RecommendationService(card_repo=card_repo, bank_repo=bank_repo, user_repo=Mock(),
+                                        snapshot=CatalogSnapshotReader(path))
+
+        # Act
+        fallback, fallback_cards = service.get_catalog()
+        publish_catalog(path, matrix, cards)
+        published, _ = service.get_catalog()
+
+        # Assert
+        assert fallback.version == 3
+        assert [card.name for card in fallback_cards] == ["Dining Points", "Rotating Cash"]
+        assert "No catalog snapshot" in caplog.text
+        assert published.version == 7
@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from src.service.dataloader import DataLoader
+
+class TestDataLoader():
+
+    @pytest.fixture
+    def calls(self):
+        return []
+
+    @pytest.fixture
+    def loader(self, calls):
+        def batch_load(keys):
+            calls.append(list(keys))
+            return {key: f"value-{key}" for key in keys if key < 100}
+        return DataLoader(batch_load)
+
+    def test_same_tick_loads_are_batched(self, loader, calls):
+        """Test loads made together go out as one deduplicated batch"""
+        # Act
+        async def run():
+            return await asyncio.gather(loader.load(1), loader.load(2), loader.load(1))
+        result = asyncio.run(run())
+
+        # Assert
+        assert result == ["value-1", "value-2", "value-1"]
+        assert calls == [[1, 2]]
+
+    def test_results_are_memoized(self, loader, calls):
+        """Test a key is only fetched once per loader"""
+        # Act
+        async def run():
+            first = await loader.load_many([1, 2])
+            second = await loader.load_many([2, 3])
+            return first, second
+        first, second = asyncio.run(run())
+
+        # Assert
+        assert first == ["value-1", "value-2"]
+        assert second == ["value-2", "value-3"]
+        assert calls == [[1, 2], [3]]
+
+    def test_missing_key_is_none(self, loader):
+        """Test keys the batch function doesn't return resolve to None"""
+        # Act
+        result = asyncio.run(loader.load_many([5, 500]))
+
+        # Assert
+        assert result == ["value-5", None]
+
+    def test_max_batch_size(self, calls):
+        """Test large batches are split"""
+        # Arrange
+        def batch_load(keys):
+            calls.append(list(keys))
+            return {key: key for key in keys}
+        loader = DataLoader(batch_load, max_batch_size=2)
+
+        # Act
+        result = asyncio.run(loader.load_many([1, 2, 3]))
+
+        # Assert
+        assert result == [1, 2, 3]
+        assert calls == [[1, 2], [3]]
+
+    def test_failed_batch_can_be_retried(self):
+        """Test a failed batch raises for every key and is not memoized"""
+        # Arrange
+        attempts = []
+
+        def batch_load(keys):
+            attempts.append(list(keys))
+            if len(attempts) == 1:
+                raise RuntimeError("database down")
+            return {key: key for key in keys}
+        loader = DataLoader(batch_load)
+
+        # Act
+        async def run():
+            with pytest.raises(RuntimeError):
+                await loader.load(1)
+            return await loader.load(1)
+        result = asyncio.run(run())
+
+        # Assert
+        assert result == 1
+        assert attempts == [[1], [1]]
+
+    def test_prime(self, loader, calls):
+        """Test primed values are served without a query"""
+        # Act
+        async def run():
+            loader.prime(7, "primed")
+            return await loader.load(7)
+        result = asyncio.run(run())
+
+        # Assert
+        assert result == "primed"
+        assert calls == []
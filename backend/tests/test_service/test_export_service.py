@@ -0,0 +1,98 @@
+import pytest
+from unittest.mock import Mock
+from src.model.card import Card
+from src.model.enums import CardType, CreditScoreRating, RewardStructure, SpendingCategory
+from src.model.user import SpendAggregate
+from src.service.export_service import ExportService, iter_csv, iter_ndjson
+
+class TestExportService():
+
+    @pytest.fixture
+    def cards(self):
+        return [
+            Card(id=i, name=f"Card {i}", bank_id=1, card_type=CardType.GENERAL,
+                 reward_structure=RewardStructure.CASHBACK, sub_description="a, \"quoted\" text")
+            for i in range(1, 4)
+        ]
+
+    @pytest.fixture
+    def service(self, cards):
+        card_repo = Mock()
+        card_repo.iter_all_cards.side_effect = lambda: iter(cards)
+        user_repo = Mock()
+        user_repo.iter_spend_aggregates.side_effect = lambda: iter([
+            SpendAggregate(category=SpendingCategory.GAS, credit_score=CreditScoreRating.GOOD,
+                           user_count=12, total_spend=3600, average_spend=300)
+        ])
+        return ExportService(card_repo=card_repo, user_repo=user_repo)
+
+    def test_ndjson_one_line_per_row(self, service):
+        """Test NDJSON export writes one JSON object per line"""
+        # Act
+        body = b"".join(service.stream("cards", "ndjson"))
+
+        # Assert
+        lines = body.decode().splitlines()
+        assert len(lines) == 3
+        assert '"name":"Card 1"' in lines[0]
+
+    def test_csv_header_and_quoting(self, service):
+        """Test CSV export has a header and quotes awkward values"""
+        # Act
+        body = b"".join(service.stream("cards", "csv")).decode()
+
+        # Assert
+        lines = body.splitlines()
+        assert lines[0].startswith("id,name,bank_id,card_type")
+        assert len(lines) == 4
+        assert '"a, ""quoted"" text"' in lines[1]
+        assert ",general," in lines[1]
+
+    def test_spend_export(self, service):
+        """Test spend aggregates export with enum values"""
+        # Act
+        body = b"".join(service.stream("spend", "csv")).decode()
+
+        # Assert
+        assert body.splitlines()[1] == "gas,good,12,3600.0,300.0"
+
+    def test_chunks_are_bounded(self, cards):
+        """Test rows are flushed once a chunk fills up rather than all at the end"""
+        # Act
+        chunks = list(iter_ndjson(iter(cards), chunk_size=1))
+
+        # Assert
+        assert len(chunks) == 3
+
+    def test_stream_is_lazy(self, service, cards):
+        """Test no rows are read until the stream is consumed"""
+        # Arrange
+        read = []
+
+        def iter_all_cards():
+            for card in cards:
+                read.append(card.id)
+                yield card
+
+        service.card_repo.iter_all_cards.side_effect = iter_all_cards
+
+        # Act
+        stream = service.stream("cards", "ndjson", chunk_size=1)
+
+        # Assert
+        assert read == []
+        next(stream)
+        assert read == [1]
+
+    def test_unknown_dataset(self, service):
+        """Test exporting an unknown dataset"""
+        with pytest.raises(ValueError):
+            service.stream("passwords", "csv")
+
+    def test_csv_empty_rows(self):
+        """Test a CSV export with no rows still has its header"""
+        # Act
+        body = b"".join(iter_csv(iter([]), ["id", "name"]))
+
+        # Assert
+        assert body == b"id,name\r\n"
@@ -0,0 +1,221 @@
+import pytest
+from unittest.mock import Mock
+from src.model.card import Bank, Card, SpendingCategoryInfo
+from src.model.enums import CardType, CreditScoreRating, RewardStructure, SpendingCategory
+from src.model.user import SpendingCategoryUser, User
+from src.repository.memory import MemoryBankRepository, MemoryCardRepository, MemoryStore, MemoryUserRepository
+from src.service.recommendation_service import RecommendationService
+from src.service.scoring import (CATEGORY_INDEX, annual_spend_vector, build_catalog_matrix, category_values,
+                                 optimize_wallet, score_card)
+
+class TestRecommendationService():
+
+    @pytest.fixture
+    def banks(self):
+        return [
+            Bank(id=1, name="Points Bank", relationship_bank=False, transfer_points_value_cents=2.0,
+                 reports_under_eighteen=False),
+            Bank(id=2, name="Cash Bank", relationship_bank=False, reports_under_eighteen=True)
+        ]
+
+    @pytest.fixture
+    def cards(self):
+        return [
+            Card(id=1, name="Dining Points", bank_id=1, card_type=CardType.GENERAL, annual_fee=95,
+                 reward_structure=RewardStructure.POINTS),
+            Card(id=2, name="Flat Cash", bank_id=2, card_type=CardType.STUDENT,
+                 reward_structure=RewardStructure.CASHBACK),
+            Card(id=3, name="Business Cash", bank_id=2, card_type=CardType.BUSINESS,
+                 reward_structure=RewardStructure.CASHBACK)
+        ]
+
+    @pytest.fixture
+    def categories(self):
+        return [
+            SpendingCategoryInfo(id=1, card_id=1, category=SpendingCategory.DINING, rate=4.0),
+            SpendingCategoryInfo(id=2, card_id=2, category=SpendingCategory.GENERAL, rate=1.5),
+            SpendingCategoryInfo(id=3, card_id=3, category=SpendingCategory.GAS, rate=5.0, cap=1500,
+                                 quarterly_rotating=True)
+        ]
+
+    @pytest.fixture
+    def service(self, cards, categories, banks):
+        card_repo = Mock()
+        card_repo.get_catalog_version.return_value = 1
+        card_repo.get_all_cards.return_value = cards
+        card_repo.get_spending_categories_for_cards.return_value = categories
+        bank_repo = Mock()
+        bank_repo.get_all_banks.return_value = banks
+        return RecommendationService(card_repo=card_repo, bank_repo=bank_repo, user_repo=Mock())
+
+    def test_score_card_uses_bank_point_value(self, cards, categories, banks):
+        """Test points cards are valued at the bank's transfer value"""
+        # Arrange
+        matrix = build_catalog_matrix(cards, categories, banks)
+        spend = annual_spend_vector({SpendingCategory.DINING: 100})
+
+        # Act
+        result = score_card(matrix, 0, spend)
+
+        # Assert
+        # $1200 of dining at 4x, 2 cents a point
+        assert result == pytest.approx(96.0)
+
+    def test_score_card_rotating_cap(self, cards, categories, banks):
+        """Test rotating bonuses only apply to one capped quarter"""
+        # Arrange
+        matrix = build_catalog_matrix(cards, categories, banks)
+        spend = annual_spend_vector({SpendingCategory.GAS: 1000})
+
+        # Act
+        result = score_card(matrix, 2, spend)
+
+        # Assert
+        # $3000 of the $12000 is in the bonus quarter but capped at $1500
+        assert result == pytest.approx((1500 * 5 + 10500 * 1) / 100)
+
+    def test_recommend_orders_by_net_value(self, service):
+        """Test recommendations are ranked by rewards minus annual fee"""
+        # Arrange
+        user = User(id=1, name="Test User", email="test@example.com", annual_income=90000,
+                    credit_score=CreditScoreRating.EXCELLENT)
+        spending = [SpendingCategoryUser(id=1, user_id=1, category=SpendingCategory.DINING, user_spend=1000)]
+
+        # Act
+        result = service.recommend(user, spending, limit=2)
+
+        # Assert
+        assert [rec.card.name for rec in result] == ["Dining Points", "Flat Cash"]
+        assert result[0].estimated_annual_rewards == pytest.approx(960.0)
+        assert result[0].net_annual_value == pytest.approx(865.0)
+
+    def test_recommend_filters_by_credit_score(self, service):
+        """Test users with no credit history only see student and secured cards"""
+        # Arrange
+        user = User(id=1, name="Test User", email="test@example.com", annual_income=0,
+                    credit_score=CreditScoreRating.NONE)
+
+        # Act
+        result = service.recommend(user, [])
+
+        # Assert
+        assert [rec.card.name for rec in result] == ["Flat Cash"]
+
+    def test_catalog_rebuilt_only_on_version_change(self, service):
+        """Test the scoring matrix is cached per catalog version"""
+        # Act
+        first = service.get_catalog()
+        second = service.get_catalog()
+        service.card_repo.get_catalog_version.return_value = 2
+        third = service.get_catalog()
+
+        # Assert
+        assert first is second
+        assert third is not first
+        assert service.card_repo.get_all_cards.call_count == 2
+
+    def test_recommend_for_missing_user(self, service):
+        """Test recommending for a user that doesn't exist"""
+        # Arrange
+        service.user_repo.get_user_profile.return_value = None
+
+        # Act
+        result = service.recommend_for_user(99999)
+
+        # Assert
+        assert result is None
+
+    def test_category_values_sum_to_score(self, cards, categories, banks):
+        """Test per-category rewards add up to the card's score"""
+        # Arrange
+        matrix = build_catalog_matrix(cards, categories, banks)
+        spend = annual_spend_vector({SpendingCategory.DINING: 300, SpendingCategory.GAS: 1000,
+                                     SpendingCategory.GROCERIES: 200})
+
+        # Act / Assert
+        for row in range(len(matrix)):
+            assert sum(category_values(matrix, row, spend)) == pytest.approx(score_card(matrix, row, spend))
+
+    def test_category_values_match_single_category_scores(self, cards, categories, banks):
+        """Test each category's value is what score_card gives for that category's spend alone"""
+        # Arrange
+        matrix = build_catalog_matrix(cards, categories, banks)
+        monthly = {SpendingCategory.DINING: 300, SpendingCategory.GAS: 1000, SpendingCategory.GENERAL: 50}
+        spend = annual_spend_vector(monthly)
+
+        # Act / Assert
+        for row in range(len(matrix)):
+            values = category_values(matrix, row, spend)
+            for category, amount in monthly.items():
+                alone = score_card(matrix, row, annual_spend_vector({category: amount}))
+                assert values[CATEGORY_INDEX[category]] == pytest.approx(alone)
+
+    def test_optimize_wallet_combines_cards(self, banks):
+        """Test the wallet adds a card only for the categories where it beats the others"""
+        # Arrange
+        cards = [
+            Card(id=1, name="Dining Cash", bank_id=2, card_type=CardType.GENERAL,
+                 reward_structure=RewardStructure.CASHBACK),
+            Card(id=2, name="Grocery Cash", bank_id=2, card_type=CardType.GENERAL, annual_fee=50,
+                 reward_structure=RewardStructure.CASHBACK),
+            Card(id=3, name="Pricey Grocery Cash", bank_id=2, card_type=CardType.GENERAL, annual_fee=500,
+                 reward_structure=RewardStructure.CASHBACK)
+        ]
+        categories = [
+            SpendingCategoryInfo(id=1, card_id=1, category=SpendingCategory.DINING, rate=4.0),
+            SpendingCategoryInfo(id=2, card_id=2, category=SpendingCategory.GROCERIES, rate=3.0),
+            SpendingCategoryInfo(id=3, card_id=3, category=SpendingCategory.GROCERIES, rate=4.0)
+        ]
+        matrix = build_catalog_matrix(cards, categories, banks)
+        spend = annual_spend_vector({SpendingCategory.DINING: 100, SpendingCategory.GROCERIES: 500})
+
+        # Act
+        wallet, net = optimize_wallet(matrix, spend, range(len(matrix)), max_cards=3)
+
+        # Assert
+        # Dining Cash: $48 dining + $60 groceries. Grocery Cash then adds $120 for a $50 fee;
+        # Pricey Grocery Cash would add $60 more but costs $500
+        assert wallet == [1, 0]
+        assert net == pytest.approx(48 + 180 - 50)
+
+    def test_optimize_wallet_skips_cards_not_worth_fee(self, cards, categories, banks):
+        """Test no card is picked when none pays for itself"""
+        # Arrange
+        matrix = build_catalog_matrix(cards, categories, banks)
+        spend = annual_spend_vector({})
+
+        # Act
+        wallet, net = optimize_wallet(matrix, spend, range(len(matrix)))
+
+        # Assert
+        assert wallet == []
+        assert net == 0
+
+    def test_recommend_for_user_with_memory_repositories(self):
+        """Test recommendations against the in-memory backend, reloading when the catalog changes"""
+        # Arrange
+        store = MemoryStore()
+        card_repo, bank_repo, user_repo = (MemoryCardRepository(store), MemoryBankRepository(store),
+                                           MemoryUserRepository(store))
+        bank = bank_repo.create_bank(Bank(name="Cash Bank", relationship_bank=False, reports_under_eighteen=True))
+        flat = card_repo.create_card(Card(name="Flat Cash", bank_id=bank.id, card_type=CardType.GENERAL,
+                                          reward_structure=RewardStructure.CASHBACK))
+        card_repo.add_spending_category(SpendingCategoryInfo(card_id=flat.id, category=SpendingCategory.GENERAL,
+                                                             rate=1.5))
+        user = user_repo.create_user(User(name="Test User", email="test@example.com", annual_income=50000,
+                                          credit_score=CreditScoreRating.GOOD))
+        user_repo.set_spending_profile(user.id, {SpendingCategory.GENERAL: 1000})
+        service = RecommendationService(card_repo=card_repo, bank_repo=bank_repo, user_repo=user_repo)
+        before = service.recommend_for_user(user.id)
+
+        # Act
+        better = card_repo.create_card(Card(name="Double Cash", bank_id=bank.id, card_type=CardType.GENERAL,
+                                            reward_structure=RewardStructure.CASHBACK))
+        card_repo.add_spending_category(SpendingCategoryInfo(card_id=better.id, category=SpendingCategory.GENERAL,
+                                                             rate=2.0))
+        after = service.recommend_for_user(user.id)
+
+        # Assert
+        assert [(result.card.name, result.net_annual_value) for result in before] == [("Flat Cash", 180.0)]
+        assert [result.card.name for result in after] == ["Double Cash", "Flat Cash"]
+        assert service.recommend_for_user(99) is None
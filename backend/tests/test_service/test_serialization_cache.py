@@ -0,0 +1,86 @@
+import gzip
+from src.service.serialization_cache import SerializationCache
+
+class TestSerializationCache():
+
+    def test_put_stores_body_and_gzip(self):
+        """Test a stored payload keeps the raw and compressed bytes"""
+        # Arrange
+        cache = SerializationCache()
+
+        # Act
+        payload = cache.put(1, "view", b'[{"id": 1}]')
+
+        # Assert
+        assert payload.body == b'[{"id": 1}]'
+        assert gzip.decompress(payload.gzip_body) == payload.body
+        assert cache.get(1, "view") is payload
+
+    def test_get_other_version_misses(self):
+        """Test payloads are only served for the version they were encoded at"""
+        # Arrange
+        cache = SerializationCache()
+        cache.put(1, "view", b"[]")
+
+        # Act & Assert
+        assert cache.get(2, "view") is None
+        assert cache.get(0, "view") is None
+
+    def test_new_version_drops_old_entries(self):
+        """Test moving to a new version clears the previous version's views"""
+        # Arrange
+        cache = SerializationCache()
+        cache.put(1, "a", b"[]")
+        cache.put(1, "b", b"[]")
+
+        # Act
+        cache.put(2, "a", b"[1]")
+
+        # Assert
+        assert len(cache) == 1
+        assert cache.get(2, "b") is None
+
+    def test_stale_put_is_not_kept(self):
+        """Test a late put for an older version doesn't replace newer views"""
+        # Arrange
+        cache = SerializationCache()
+        cache.put(2, "view", b"[2]")
+
+        # Act
+        payload = cache.put(1, "view", b"[1]")
+
+        # Assert
+        assert payload.body == b"[1]"
+        assert cache.get(2, "view").body == b"[2]"
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest view is evicted past max_entries"""
+        # Arrange
+        cache = SerializationCache(max_entries=2)
+        cache.put(1, "a", b"a")
+        cache.put(1, "b", b"b")
+        cache.get(1, "a")
+
+        # Act
+        cache.put(1, "c", b"c")
+
+        # Assert
+        assert cache.get(1, "a") is not None
+        assert cache.get(1, "b") is None
+
+    def test_get_or_build_builds_once(self):
+        """Test get_or_build only encodes on a miss"""
+        # Arrange
+        cache = SerializationCache()
+        calls = []
+
+        def build():
+            calls.append(1)
+            return b"[]"
+
+        # Act
+        cache.get_or_build(1, "view", build)
+        cache.get_or_build(1, "view", build)
+
+        # Assert
+        assert len(calls) == 1
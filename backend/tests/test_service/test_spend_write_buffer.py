@@ -0,0 +1,114 @@
+import time
+import pytest
+from unittest.mock import Mock
+from src.model.enums import SpendingCategory
+from src.service.spend_write_buffer import SpendWriteBuffer
+
+class TestSpendWriteBuffer():
+
+    @pytest.fixture
+    def user_repo(self):
+        repo = Mock()
+        repo.bulk_upsert_spending.side_effect = lambda rows, increment=False: len(rows)
+        return repo
+
+    @pytest.fixture
+    def buffer(self, user_repo):
+        return SpendWriteBuffer(user_repo, flush_interval=60, register_atexit=False)
+
+    def written(self, user_repo, increment):
+        rows = []
+        for call in user_repo.bulk_upsert_spending.call_args_list:
+            if call.kwargs.get("increment", False) == increment:
+                rows.extend(call.args[0])
+        return sorted(rows)
+
+    def test_updates_are_coalesced_per_key(self, buffer, user_repo):
+        """Test repeated writes to one user and category become a single row"""
+        # Arrange
+        buffer.set_spend(1, SpendingCategory.GAS, 100)
+        buffer.set_spend(1, SpendingCategory.GAS, 150)
+        buffer.add_spend(1, SpendingCategory.GAS, 10)
+        buffer.add_spend(2, SpendingCategory.DINING, 5)
+        buffer.add_spend(2, SpendingCategory.DINING, 7)
+
+        # Act
+        written = buffer.flush()
+
+        # Assert
+        assert written == 2
+        assert self.written(user_repo, increment=False) == [(1, SpendingCategory.GAS, 160)]
+        assert self.written(user_repo, increment=True) == [(2, SpendingCategory.DINING, 12)]
+        assert buffer.metrics().writes_coalesced == 3
+        assert buffer.metrics().queue_depth == 0
+
+    def test_set_discards_earlier_deltas(self, buffer, user_repo):
+        """Test an absolute value replaces increments queued before it"""
+        # Arrange
+        buffer.add_spend(1, SpendingCategory.GAS, 40)
+        buffer.set_spend(1, SpendingCategory.GAS, 100)
+
+        # Act
+        buffer.flush()
+
+        # Assert
+        assert self.written(user_repo, increment=False) == [(1, SpendingCategory.GAS, 100)]
+        assert self.written(user_repo, increment=True) == []
+
+    def test_empty_flush_skips_database(self, buffer, user_repo):
+        """Test flushing nothing makes no calls"""
+        # Act
+        written = buffer.flush()
+
+        # Assert
+        assert written == 0
+        user_repo.bulk_upsert_spending.assert_not_called()
+
+    def test_failed_flush_requeues(self, buffer, user_repo):
+        """Test rows from a failed flush are kept and merged with newer writes"""
+        # Arrange
+        user_repo.bulk_upsert_spending.side_effect = RuntimeError("database down")
+        buffer.add_spend(1, SpendingCategory.GAS, 10)
+        with pytest.raises(RuntimeError):
+            buffer.flush()
+        buffer.add_spend(1, SpendingCategory.GAS, 5)
+        user_repo.bulk_upsert_spending.reset_mock(side_effect=True)
+        user_repo.bulk_upsert_spending.side_effect = lambda rows, increment=False: len(rows)
+
+        # Act
+        buffer.flush()
+
+        # Assert
+        assert self.written(user_repo, increment=True) == [(1, SpendingCategory.GAS, 15)]
+        assert buffer.metrics().failed_flushes == 1
+        assert buffer.metrics().flushes == 1
+
+    def test_size_threshold_triggers_background_flush(self, user_repo):
+        """Test reaching max_pending wakes the flusher before the interval"""
+        # Arrange
+        buffer = SpendWriteBuffer(user_repo, max_pending=2, flush_interval=60, register_atexit=False)
+
+        # Act
+        with buffer:
+            buffer.add_spend(1, SpendingCategory.GAS, 1)
+            buffer.add_spend(2, SpendingCategory.GAS, 1)
+            deadline = time.monotonic() + 5
+            while buffer.metrics().flushes == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        # Assert
+        assert buffer.metrics().flushes == 1
+        assert buffer.metrics().rows_flushed == 2
+
+    def test_close_flushes_remaining(self, user_repo):
+        """Test close writes whatever is still queued"""
+        # Arrange
+        buffer = SpendWriteBuffer(user_repo, flush_interval=60, register_atexit=False).start()
+        buffer.set_spend(1, SpendingCategory.DINING, 30)
+
+        # Act
+        buffer.close()
+
+        # Assert
+        assert self.written(user_repo, increment=False) == [(1, SpendingCategory.DINING, 30)]
+        assert buffer.metrics().queue_depth == 0
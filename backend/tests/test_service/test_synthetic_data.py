@@ -0,0 +1,89 @@
+import pytest
+from src.model.card import Card
+from src.model.enums import SpendingCategory
+from src.model.user import User
+from src.service.synthetic_data import (CARD_COLUMNS, USER_SPEND_COLUMNS, SyntheticDataGenerator, _rows)
+
+class TestSyntheticData():
+
+    @pytest.fixture
+    def generator(self):
+        return SyntheticDataGenerator(seed=7, banks=20, cards=200, users=500)
+
+    def test_same_seed_same_rows(self, generator):
+        """Test generation is deterministic for a seed"""
+        # Arrange
+        other = SyntheticDataGenerator(seed=7, banks=20, cards=200, users=500)
+
+        # Act / Assert
+        assert list(_rows(generator.cards(), CARD_COLUMNS)) == list(_rows(other.cards(), CARD_COLUMNS))
+        assert list(_rows(generator.user_spending(), USER_SPEND_COLUMNS)) == \
+            list(_rows(other.user_spending(), USER_SPEND_COLUMNS))
+
+    def test_different_seed_different_rows(self, generator):
+        """Test another seed gives other data"""
+        # Arrange
+        other = SyntheticDataGenerator(seed=8, banks=20, cards=200, users=500)
+
+        # Act / Assert
+        assert [user.annual_income for user in generator.users()] != [user.annual_income for user in other.users()]
+
+    def test_rows_are_valid_models(self, generator):
+        """Test constructed rows would pass model validation and unique constraints"""
+        # Act
+        cards = list(generator.cards())
+        users = list(generator.users())
+        banks = list(generator.banks())
+
+        # Assert
+        for card in cards:
+            Card.model_validate(card.model_dump())
+        for user in users:
+            User.model_validate(user.model_dump())
+        assert len({bank.name for bank in banks}) == 20
+        assert len({card.name for card in cards}) == 200
+        assert len({user.email for user in users}) == 500
+        assert all(1 <= card.bank_id <= 20 for card in cards)
+
+    def test_spend_categories_unique_per_user(self, generator):
+        """Test no user gets the same category twice"""
+        # Act
+        seen = set()
+        for spend in generator.user_spending():
+            key = (spend.user_id, spend.category)
+
+            # Assert
+            assert key not in seen
+            assert spend.user_spend >= 0
+            seen.add(key)
+        assert {user_id for user_id, _ in seen} == set(range(1, 501))
+
+    def test_card_categories(self, generator):
+        """Test every card has a base rate and bonus rates that fit the schema"""
+        # Act
+        categories = list(generator.card_categories())
+
+        # Assert
+        general = [info for info in categories if info.category == SpendingCategory.GENERAL]
+        assert len(general) == 200
+        assert all(0 < info.rate < 10 for info in categories)
+        assert all(info.cap == 1500 for info in categories if info.quarterly_rotating)
+
+    def test_authorized_users_reference_banks(self, generator):
+        """Test authorized user links point at distinct existing banks"""
+        # Act
+        links = list(generator.authorized_users())
+
+        # Assert
+        assert 0 < len(links) < 500
+        assert all(1 <= link.bank_id <= 20 for link in links)
+        assert len({(link.user_id, link.bank_id) for link in links}) == len(links)
+
+    def test_enum_values_are_written(self, generator):
+        """Test enums are turned into their database labels for COPY"""
+        # Act
+        row = next(_rows(generator.cards(), CARD_COLUMNS))
+
+        # Assert
+        assert isinstance(row[3], str) and not hasattr(row[3], "value")
+        assert row[3] in {"student", "secured", "business", "general"}
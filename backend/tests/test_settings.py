@@ -0,0 +1,53 @@
+import pytest
+from unittest.mock import patch
+from src.settings import Settings, get_settings
+
+class TestSettings():
+
+    def test_from_environ(self):
+        """Test every setting is read from its environment variable"""
+        # Act
+        settings = Settings.from_environ({
+            "DATABASE_URL": "postgresql://localhost/cards",
+            "CATALOG_SNAPSHOT_PATH": "/dev/shm/catalog.bin",
+            "REPOSITORY_INSTRUMENTATION": "true",
+            "SLOW_QUERY_LOG": "slow.log",
+            "SLOW_QUERY_THRESHOLD_MS": "50",
+            "NUMERIC_LOADER": "Decimal",
+        })
+
+        # Assert
+        assert settings.database_url == "postgresql://localhost/cards"
+        assert settings.catalog_snapshot_path == "/dev/shm/catalog.bin"
+        assert settings.repository_instrumentation
+        assert settings.slow_query_log == "slow.log"
+        assert settings.slow_query_threshold_ms == 50
+        assert settings.numeric_loader == "decimal"
+
+    def test_defaults(self):
+        """Test optional features stay off when their variables are unset or empty"""
+        settings = Settings.from_environ({"CATALOG_SNAPSHOT_PATH": "", "REPOSITORY_INSTRUMENTATION": "0",
+                                          "NUMERIC_LOADER": ""})
+
+        assert settings == Settings()
+
+    @pytest.mark.parametrize("numeric_loader", ["scaled", "money"])
+    def test_rejects_numeric_loaders_other_than_float_and_decimal(self, numeric_loader):
+        """Test a loader that would change what every DECIMAL column means is refused"""
+        with pytest.raises(ValueError):
+            Settings.from_environ({"NUMERIC_LOADER": numeric_loader})
+
+    def test_get_settings_loads_once(self):
+        """Test the environment and .env file are only read on first use"""
+        # Arrange
+        get_settings.cache_clear()
+
+        # Act
+        with patch("dotenv.load_dotenv") as load_dotenv:
+            first = get_settings()
+            second = get_settings()
+        get_settings.cache_clear()
+
+        # Assert
+        assert first is second
+        load_dotenv.assert_called_once()